@@ -1,16 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.database import get_db
-from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config.settings import FORECAST_MAX_MONTHS
+from app.db.database import get_async_db
+from app.db.schemas.transaction import TransactionType
+from app.services import analytics_service, forecast_service
+from app.utils.cache import response_cache
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 @router.get("/summary", response_model=Dict)
-async def get_analytics_summary(user_id: int, db: Session = Depends(get_db)):
-    # Placeholder for analytics summary (e.g., total expenses, savings, debts)
-    return {
-        "user_id": user_id,
-        "total_expenses": 0.0,
-        "total_savings": 0.0,
-        "total_debts": 0.0
-    }
\ No newline at end of file
+async def get_analytics_summary(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await response_cache.get_or_compute(
+        user_id, "analytics/summary", {}, lambda: analytics_service.get_summary(db, user_id)
+    )
+
+@router.get("/monthly", response_model=List[Dict])
+async def get_monthly_analytics(
+    user_id: int,
+    start_month: Optional[date] = None,
+    end_month: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await response_cache.get_or_compute(
+        user_id, "analytics/monthly", {"start_month": start_month, "end_month": end_month},
+        lambda: analytics_service.get_monthly(db, user_id, start_month, end_month)
+    )
+
+@router.get("/categories", response_model=List[Dict])
+async def get_category_analytics(
+    user_id: int,
+    type: TransactionType = TransactionType.expense,
+    start_month: Optional[date] = None,
+    end_month: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await response_cache.get_or_compute(
+        user_id, "analytics/categories", {"type": type.value, "start_month": start_month, "end_month": end_month},
+        lambda: analytics_service.get_categories(db, user_id, type.value, start_month, end_month)
+    )
+
+@router.get("/forecast", response_model=Dict)
+async def get_cash_flow_forecast(
+    user_id: int,
+    months: int = Query(12, ge=1, le=FORECAST_MAX_MONTHS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Keyed by day too, so a cached curve never starts in the past
+    today = datetime.now(timezone.utc).date()
+    return await response_cache.get_or_compute(
+        user_id, "analytics/forecast", {"months": months, "today": today},
+        lambda: forecast_service.get_forecast(db, user_id, months, today)
+    )
+
+@router.get("/cache/stats", response_model=Dict)
+async def get_cache_stats():
+    return response_cache.stats()
@@ -1,47 +1,64 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import List, Optional
+from app.db.database import get_async_db
 from app.db.models.budget import Budget
-from app.db.schemas.budget import BudgetCreate, Budget
+from app.db.schemas.budget import BudgetCreate, BudgetUtilization, Budget as BudgetSchema
+from app.utils.cache import response_cache
+from app.services import budget_service
 
 router = APIRouter(prefix="/budgets", tags=["budgets"])
 
-@router.post("/", response_model=Budget, status_code=status.HTTP_201_CREATED)
-async def create_budget(budget: BudgetCreate, user_id: int, db: Session = Depends(get_db)):
+@router.post("/", response_model=BudgetSchema, status_code=status.HTTP_201_CREATED)
+async def create_budget(budget: BudgetCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     db_budget = Budget(**budget.dict(), user_id=user_id)
     db.add(db_budget)
-    db.commit()
-    db.refresh(db_budget)
+    await budget_service.refresh_budget(db, db_budget)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    await db.refresh(db_budget)
     return db_budget
 
-@router.get("/{budget_id}", response_model=Budget)
-async def get_budget(budget_id: int, user_id: int, db: Session = Depends(get_db)):
-    budget = db.query(Budget).filter(Budget.id == budget_id, Budget.user_id == user_id).first()
+@router.get("/utilization", response_model=List[BudgetUtilization])
+async def get_budget_utilization(user_id: int, active_on: Optional[date] = None, db: AsyncSession = Depends(get_async_db)):
+    # Spent vs limit for every budget active on active_on (default today)
+    return await response_cache.get_or_compute(
+        user_id, "budgets/utilization", {"active_on": active_on},
+        lambda: budget_service.get_utilization(db, user_id, active_on)
+    )
+
+@router.get("/{budget_id}", response_model=BudgetSchema)
+async def get_budget(budget_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    budget = await db.scalar(select(Budget).filter(Budget.id == budget_id, Budget.user_id == user_id))
     if not budget:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Budget not found")
     return budget
 
-@router.get("/", response_model=List[Budget])
-async def get_budgets(user_id: int, db: Session = Depends(get_db)):
-    budgets = db.query(Budget).filter(Budget.user_id == user_id).all()
+@router.get("/", response_model=List[BudgetSchema])
+async def get_budgets(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    budgets = (await db.scalars(select(Budget).filter(Budget.user_id == user_id))).all()
     return budgets
 
-@router.put("/{budget_id}", response_model=Budget)
-async def update_budget(budget_id: int, budget: BudgetCreate, user_id: int, db: Session = Depends(get_db)):
-    db_budget = db.query(Budget).filter(Budget.id == budget_id, Budget.user_id == user_id).first()
+@router.put("/{budget_id}", response_model=BudgetSchema)
+async def update_budget(budget_id: int, budget: BudgetCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_budget = await db.scalar(select(Budget).filter(Budget.id == budget_id, Budget.user_id == user_id))
     if not db_budget:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Budget not found")
     for key, value in budget.dict().items():
         setattr(db_budget, key, value)
-    db.commit()
-    db.refresh(db_budget)
+    await budget_service.refresh_budget(db, db_budget)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    await db.refresh(db_budget)
     return db_budget
 
 @router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_budget(budget_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_budget = db.query(Budget).filter(Budget.id == budget_id, Budget.user_id == user_id).first()
+async def delete_budget(budget_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_budget = await db.scalar(select(Budget).filter(Budget.id == budget_id, Budget.user_id == user_id))
     if not db_budget:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Budget not found")
-    db.delete(db_budget)
-    db.commit()
\ No newline at end of file
+    await db.delete(db_budget)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
\ No newline at end of file
@@ -1,15 +1,107 @@
+import asyncio
+import json
+from contextlib import aclosing
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db, new_async_session
+from app.services import chat_service, message_service, retrieval_service
+from app.utils.llm import llm
 from typing import Dict
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+def _question(message):
+    content = message.get("content") if isinstance(message, dict) else None
+    if content is not None and not isinstance(content, str):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="content must be a string")
+    question = (content or "").strip()
+    if not question:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="content is required")
+    return question
+
 @router.post("/message", response_model=Dict)
-async def send_chat_message(message: Dict, user_id: int, db: Session = Depends(get_db)):
-    # Placeholder for AI chat processing (to be integrated with Qdrant later)
+async def send_chat_message(message: Dict, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    question = _question(message)
+    # Totals, breakdowns and the like are answered straight from SQL
+    planned = await chat_service.answer(db, user_id, question)
+    if planned is not None:
+        return {"user_id": user_id, "message": question, "response": planned["answer"], "context": [],
+                "query": {"intent": planned["intent"], "rows": planned["rows"]}}
+    # Retrieval runs in-process over the user's own records; only the answer goes through the LLM backend
+    context = await retrieval_service.retrieve(db, user_id, question)
     return {
         "user_id": user_id,
-        "message": message.get("content"),
-        "response": "AI response placeholder"
-    }
\ No newline at end of file
+        "message": question,
+        "response": await llm.complete(question, context),
+        "context": context,
+    }
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _planned_tokens(answer):
+    yield answer
+
+async def _save_turns(user_id, turns):
+    async with new_async_session() as db:
+        ids = await message_service.record_chat(db, user_id, turns)
+        await db.commit()
+    return ids
+
+# Saves of streams whose client went away, held so they aren't garbage collected mid-write
+_background_saves = set()
+
+@router.post("/stream")
+async def stream_chat_message(message: Dict, user_id: int):
+    """Server-Sent Events: one "context" event (the retrieved records), a "token" event per
+    generated token, then "done" with the ids of the two stored Message rows.
+
+    A question the chat planner answers from SQL gets a "query" event (intent
+    and rows) instead of records and its whole answer as a single token.
+
+    If the client disconnects the generation is stopped; the question and
+    whatever was generated are still stored."""
+    question = _question(message)
+    asked_at = datetime.now(timezone.utc)
+    # Not a request dependency: a session held for the whole stream would pin a pooled connection
+    # for as long as the model takes
+    async with new_async_session() as db:
+        planned = await chat_service.answer(db, user_id, question)
+        context = [] if planned else await retrieval_service.retrieve(db, user_id, question)
+
+    async def stream():
+        tokens = []
+        finished = False
+        try:
+            if planned:
+                yield _event("query", {"intent": planned["intent"], "rows": planned["rows"]})
+                source = _planned_tokens(planned["answer"])
+            else:
+                yield _event("context", context)
+                source = llm.stream(question, context)
+            async with aclosing(source) as generated:
+                async for token in generated:
+                    tokens.append(token)
+                    yield _event("token", {"text": token})
+            finished = True
+        finally:
+            if not finished:
+                # Cancelled or closed: awaiting here would be cancelled too, so save from a new task
+                turns = [(question, True, asked_at)]
+                if tokens:
+                    turns.append(("".join(tokens), False, datetime.now(timezone.utc)))
+                save = asyncio.get_running_loop().create_task(_save_turns(user_id, turns))
+                _background_saves.add(save)
+                save.add_done_callback(_background_saves.discard)
+        # One write for the whole exchange rather than one per token
+        ids = await _save_turns(user_id, [
+            (question, True, asked_at), ("".join(tokens), False, datetime.now(timezone.utc)),
+        ])
+        yield _event("done", {"message_ids": ids})
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
\ No newline at end of file
@@ -1,16 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db
+from app.services import dashboard_service
 from typing import Dict
 
-router = APIRouter(prefix="/analytics", tags=["analytics"])
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
-@router.get("/summary", response_model=Dict)
-async def get_analytics_summary(user_id: int, db: Session = Depends(get_db)):
-    # Placeholder for analytics summary (e.g., total expenses, savings, debts)
-    return {
-        "user_id": user_id,
-        "total_expenses": 0.0,
-        "total_savings": 0.0,
-        "total_debts": 0.0
-    }
\ No newline at end of file
+@router.get("/", response_model=Dict)
+async def get_dashboard(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Every enabled widget in one payload, computed concurrently and timed per widget
+    return await dashboard_service.get_dashboard(db, user_id)
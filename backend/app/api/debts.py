@@ -1,47 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.db.database import get_async_db
 from app.db.models.debt import Debt
-from app.db.schemas.debt import DebtCreate, Debt
+from app.db.schemas.debt import DebtCreate, Debt as DebtSchema
+from app.utils.cache import response_cache
+from app.utils.pagination import Page, paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(prefix="/debts", tags=["debts"])
 
-@router.post("/", response_model=Debt, status_code=status.HTTP_201_CREATED)
-async def create_debt(debt: DebtCreate, user_id: int, db: Session = Depends(get_db)):
+@router.post("/", response_model=DebtSchema, status_code=status.HTTP_201_CREATED)
+async def create_debt(debt: DebtCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     db_debt = Debt(**debt.dict(), user_id=user_id)
     db.add(db_debt)
-    db.commit()
-    db.refresh(db_debt)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    await db.refresh(db_debt)
     return db_debt
 
-@router.get("/{debt_id}", response_model=Debt)
-async def get_debt(debt_id: int, user_id: int, db: Session = Depends(get_db)):
-    debt = db.query(Debt).filter(Debt.id == debt_id, Debt.user_id == user_id).first()
+@router.get("/{debt_id}", response_model=DebtSchema)
+async def get_debt(debt_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    debt = await db.scalar(select(Debt).filter(Debt.id == debt_id, Debt.user_id == user_id))
     if not debt:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Debt not found")
     return debt
 
-@router.get("/", response_model=List[Debt])
-async def get_debts(user_id: int, db: Session = Depends(get_db)):
-    debts = db.query(Debt).filter(Debt.user_id == user_id).all()
-    return debts
+@router.get("/", response_model=Page[DebtSchema])
+async def get_debts(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(Debt).filter(Debt.user_id == user_id)
+    return await paginate(db, query, Debt.created_at, Debt.id, cursor, limit)
 
-@router.put("/{debt_id}", response_model=Debt)
-async def update_debt(debt_id: int, debt: DebtCreate, user_id: int, db: Session = Depends(get_db)):
-    db_debt = db.query(Debt).filter(Debt.id == debt_id, Debt.user_id == user_id).first()
+@router.put("/{debt_id}", response_model=DebtSchema)
+async def update_debt(debt_id: int, debt: DebtCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_debt = await db.scalar(select(Debt).filter(Debt.id == debt_id, Debt.user_id == user_id))
     if not db_debt:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Debt not found")
     for key, value in debt.dict().items():
         setattr(db_debt, key, value)
-    db.commit()
-    db.refresh(db_debt)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    await db.refresh(db_debt)
     return db_debt
 
 @router.delete("/{debt_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_debt(debt_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_debt = db.query(Debt).filter(Debt.id == debt_id, Debt.user_id == user_id).first()
+async def delete_debt(debt_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_debt = await db.scalar(select(Debt).filter(Debt.id == debt_id, Debt.user_id == user_id))
     if not db_debt:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Debt not found")
-    db.delete(db_debt)
-    db.commit()
\ No newline at end of file
+    await db.delete(db_debt)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
\ No newline at end of file
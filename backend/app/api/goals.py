@@ -1,47 +1,52 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.db.models.goal import Goal
-from app.db.schemas.goal import GoalCreate, Goal
+from app.db.schemas.goal import GoalCreate, Goal as GoalSchema
+from app.utils.cache import response_cache
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
-@router.post("/", response_model=Goal, status_code=status.HTTP_201_CREATED)
-async def create_goal(goal: GoalCreate, user_id: int, db: Session = Depends(get_db)):
+@router.post("/", response_model=GoalSchema, status_code=status.HTTP_201_CREATED)
+async def create_goal(goal: GoalCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     db_goal = Goal(**goal.dict(), user_id=user_id)
     db.add(db_goal)
-    db.commit()
-    db.refresh(db_goal)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    await db.refresh(db_goal)
     return db_goal
 
-@router.get("/{goal_id}", response_model=Goal)
-async def get_goal(goal_id: int, user_id: int, db: Session = Depends(get_db)):
-    goal = db.query(Goal).filter(Goal.id == goal_id, Goal.user_id == user_id).first()
+@router.get("/{goal_id}", response_model=GoalSchema)
+async def get_goal(goal_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    goal = await db.scalar(select(Goal).filter(Goal.id == goal_id, Goal.user_id == user_id))
     if not goal:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found")
     return goal
 
-@router.get("/", response_model=List[Goal])
-async def get_goals(user_id: int, db: Session = Depends(get_db)):
-    goals = db.query(Goal).filter(Goal.user_id == user_id).all()
+@router.get("/", response_model=List[GoalSchema])
+async def get_goals(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    goals = (await db.scalars(select(Goal).filter(Goal.user_id == user_id))).all()
     return goals
 
-@router.put("/{goal_id}", response_model=Goal)
-async def update_goal(goal_id: int, goal: GoalCreate, user_id: int, db: Session = Depends(get_db)):
-    db_goal = db.query(Goal).filter(Goal.id == goal_id, Goal.user_id == user_id).first()
+@router.put("/{goal_id}", response_model=GoalSchema)
+async def update_goal(goal_id: int, goal: GoalCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_goal = await db.scalar(select(Goal).filter(Goal.id == goal_id, Goal.user_id == user_id))
     if not db_goal:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found")
     for key, value in goal.dict().items():
         setattr(db_goal, key, value)
-    db.commit()
-    db.refresh(db_goal)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    await db.refresh(db_goal)
     return db_goal
 
 @router.delete("/{goal_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_goal(goal_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_goal = db.query(Goal).filter(Goal.id == goal_id, Goal.user_id == user_id).first()
+async def delete_goal(goal_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_goal = await db.scalar(select(Goal).filter(Goal.id == goal_id, Goal.user_id == user_id))
     if not db_goal:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Goal not found")
-    db.delete(db_goal)
-    db.commit()
\ No newline at end of file
+    await db.delete(db_goal)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
\ No newline at end of file
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List
+from app.db.database import get_async_db
+from app.db.models.merchant_rule import MerchantRule
+from app.db.schemas.merchant_rule import MerchantRuleCreate, MerchantRule as MerchantRuleSchema
+from app.services import categorizer_service, merchant_service
+from app.utils.cache import response_cache
+
+router = APIRouter(prefix="/merchants", tags=["merchants"])
+
+@router.post("/rules", response_model=MerchantRuleSchema, status_code=status.HTTP_201_CREATED)
+async def create_merchant_rule(rule: MerchantRuleCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_rule = MerchantRule(**rule.dict(), user_id=user_id)
+    db.add(db_rule)
+    await db.commit()
+    merchant_service.invalidate_rules(user_id)
+    await db.refresh(db_rule)
+    return db_rule
+
+@router.get("/rules", response_model=List[MerchantRuleSchema])
+async def get_merchant_rules(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    rules = (await db.scalars(select(MerchantRule).filter(MerchantRule.user_id == user_id))).all()
+    return rules
+
+@router.delete("/rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_merchant_rule(rule_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_rule = await db.scalar(select(MerchantRule).filter(MerchantRule.id == rule_id, MerchantRule.user_id == user_id))
+    if not db_rule:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Merchant rule not found")
+    await db.delete(db_rule)
+    await db.commit()
+    merchant_service.invalidate_rules(user_id)
+
+@router.post("/renormalize", response_model=Dict)
+async def renormalize_transactions(user_id: int, overwrite_category: bool = False, db: AsyncSession = Depends(get_async_db)):
+    # Applies the current dictionary and the user's rules to their whole history
+    result = await merchant_service.renormalize_history(db, user_id, overwrite_category)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    categorizer_service.invalidate(user_id)
+    return result
+
+@router.post("/dictionary/reload", response_model=Dict)
+async def reload_merchant_dictionary():
+    # Picks up edits to MERCHANT_DICTIONARY_PATH without a restart (this worker only)
+    return {"keywords": merchant_service.reload_dictionary()}
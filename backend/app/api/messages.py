@@ -1,36 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import datetime
+from app.db.database import get_async_db
 from app.db.models.message import Message
-from app.db.schemas.message import MessageCreate, Message
+from app.db.schemas.message import MessageCreate, MessagesRead, Message as MessageSchema
+from app.services import message_service
+from app.utils.push import push
+from app.utils.pagination import Page, paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
-@router.post("/", response_model=Message, status_code=status.HTTP_201_CREATED)
-async def create_message(message: MessageCreate, user_id: int, db: Session = Depends(get_db)):
+@router.post("/", response_model=MessageSchema, status_code=status.HTTP_201_CREATED)
+async def create_message(message: MessageCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     db_message = Message(**message.dict(), user_id=user_id)
+    if message_service.is_unread(db_message):
+        if await message_service.adjust_unread(db, user_id, db_message.friend_id, 1) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Friend not found")
     db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
+    await db.commit()
+    await db.refresh(db_message)
+    await push.publish(user_id, "message", MessageSchema.model_validate(db_message).model_dump(mode="json"))
     return db_message
 
-@router.get("/{message_id}", response_model=Message)
-async def get_message(message_id: int, user_id: int, db: Session = Depends(get_db)):
-    message = db.query(Message).filter(Message.id == message_id, Message.user_id == user_id).first()
+@router.get("/conversations/{friend_id}", response_model=Page[MessageSchema])
+async def get_conversation(
+    friend_id: int,
+    user_id: int,
+    before: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Newest first; pass next_cursor back as `before` for older messages
+    query = select(Message).filter(Message.user_id == user_id, Message.friend_id == friend_id)
+    return await paginate(db, query, Message.timestamp, Message.id, before, limit)
+
+@router.post("/conversations/{friend_id}/read", response_model=MessagesRead)
+async def mark_conversation_read(
+    friend_id: int,
+    user_id: int,
+    up_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Without up_to every unread message of the conversation is marked
+    marked, unread_count = await message_service.mark_read(db, user_id, friend_id, up_to)
+    if unread_count is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Friend not found")
+    await db.commit()
+    result = {"friend_id": friend_id, "marked": marked, "unread_count": unread_count}
+    # The user's other sessions update their badges
+    await push.publish(user_id, "messages_read", result)
+    return result
+
+@router.get("/{message_id}", response_model=MessageSchema)
+async def get_message(message_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    message = await db.scalar(select(Message).filter(Message.id == message_id, Message.user_id == user_id))
     if not message:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
     return message
 
-@router.get("/", response_model=List[Message])
-async def get_messages(user_id: int, db: Session = Depends(get_db)):
-    messages = db.query(Message).filter(Message.user_id == user_id).all()
-    return messages
+@router.get("/", response_model=Page[MessageSchema])
+async def get_messages(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(Message).filter(Message.user_id == user_id)
+    return await paginate(db, query, Message.timestamp, Message.id, cursor, limit)
 
 @router.delete("/{message_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_message(message_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_message = db.query(Message).filter(Message.id == message_id, Message.user_id == user_id).first()
+async def delete_message(message_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_message = await db.scalar(select(Message).filter(Message.id == message_id, Message.user_id == user_id))
     if not db_message:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
-    db.delete(db_message)
-    db.commit()
\ No newline at end of file
+    if message_service.is_unread(db_message):
+        await message_service.adjust_unread(db, user_id, db_message.friend_id, -1)
+    await db.delete(db_message)
+    await db.commit()
\ No newline at end of file
@@ -1,47 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.db.database import get_async_db
 from app.db.models.nudge import Nudge
-from app.db.schemas.nudge import NudgeCreate, Nudge
+from app.db.schemas.nudge import NudgeCreate, NudgeStatus, Nudge as NudgeSchema
+from app.utils.push import push
+from app.utils.pagination import Page, paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
-@router.post("/", response_model=Nudge, status_code=status.HTTP_201_CREATED)
-async def create_notification(nudge: NudgeCreate, user_id: int, db: Session = Depends(get_db)):
+@router.post("/", response_model=NudgeSchema, status_code=status.HTTP_201_CREATED)
+async def create_notification(nudge: NudgeCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     db_nudge = Nudge(**nudge.dict(), user_id=user_id)
     db.add(db_nudge)
-    db.commit()
-    db.refresh(db_nudge)
+    await db.commit()
+    await db.refresh(db_nudge)
+    await push.publish(user_id, "notification", NudgeSchema.model_validate(db_nudge).model_dump(mode="json"))
     return db_nudge
 
-@router.get("/{nudge_id}", response_model=Nudge)
-async def get_notification(nudge_id: int, user_id: int, db: Session = Depends(get_db)):
-    nudge = db.query(Nudge).filter(Nudge.id == nudge_id, Nudge.user_id == user_id).first()
+@router.get("/{nudge_id}", response_model=NudgeSchema)
+async def get_notification(nudge_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    nudge = await db.scalar(select(Nudge).filter(Nudge.id == nudge_id, Nudge.user_id == user_id))
     if not nudge:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
     return nudge
 
-@router.get("/", response_model=List[Nudge])
-async def get_notifications(user_id: int, db: Session = Depends(get_db)):
-    nudges = db.query(Nudge).filter(Nudge.user_id == user_id).all()
-    return nudges
+@router.get("/", response_model=Page[NudgeSchema])
+async def get_notifications(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[NudgeStatus] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Budget, goal, debt and subscription nudges are precomputed by app.db.generate_nudges
+    query = select(Nudge).filter(Nudge.user_id == user_id)
+    if status:
+        query = query.filter(Nudge.status == status.value)
+    return await paginate(db, query, Nudge.created_at, Nudge.id, cursor, limit)
 
-@router.put("/{nudge_id}", response_model=Nudge)
-async def update_notification(nudge_id: int, nudge: NudgeCreate, user_id: int, db: Session = Depends(get_db)):
-    db_nudge = db.query(Nudge).filter(Nudge.id == nudge_id, Nudge.user_id == user_id).first()
+@router.post("/{nudge_id}/dismiss", response_model=NudgeSchema)
+async def dismiss_notification(nudge_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Generated nudges stay dismissed across job runs (the job never touches status)
+    db_nudge = await db.scalar(select(Nudge).filter(Nudge.id == nudge_id, Nudge.user_id == user_id))
+    if not db_nudge:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
+    db_nudge.status = NudgeStatus.dismissed
+    await db.commit()
+    await db.refresh(db_nudge)
+    return db_nudge
+
+@router.put("/{nudge_id}", response_model=NudgeSchema)
+async def update_notification(nudge_id: int, nudge: NudgeCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_nudge = await db.scalar(select(Nudge).filter(Nudge.id == nudge_id, Nudge.user_id == user_id))
     if not db_nudge:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
     for key, value in nudge.dict().items():
         setattr(db_nudge, key, value)
-    db.commit()
-    db.refresh(db_nudge)
+    await db.commit()
+    await db.refresh(db_nudge)
     return db_nudge
 
 @router.delete("/{nudge_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_notification(nudge_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_nudge = db.query(Nudge).filter(Nudge.id == nudge_id, Nudge.user_id == user_id).first()
+async def delete_notification(nudge_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_nudge = await db.scalar(select(Nudge).filter(Nudge.id == nudge_id, Nudge.user_id == user_id))
     if not db_nudge:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
-    db.delete(db_nudge)
-    db.commit()
\ No newline at end of file
+    await db.delete(db_nudge)
+    await db.commit()
\ No newline at end of file
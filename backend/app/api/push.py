@@ -0,0 +1,71 @@
+import asyncio
+import json
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.config.settings import PUSH_HEARTBEAT_SECONDS
+from app.utils.push import push
+
+router = APIRouter(prefix="/push", tags=["push"])
+
+# New notifications and messages are pushed as {"type": "notification" | "message", "data": ...},
+# with data shaped like the GET /notifications/{id} and GET /messages/{id} responses; marking a
+# conversation read pushes {"type": "messages_read", "data": <POST .../read response>}
+
+async def _receive_until_closed(websocket):
+    # Clients don't send anything we act on; reading is how a disconnect is noticed while idle
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+@router.websocket("/ws")
+async def push_socket(websocket: WebSocket, user_id: int):
+    await websocket.accept()
+    queue = await push.connect(user_id)
+    closed = asyncio.ensure_future(_receive_until_closed(websocket))
+    next_event = None
+    try:
+        while True:
+            if next_event is None:
+                next_event = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {next_event, closed}, timeout=PUSH_HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+            if closed in done:
+                break
+            if next_event in done:
+                await websocket.send_json(next_event.result())
+                next_event = None
+            else:
+                # Keeps proxies from timing out an idle connection
+                await websocket.send_json({"type": "ping"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        closed.cancel()
+        if next_event is not None:
+            next_event.cancel()
+        push.disconnect(user_id, queue)
+
+@router.get("/events")
+async def push_events(user_id: int):
+    """The same events as Server-Sent Events, for clients that can't hold a WebSocket."""
+    async def stream():
+        queue = await push.connect(user_id)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), PUSH_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+        finally:
+            push.disconnect(user_id, queue)
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/stats")
+async def push_stats():
+    return push.stats()
\ No newline at end of file
@@ -1,14 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+import os
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy import Date, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config.settings import RECEIPT_SPOOL_DIR, RECEIPT_MAX_BYTES
+from app.db.database import get_async_db
+from app.db.models.receipt import Receipt, ReceiptStatus
+from app.db.schemas.receipt import Receipt as ReceiptSchema, ReceiptUpload
+from app.services import receipt_match_service, receipt_service
+from app.services.receipt_service import pipeline
+from app.utils.uploads import spool_file
 from typing import Dict
 
 router = APIRouter(prefix="/receipts", tags=["receipts"])
 
-@router.post("/upload", response_model=Dict)
-async def upload_receipt(receipt: Dict, user_id: int, db: Session = Depends(get_db)):
-    # Placeholder for receipt processing (e.g., OCR integration)
-    return {
-        "user_id": user_id,
-        "message": "Receipt upload placeholder"
-    }
\ No newline at end of file
+@router.post("/upload", response_model=ReceiptUpload, status_code=status.HTTP_202_ACCEPTED)
+async def upload_receipt(request: Request, response: Response, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """multipart/form-data with the image as "file". Answers as soon as the image is on disk;
+    the receipt's id is the job to poll (GET /receipts/{id}) or to wait for as a "receipt"
+    push event.
+
+    An image the user already uploaded byte for byte isn't stored or read
+    again: the earlier receipt comes back with 200 and "duplicate": "exact".
+    One that only looks like an earlier receipt is queued as usual, with
+    "duplicate": "similar" and duplicate_of set."""
+    if not pipeline.reserve():
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Receipt processing is busy, retry later",
+            headers={"Retry-After": str(pipeline.retry_after())},
+        )
+    upload = None
+    try:
+        upload = await spool_file(request, "file", RECEIPT_SPOOL_DIR, RECEIPT_MAX_BYTES)
+        receipt, duplicate, distance = await receipt_service.accept(db, user_id, upload)
+    except BaseException:
+        pipeline.release()
+        if upload and os.path.exists(upload["path"]):
+            os.remove(upload["path"])
+        raise
+    if duplicate == "exact":
+        pipeline.release()
+        response.status_code = status.HTTP_200_OK
+    else:
+        pipeline.submit(receipt.id, user_id, receipt.sha256)
+    return ReceiptUpload.model_validate(receipt).model_copy(update={"duplicate": duplicate, "distance": distance})
+
+@router.get("/stats", response_model=Dict)
+async def receipt_stats():
+    """This worker's OCR pipeline: jobs in flight and waiting, throughput and timings."""
+    return pipeline.stats()
+
+@router.post("/match", response_model=Dict)
+async def match_receipts(user_id: int, month: date, create: bool = True, db: AsyncSession = Depends(get_async_db)):
+    """Attach the month's read receipts that have no expense yet (say, read before their SMS was
+    imported) in one pass; with create, the ones still unmatched become expenses. month is any
+    day of it."""
+    start = month.replace(day=1)
+    end = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    day = func.coalesce(Receipt.receipt_date, cast(Receipt.created_at, Date))
+    receipts = (await db.scalars(
+        select(Receipt).filter(
+            Receipt.user_id == user_id, Receipt.status == ReceiptStatus.done, Receipt.transaction_id.is_(None),
+            day >= start, day < end,
+        ).order_by(Receipt.id)
+    )).all()
+    return {"receipts": len(receipts), **await receipt_match_service.attach(db, user_id, receipts, create)}
+
+async def _get_receipt(db, receipt_id, user_id):
+    receipt = await db.scalar(select(Receipt).filter(Receipt.id == receipt_id, Receipt.user_id == user_id))
+    if not receipt:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Receipt not found")
+    return receipt
+
+@router.get("/{receipt_id}", response_model=ReceiptSchema)
+async def get_receipt(receipt_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await _get_receipt(db, receipt_id, user_id)
+
+def _stored_file(path, media_type):
+    # Content-addressed, so a path's bytes never change; FileResponse hands the path to servers
+    # offering the ASGI pathsend extension (sendfile) and streams it from a thread otherwise
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not available")
+    return FileResponse(path, media_type=media_type, headers={"Cache-Control": "private, max-age=31536000, immutable"})
+
+@router.get("/{receipt_id}/image")
+async def get_receipt_image(receipt_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    receipt = await _get_receipt(db, receipt_id, user_id)
+    return _stored_file(receipt_service.stored_path(receipt.sha256 or ""), receipt.content_type)
+
+@router.get("/{receipt_id}/thumbnail")
+async def get_receipt_thumbnail(receipt_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """A JPEG of at most RECEIPT_THUMBNAIL_SIZE px, made once by the worker that read the receipt."""
+    receipt = await _get_receipt(db, receipt_id, user_id)
+    return _stored_file(receipt_service.thumbnail_path(receipt.sha256 or ""), "image/jpeg")
\ No newline at end of file
@@ -1,47 +1,52 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.db.models.saving import Saving
-from app.db.schemas.saving import SavingCreate, Saving
+from app.db.schemas.saving import SavingCreate, Saving as SavingSchema
+from app.utils.cache import response_cache
 
 router = APIRouter(prefix="/savings", tags=["savings"])
 
-@router.post("/", response_model=Saving, status_code=status.HTTP_201_CREATED)
-async def create_saving(saving: SavingCreate, user_id: int, db: Session = Depends(get_db)):
+@router.post("/", response_model=SavingSchema, status_code=status.HTTP_201_CREATED)
+async def create_saving(saving: SavingCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     db_saving = Saving(**saving.dict(), user_id=user_id)
     db.add(db_saving)
-    db.commit()
-    db.refresh(db_saving)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    await db.refresh(db_saving)
     return db_saving
 
-@router.get("/{saving_id}", response_model=Saving)
-async def get_saving(saving_id: int, user_id: int, db: Session = Depends(get_db)):
-    saving = db.query(Saving).filter(Saving.id == saving_id, Saving.user_id == user_id).first()
+@router.get("/{saving_id}", response_model=SavingSchema)
+async def get_saving(saving_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    saving = await db.scalar(select(Saving).filter(Saving.id == saving_id, Saving.user_id == user_id))
     if not saving:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Saving not found")
     return saving
 
-@router.get("/", response_model=List[Saving])
-async def get_savings(user_id: int, db: Session = Depends(get_db)):
-    savings = db.query(Saving).filter(Saving.user_id == user_id).all()
+@router.get("/", response_model=List[SavingSchema])
+async def get_savings(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    savings = (await db.scalars(select(Saving).filter(Saving.user_id == user_id))).all()
     return savings
 
-@router.put("/{saving_id}", response_model=Saving)
-async def update_saving(saving_id: int, saving: SavingCreate, user_id: int, db: Session = Depends(get_db)):
-    db_saving = db.query(Saving).filter(Saving.id == saving_id, Saving.user_id == user_id).first()
+@router.put("/{saving_id}", response_model=SavingSchema)
+async def update_saving(saving_id: int, saving: SavingCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_saving = await db.scalar(select(Saving).filter(Saving.id == saving_id, Saving.user_id == user_id))
     if not db_saving:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Saving not found")
     for key, value in saving.dict().items():
         setattr(db_saving, key, value)
-    db.commit()
-    db.refresh(db_saving)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    await db.refresh(db_saving)
     return db_saving
 
 @router.delete("/{saving_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_saving(saving_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_saving = db.query(Saving).filter(Saving.id == saving_id, Saving.user_id == user_id).first()
+async def delete_saving(saving_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_saving = await db.scalar(select(Saving).filter(Saving.id == saving_id, Saving.user_id == user_id))
     if not db_saving:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Saving not found")
-    db.delete(db_saving)
-    db.commit()
\ No newline at end of file
+    await db.delete(db_saving)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
\ No newline at end of file
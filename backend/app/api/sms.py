@@ -1,14 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import SMS_BATCH_MAX
+from app.db.database import get_async_db
+from app.db.schemas.sms import SmsBatch, SmsParseResult
+from app.services import categorizer_service, merchant_service, sms_service
 from typing import Dict
 
 router = APIRouter(prefix="/sms", tags=["sms"])
 
 @router.post("/send", response_model=Dict)
-async def send_sms(sms: Dict, user_id: int, db: Session = Depends(get_db)):
+async def send_sms(sms: Dict, user_id: int, db: AsyncSession = Depends(get_async_db)):
     # Placeholder for SMS sending (e.g., Twilio integration)
     return {
         "user_id": user_id,
         "message": "SMS send placeholder"
-    }
\ No newline at end of file
+    }
+
+@router.post("/parse/batch", response_model=SmsParseResult)
+async def parse_sms_batch(batch: SmsBatch, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Candidates only: the client confirms them through POST /transactions or /transactions/bulk
+    if len(batch.messages) > SMS_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batches are limited to {SMS_BATCH_MAX} messages"
+        )
+    messages = [(m.body, m.sender, m.received_at) for m in batch.messages]
+    matcher = await merchant_service.get_matcher(db, user_id)
+    model = await categorizer_service.get_model(db, user_id)
+    candidates, unparsed = await run_in_threadpool(sms_service.parse_batch, messages, matcher)
+    await run_in_threadpool(categorizer_service.categorize, model, candidates)
+    return {"candidates": candidates, "unparsed": unparsed}
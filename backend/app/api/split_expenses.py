@@ -1,47 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.db.database import get_async_db
 from app.db.models.split_expense import SplitExpense
-from app.db.schemas.split_expense import SplitExpenseCreate, SplitExpense
+from app.db.schemas.split_expense import SplitExpenseCreate, OwedSummary, Settlement, SplitExpense as SplitExpenseSchema
+from app.services import split_service
+from app.utils.pagination import Page, paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(prefix="/split_expenses", tags=["split_expenses"])
 
-@router.post("/", response_model=SplitExpense, status_code=status.HTTP_201_CREATED)
-async def create_split_expense(split_expense: SplitExpenseCreate, user_id: int, db: Session = Depends(get_db)):
+@router.post("/", response_model=SplitExpenseSchema, status_code=status.HTTP_201_CREATED)
+async def create_split_expense(split_expense: SplitExpenseCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     db_split = SplitExpense(**split_expense.dict(), user_id=user_id)
     db.add(db_split)
-    db.commit()
-    db.refresh(db_split)
+    await split_service.sync_participants(db, db_split)
+    await db.commit()
+    await db.refresh(db_split)
     return db_split
 
-@router.get("/{split_id}", response_model=SplitExpense)
-async def get_split_expense(split_id: int, user_id: int, db: Session = Depends(get_db)):
-    split = db.query(SplitExpense).filter(SplitExpense.id == split_id, SplitExpense.user_id == user_id).first()
+@router.get("/settlement", response_model=Settlement)
+async def get_settlement(
+    user_id: int,
+    split_ids: Optional[List[int]] = Query(None),
+    include_debts: bool = True,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Nets all of the user's splits (or a group given by split_ids) and pending debts into a transfer plan
+    return await split_service.get_settlement(db, user_id, split_ids, include_debts)
+
+@router.get("/owed", response_model=OwedSummary)
+async def get_owed(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    # What the user owes across other people's splits, found through split_participants
+    return await split_service.get_owed(db, user_id)
+
+@router.get("/participating", response_model=Page[SplitExpenseSchema])
+async def get_participating_split_expenses(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(SplitExpense).filter(SplitExpense.id.in_(split_service.participating_split_ids(user_id)))
+    return await paginate(db, query, SplitExpense.created_at, SplitExpense.id, cursor, limit)
+
+@router.get("/{split_id}", response_model=SplitExpenseSchema)
+async def get_split_expense(split_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    split = await db.scalar(select(SplitExpense).filter(SplitExpense.id == split_id, SplitExpense.user_id == user_id))
     if not split:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Split expense not found")
     return split
 
-@router.get("/", response_model=List[SplitExpense])
-async def get_split_expenses(user_id: int, db: Session = Depends(get_db)):
-    splits = db.query(SplitExpense).filter(SplitExpense.user_id == user_id).all()
-    return splits
+@router.get("/", response_model=Page[SplitExpenseSchema])
+async def get_split_expenses(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(SplitExpense).filter(SplitExpense.user_id == user_id)
+    return await paginate(db, query, SplitExpense.created_at, SplitExpense.id, cursor, limit)
 
-@router.put("/{split_id}", response_model=SplitExpense)
-async def update_split_expense(split_id: int, split_expense: SplitExpenseCreate, user_id: int, db: Session = Depends(get_db)):
-    db_split = db.query(SplitExpense).filter(SplitExpense.id == split_id, SplitExpense.user_id == user_id).first()
+@router.put("/{split_id}", response_model=SplitExpenseSchema)
+async def update_split_expense(split_id: int, split_expense: SplitExpenseCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_split = await db.scalar(select(SplitExpense).filter(SplitExpense.id == split_id, SplitExpense.user_id == user_id))
     if not db_split:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Split expense not found")
     for key, value in split_expense.dict().items():
         setattr(db_split, key, value)
-    db.commit()
-    db.refresh(db_split)
+    await split_service.sync_participants(db, db_split)
+    await db.commit()
+    await db.refresh(db_split)
     return db_split
 
 @router.delete("/{split_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_split_expense(split_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_split = db.query(SplitExpense).filter(SplitExpense.id == split_id, SplitExpense.user_id == user_id).first()
+async def delete_split_expense(split_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_split = await db.scalar(select(SplitExpense).filter(SplitExpense.id == split_id, SplitExpense.user_id == user_id))
     if not db_split:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Split expense not found")
-    db.delete(db_split)
-    db.commit()
\ No newline at end of file
+    await db.delete(db_split)
+    await db.commit()
\ No newline at end of file
@@ -1,47 +1,74 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
-from app.db.models.debt import Debt
-from app.db.schemas.debt import DebtCreate, Debt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.db.database import get_async_db
+from app.db.models.subscription import Subscription
+from app.db.schemas.subscription import (
+    SubscriptionCreate, SubscriptionUpdate, SubscriptionStatus, Subscription as SubscriptionSchema,
+    SubscriptionSuggestion as SubscriptionSuggestionSchema,
+)
+from app.services import subscription_service
+from app.utils.cache import response_cache
 
-router = APIRouter(prefix="/debts", tags=["debts"])
+router = APIRouter(prefix="/subscriptions", tags=["subscriptions"])
 
-@router.post("/", response_model=Debt, status_code=status.HTTP_201_CREATED)
-async def create_debt(debt: DebtCreate, user_id: int, db: Session = Depends(get_db)):
-    db_debt = Debt(**debt.dict(), user_id=user_id)
-    db.add(db_debt)
-    db.commit()
-    db.refresh(db_debt)
-    return db_debt
+@router.post("/", response_model=SubscriptionSchema, status_code=status.HTTP_201_CREATED)
+async def create_subscription(subscription: SubscriptionCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_subscription = Subscription(**subscription.dict(), user_id=user_id)
+    db.add(db_subscription)
+    await subscription_service.drop_suggestions(db, user_id, db_subscription.name)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    await db.refresh(db_subscription)
+    return db_subscription
 
-@router.get("/{debt_id}", response_model=Debt)
-async def get_debt(debt_id: int, user_id: int, db: Session = Depends(get_db)):
-    debt = db.query(Debt).filter(Debt.id == debt_id, Debt.user_id == user_id).first()
-    if not debt:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Debt not found")
-    return debt
+@router.get("/suggestions", response_model=List[SubscriptionSuggestionSchema])
+async def get_subscription_suggestions(user_id: int, refresh: bool = False, db: AsyncSession = Depends(get_async_db)):
+    # Normally filled by the app.db.detect_subscriptions batch job; refresh re-runs detection for this user now
+    if refresh:
+        await subscription_service.refresh_suggestions(db, [user_id])
+        await db.commit()
+    return await subscription_service.get_suggestions(db, user_id)
 
-@router.get("/", response_model=List[Debt])
-async def get_debts(user_id: int, db: Session = Depends(get_db)):
-    debts = db.query(Debt).filter(Debt.user_id == user_id).all()
-    return debts
+@router.get("/{subscription_id}", response_model=SubscriptionSchema)
+async def get_subscription(subscription_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    subscription = await db.scalar(
+        select(Subscription).filter(Subscription.id == subscription_id, Subscription.user_id == user_id)
+    )
+    if not subscription:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subscription not found")
+    return subscription
 
-@router.put("/{debt_id}", response_model=Debt)
-async def update_debt(debt_id: int, debt: DebtCreate, user_id: int, db: Session = Depends(get_db)):
-    db_debt = db.query(Debt).filter(Debt.id == debt_id, Debt.user_id == user_id).first()
-    if not db_debt:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Debt not found")
-    for key, value in debt.dict().items():
-        setattr(db_debt, key, value)
-    db.commit()
-    db.refresh(db_debt)
-    return db_debt
+@router.get("/", response_model=List[SubscriptionSchema])
+async def get_subscriptions(user_id: int, status: Optional[SubscriptionStatus] = None, db: AsyncSession = Depends(get_async_db)):
+    query = select(Subscription).filter(Subscription.user_id == user_id)
+    if status:
+        query = query.filter(Subscription.status == status.value)
+    return (await db.scalars(query.order_by(Subscription.next_due_date, Subscription.id))).all()
 
-@router.delete("/{debt_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_debt(debt_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_debt = db.query(Debt).filter(Debt.id == debt_id, Debt.user_id == user_id).first()
-    if not db_debt:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Debt not found")
-    db.delete(db_debt)
-    db.commit()
\ No newline at end of file
+@router.put("/{subscription_id}", response_model=SubscriptionSchema)
+async def update_subscription(subscription_id: int, subscription: SubscriptionUpdate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Locked so an edit can't interleave with the renewal scheduler advancing next_due_date
+    db_subscription = await db.scalar(
+        select(Subscription).filter(Subscription.id == subscription_id, Subscription.user_id == user_id).with_for_update()
+    )
+    if not db_subscription:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subscription not found")
+    for key, value in subscription.dict(exclude_unset=True).items():
+        setattr(db_subscription, key, value)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    await db.refresh(db_subscription)
+    return db_subscription
+
+@router.delete("/{subscription_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_subscription(subscription_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_subscription = await db.scalar(
+        select(Subscription).filter(Subscription.id == subscription_id, Subscription.user_id == user_id).with_for_update()
+    )
+    if not db_subscription:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subscription not found")
+    await db.delete(db_subscription)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
\ No newline at end of file
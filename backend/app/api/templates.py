@@ -1,47 +1,48 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.db.models.template import Template
-from app.db.schemas.template import TemplateCreate, Template
+from app.db.schemas.template import TemplateCreate, Template as TemplateSchema
 
 router = APIRouter(prefix="/templates", tags=["templates"])
 
-@router.post("/", response_model=Template, status_code=status.HTTP_201_CREATED)
-async def create_template(template: TemplateCreate, user_id: int, db: Session = Depends(get_db)):
+@router.post("/", response_model=TemplateSchema, status_code=status.HTTP_201_CREATED)
+async def create_template(template: TemplateCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     db_template = Template(**template.dict(), user_id=user_id)
     db.add(db_template)
-    db.commit()
-    db.refresh(db_template)
+    await db.commit()
+    await db.refresh(db_template)
     return db_template
 
-@router.get("/{template_id}", response_model=Template)
-async def get_template(template_id: int, user_id: int, db: Session = Depends(get_db)):
-    template = db.query(Template).filter(Template.id == template_id, Template.user_id == user_id).first()
+@router.get("/{template_id}", response_model=TemplateSchema)
+async def get_template(template_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    template = await db.scalar(select(Template).filter(Template.id == template_id, Template.user_id == user_id))
     if not template:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
     return template
 
-@router.get("/", response_model=List[Template])
-async def get_templates(user_id: int, db: Session = Depends(get_db)):
-    templates = db.query(Template).filter(Template.user_id == user_id).all()
+@router.get("/", response_model=List[TemplateSchema])
+async def get_templates(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    templates = (await db.scalars(select(Template).filter(Template.user_id == user_id))).all()
     return templates
 
-@router.put("/{template_id}", response_model=Template)
-async def update_template(template_id: int, template: TemplateCreate, user_id: int, db: Session = Depends(get_db)):
-    db_template = db.query(Template).filter(Template.id == template_id, Template.user_id == user_id).first()
+@router.put("/{template_id}", response_model=TemplateSchema)
+async def update_template(template_id: int, template: TemplateCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_template = await db.scalar(select(Template).filter(Template.id == template_id, Template.user_id == user_id))
     if not db_template:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
     for key, value in template.dict().items():
         setattr(db_template, key, value)
-    db.commit()
-    db.refresh(db_template)
+    await db.commit()
+    await db.refresh(db_template)
     return db_template
 
 @router.delete("/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_template(template_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_template = db.query(Template).filter(Template.id == template_id, Template.user_id == user_id).first()
+async def delete_template(template_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_template = await db.scalar(select(Template).filter(Template.id == template_id, Template.user_id == user_id))
     if not db_template:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
-    db.delete(db_template)
-    db.commit()
\ No newline at end of file
+    await db.delete(db_template)
+    await db.commit()
\ No newline at end of file
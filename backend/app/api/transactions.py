@@ -1,47 +1,139 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Dict, List, Optional
+import json
+from app.db.database import get_async_db
 from app.db.models.transaction import Transaction
-from app.db.schemas.transaction import TransactionCreate, Transaction
+from app.db.schemas.transaction import TransactionCreate, TransactionType, Transaction as TransactionSchema
+from app.utils.cache import response_cache
+from app.services import analytics_service, budget_service, categorizer_service, merchant_service, transaction_service
+from app.services.export_service import ExportFormat, ExportSection, export_filename, stream_export
+from app.utils.pagination import Page, paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
-@router.post("/", response_model=Transaction, status_code=status.HTTP_201_CREATED)
-async def create_transaction(transaction: TransactionCreate, user_id: int, db: Session = Depends(get_db)):
-    db_transaction = Transaction(**transaction.dict(), user_id=user_id)
+@router.post("/", response_model=TransactionSchema, status_code=status.HTTP_201_CREATED)
+async def create_transaction(transaction: TransactionCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    matcher = await merchant_service.get_matcher(db, user_id)
+    model = await categorizer_service.get_model(db, user_id)
+    row = matcher.apply(transaction.dict())
+    categorizer_service.categorize(model, [row])
+    db_transaction = Transaction(**row, user_id=user_id)
     db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
+    await analytics_service.record_transaction_change(db, user_id, after=db_transaction)
+    await budget_service.record_transaction_change(db, user_id, after=db_transaction)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    categorizer_service.learn(user_id, [db_transaction])
+    await db.refresh(db_transaction)
     return db_transaction
 
-@router.get("/{transaction_id}", response_model=Transaction)
-async def get_transaction(transaction_id: int, user_id: int, db: Session = Depends(get_db)):
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user_id).first()
+@router.post("/bulk", response_model=Dict)
+async def bulk_create_transactions(request: Request, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Accepts a JSON array, or NDJSON (one transaction per line) which is parsed as it streams in
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        records = transaction_service.iter_ndjson(request.stream())
+    else:
+        try:
+            rows = json.loads(await request.body())
+        except ValueError:
+            rows = None
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array or NDJSON")
+        records = transaction_service.iter_rows(rows)
+    try:
+        result = await transaction_service.bulk_create_transactions(db, user_id, records)
+    except transaction_service.BulkLimitExceeded as e:
+        await db.rollback()
+        # The model already learned the rolled-back rows
+        categorizer_service.invalidate(user_id)
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    return result
+
+@router.get("/export")
+async def export_transactions(
+    user_id: int,
+    format: ExportFormat = ExportFormat.csv,
+    include: List[ExportSection] = Query([]),
+):
+    filename = export_filename(format, include)
+    media_type = "application/zip" if include else "application/gzip"
+    return StreamingResponse(
+        stream_export(user_id, format, include),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/{transaction_id}", response_model=TransactionSchema)
+async def get_transaction(transaction_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    transaction = await db.scalar(select(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user_id))
     if not transaction:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
     return transaction
 
-@router.get("/", response_model=List[Transaction])
-async def get_transactions(user_id: int, db: Session = Depends(get_db)):
-    transactions = db.query(Transaction).filter(Transaction.user_id == user_id).all()
-    return transactions
+@router.get("/", response_model=Page[TransactionSchema])
+async def get_transactions(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    type: Optional[TransactionType] = None,
+    category: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(Transaction).filter(Transaction.user_id == user_id)
+    if start_date:
+        query = query.filter(Transaction.timestamp >= start_date)
+    if end_date:
+        query = query.filter(Transaction.timestamp < end_date)
+    if type:
+        query = query.filter(Transaction.type == type.value)
+    if category:
+        query = query.filter(Transaction.category == category)
+    return await paginate(db, query, Transaction.timestamp, Transaction.id, cursor, limit)
 
-@router.put("/{transaction_id}", response_model=Transaction)
-async def update_transaction(transaction_id: int, transaction: TransactionCreate, user_id: int, db: Session = Depends(get_db)):
-    db_transaction = db.query(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user_id).first()
+@router.put("/{transaction_id}", response_model=TransactionSchema)
+async def update_transaction(transaction_id: int, transaction: TransactionCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_transaction = await db.scalar(
+        select(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user_id).with_for_update()
+    )
     if not db_transaction:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
-    for key, value in transaction.dict().items():
+    before = analytics_service.transaction_snapshot(db_transaction)
+    matcher = await merchant_service.get_matcher(db, user_id)
+    model = await categorizer_service.get_model(db, user_id)
+    # A category the user sends (even the predicted one back) is theirs now
+    row = matcher.apply({**transaction.dict(), "category_source": None})
+    categorizer_service.categorize(model, [row])
+    for key, value in row.items():
         setattr(db_transaction, key, value)
-    db.commit()
-    db.refresh(db_transaction)
+    await analytics_service.record_transaction_change(db, user_id, before=before, after=db_transaction)
+    await budget_service.record_transaction_change(db, user_id, before=before, after=db_transaction)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    categorizer_service.learn(user_id, [before], -1)
+    categorizer_service.learn(user_id, [db_transaction])
+    await db.refresh(db_transaction)
     return db_transaction
 
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_transaction(transaction_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_transaction = db.query(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user_id).first()
+async def delete_transaction(transaction_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_transaction = await db.scalar(
+        select(Transaction).filter(Transaction.id == transaction_id, Transaction.user_id == user_id).with_for_update()
+    )
     if not db_transaction:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
-    db.delete(db_transaction)
-    db.commit()
\ No newline at end of file
+    before = analytics_service.transaction_snapshot(db_transaction)
+    await analytics_service.record_transaction_change(db, user_id, before=db_transaction)
+    await budget_service.record_transaction_change(db, user_id, before=db_transaction)
+    await db.delete(db_transaction)
+    await db.commit()
+    await response_cache.invalidate_user(user_id)
+    categorizer_service.learn(user_id, [before], -1)
\ No newline at end of file
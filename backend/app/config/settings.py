@@ -0,0 +1,124 @@
+from dotenv import load_dotenv
+import os
+import tempfile
+
+# Load .env file
+load_dotenv()
+
+# Bulk transaction ingestion
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 1000))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", 100000))
+
+# Ledger export
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 1000))
+
+# Per-user response cache (memory: per worker, redis: shared by workers via CACHE_URL)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 300))
+
+# Keep budget spend in a counter table updated on transaction writes (Postgres only),
+# instead of aggregating the ledger on every utilization read
+BUDGET_SPENT_COUNTER = os.getenv("BUDGET_SPENT_COUNTER", "False").lower() == "true"
+
+# SMS parsing
+SMS_BATCH_MAX = int(os.getenv("SMS_BATCH_MAX", 10000))
+
+# Merchant dictionary: a JSON list of {merchant, category, aliases} replacing the built-in one
+MERCHANT_DICTIONARY_PATH = os.getenv("MERCHANT_DICTIONARY_PATH")
+MERCHANT_RULES_CACHE_SIZE = int(os.getenv("MERCHANT_RULES_CACHE_SIZE", 1024))
+MERCHANT_RENORMALIZE_BATCH_SIZE = int(os.getenv("MERCHANT_RENORMALIZE_BATCH_SIZE", 1000))
+
+# Per-user categorization model (hashed-feature naive Bayes, cached per worker)
+CATEGORIZER_FEATURES = int(os.getenv("CATEGORIZER_FEATURES", 4096))
+CATEGORIZER_CACHE_SIZE = int(os.getenv("CATEGORIZER_CACHE_SIZE", 128))
+CATEGORIZER_TTL_SECONDS = int(os.getenv("CATEGORIZER_TTL_SECONDS", 3600))
+CATEGORIZER_MAX_TRAINING_ROWS = int(os.getenv("CATEGORIZER_MAX_TRAINING_ROWS", 50000))
+CATEGORIZER_MIN_SAMPLES = int(os.getenv("CATEGORIZER_MIN_SAMPLES", 20))
+CATEGORIZER_MIN_CONFIDENCE = float(os.getenv("CATEGORIZER_MIN_CONFIDENCE", 0.6))
+
+# Recurring-payment detection (suggested subscriptions)
+SUBSCRIPTION_DETECT_LOOKBACK_DAYS = int(os.getenv("SUBSCRIPTION_DETECT_LOOKBACK_DAYS", 1100))
+SUBSCRIPTION_DETECT_MIN_OCCURRENCES = int(os.getenv("SUBSCRIPTION_DETECT_MIN_OCCURRENCES", 3))
+SUBSCRIPTION_DETECT_AMOUNT_TOLERANCE = float(os.getenv("SUBSCRIPTION_DETECT_AMOUNT_TOLERANCE", 0.1))
+SUBSCRIPTION_DETECT_USER_BATCH = int(os.getenv("SUBSCRIPTION_DETECT_USER_BATCH", 500))
+
+# Subscription renewals: due subscriptions are claimed with FOR UPDATE SKIP LOCKED, so any number
+# of workers can run them. Interval 0 leaves it to `python -m app.db.renew_subscriptions` (cron)
+SUBSCRIPTION_RENEWAL_INTERVAL_SECONDS = int(os.getenv("SUBSCRIPTION_RENEWAL_INTERVAL_SECONDS", 0))
+SUBSCRIPTION_RENEWAL_BATCH_SIZE = int(os.getenv("SUBSCRIPTION_RENEWAL_BATCH_SIZE", 500))
+# Missed cycles posted per subscription after an outage; older ones are skipped without billing
+SUBSCRIPTION_RENEWAL_MAX_CATCH_UP = int(os.getenv("SUBSCRIPTION_RENEWAL_MAX_CATCH_UP", 12))
+
+# Connections all of one worker's dashboard requests may hold at once (widgets run concurrently,
+# one session each, up to this many); keeps a burst of dashboards from draining the pool
+DASHBOARD_MAX_SESSIONS = int(os.getenv("DASHBOARD_MAX_SESSIONS", 4))
+
+# Cash-flow forecast horizon limit (GET /analytics/forecast?months=)
+FORECAST_MAX_MONTHS = int(os.getenv("FORECAST_MAX_MONTHS", 60))
+
+# Nudge generation job (python -m app.db.generate_nudges)
+NUDGE_USER_BATCH = int(os.getenv("NUDGE_USER_BATCH", 1000))
+NUDGE_UPSERT_CHUNK = int(os.getenv("NUDGE_UPSERT_CHUNK", 1000))
+NUDGE_GOAL_DAYS = int(os.getenv("NUDGE_GOAL_DAYS", 30))
+NUDGE_DEBT_DAYS = int(os.getenv("NUDGE_DEBT_DAYS", 3))
+NUDGE_SUBSCRIPTION_DAYS = int(os.getenv("NUDGE_SUBSCRIPTION_DAYS", 3))
+
+# Push channel (WebSocket /push/ws, SSE /push/events). memory: events reach this worker's
+# connections only; redis: published on PUSH_URL and fanned out by every worker
+PUSH_BACKEND = os.getenv("PUSH_BACKEND", "memory")
+PUSH_URL = os.getenv("PUSH_URL", CACHE_URL)
+PUSH_QUEUE_SIZE = int(os.getenv("PUSH_QUEUE_SIZE", 100))
+PUSH_HEARTBEAT_SECONDS = int(os.getenv("PUSH_HEARTBEAT_SECONDS", 30))
+# A redis subscriber that dies is restarted after 1s, doubling per failure in a row up to the max
+PUSH_RESTART_SECONDS = float(os.getenv("PUSH_RESTART_SECONDS", 1))
+PUSH_RESTART_MAX_SECONDS = float(os.getenv("PUSH_RESTART_MAX_SECONDS", 60))
+
+# Chat retrieval: hashed n-gram embeddings of each user's records, one memory-mapped matrix per
+# user under RAG_INDEX_DIR (shared by the workers of a host), rebuilt when the records change
+RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR", os.path.join(tempfile.gettempdir(), "logup-rag"))
+RAG_DIMENSIONS = int(os.getenv("RAG_DIMENSIONS", 512))
+RAG_MAX_TRANSACTIONS = int(os.getenv("RAG_MAX_TRANSACTIONS", 20000))
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", 8))
+RAG_CACHE_SIZE = int(os.getenv("RAG_CACHE_SIZE", 256))
+
+# Aggregate chat questions ("how much on food last month") are answered by SQL, not the model;
+# compiled statements are kept per intent shape
+CHAT_PLAN_CACHE_SIZE = int(os.getenv("CHAT_PLAN_CACHE_SIZE", 256))
+
+# Chat answers. stub: a templated answer built offline from the retrieved records;
+# openai: any OpenAI-compatible /chat/completions endpoint at LLM_URL
+LLM_BACKEND = os.getenv("LLM_BACKEND", "stub")
+LLM_URL = os.getenv("LLM_URL", "http://localhost:11434/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3.1")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))
+# Pause before each token the stub streams (POST /chat/stream); 0 streams as fast as possible
+LLM_STUB_TOKEN_DELAY_SECONDS = float(os.getenv("LLM_STUB_TOKEN_DELAY_SECONDS", 0))
+
+# Receipt uploads (POST /receipts/upload): bodies stream to RECEIPT_SPOOL_DIR and OCR runs in
+# RECEIPT_WORKERS processes. Past RECEIPT_QUEUE_SIZE jobs in flight per app worker uploads get 429
+RECEIPT_SPOOL_DIR = os.getenv("RECEIPT_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "logup-receipts", "spool"))
+RECEIPT_MAX_BYTES = int(os.getenv("RECEIPT_MAX_BYTES", 10 * 1024 * 1024))
+RECEIPT_WORKERS = int(os.getenv("RECEIPT_WORKERS", os.cpu_count() or 1))
+RECEIPT_QUEUE_SIZE = int(os.getenv("RECEIPT_QUEUE_SIZE", RECEIPT_WORKERS * 4))
+# stub: reads text receipts (for development and tests); tesseract: pytesseract and Pillow
+OCR_BACKEND = os.getenv("OCR_BACKEND", "stub")
+# Stored images, one file per SHA-256, with their thumbnails; on the spool directory's filesystem,
+# so accepting an upload is a rename
+RECEIPT_STORE_DIR = os.getenv("RECEIPT_STORE_DIR", os.path.join(tempfile.gettempdir(), "logup-receipts", "store"))
+RECEIPT_THUMBNAIL_SIZE = int(os.getenv("RECEIPT_THUMBNAIL_SIZE", 320))
+# Uploads whose perceptual hash is this many bits (of 256) or fewer from one of the user's
+# receipts are flagged as a likely re-photographed duplicate (and still read)
+RECEIPT_DUPLICATE_DISTANCE = int(os.getenv("RECEIPT_DUPLICATE_DISTANCE", 40))
+RECEIPT_HASH_CACHE_SIZE = int(os.getenv("RECEIPT_HASH_CACHE_SIZE", 1024))
+# A read receipt attaches to an unclaimed expense of the user's within RECEIPT_MATCH_DAYS of its
+# date whose amount is within RECEIPT_MATCH_AMOUNT_TOLERANCE of its total (a fraction, at least 1
+# rupee) and which scores RECEIPT_MATCH_MIN_SCORE or more on merchant, amount and date; receipts
+# with no such expense become one
+RECEIPT_MATCH_DAYS = int(os.getenv("RECEIPT_MATCH_DAYS", 3))
+RECEIPT_MATCH_AMOUNT_TOLERANCE = float(os.getenv("RECEIPT_MATCH_AMOUNT_TOLERANCE", 0.02))
+RECEIPT_MATCH_MIN_SCORE = float(os.getenv("RECEIPT_MATCH_MIN_SCORE", 0.5))
+# Receipts per candidate query when matching in bulk (POST /receipts/match)
+RECEIPT_MATCH_BATCH_SIZE = int(os.getenv("RECEIPT_MATCH_BATCH_SIZE", 1000))
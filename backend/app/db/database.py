@@ -1,6 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 import os
 
@@ -12,6 +15,22 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
 DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
 DB_ECHO = os.getenv("DB_ECHO", "False").lower() == "true"
+# True: routers talk to asyncpg through AsyncSession.
+# False: routers keep the same await-based code but run the psycopg2 Session in the threadpool.
+DB_ASYNC = os.getenv("DB_ASYNC", "True").lower() == "true"
+# asyncpg connections are bound to the event loop that opened them; tests that
+# spin up a loop per request need a fresh connection each time
+DB_ASYNC_NULL_POOL = os.getenv("DB_ASYNC_NULL_POOL", "False").lower() == "true"
+
+def get_async_database_url(url):
+    scheme, sep, rest = url.partition("://")
+    if scheme.startswith("postgres"):
+        return "postgresql+asyncpg" + sep + rest
+    if scheme.startswith("sqlite"):
+        return "sqlite+aiosqlite" + sep + rest
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or get_async_database_url(DATABASE_URL)
 
 # Create SQLAlchemy engine
 engine = create_engine(
@@ -21,8 +40,20 @@ engine = create_engine(
     echo=DB_ECHO
 )
 
-# Create session factory
+# Create async engine (asyncpg)
+if DB_ASYNC_NULL_POOL:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool, echo=DB_ECHO)
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        echo=DB_ECHO
+    )
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
@@ -35,6 +66,111 @@ def get_db():
     finally:
         db.close()
 
+class ThreadedStreamResult:
+    """Server-side cursor result whose fetches run in the threadpool."""
+
+    def __init__(self, result):
+        self.result = result
+
+    async def partitions(self, size=None):
+        while True:
+            rows = await run_in_threadpool(self.result.fetchmany, size)
+            if not rows:
+                break
+            yield rows
+
+    async def close(self):
+        await run_in_threadpool(self.result.close)
+
+class ThreadedSession:
+    """Exposes the awaitable subset of AsyncSession used by the routers on top of
+    a blocking Session, running every database round trip in the threadpool."""
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    @property
+    def bind(self):
+        return self.sync_session.bind
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, *args, **kwargs)
+
+    async def stream(self, statement, *args, **kwargs):
+        statement = statement.execution_options(stream_results=True)
+        return ThreadedStreamResult(await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs))
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, objects=None):
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+# New session for work that outlives a request's dependencies (streamed responses, background jobs)
+def new_async_session():
+    if DB_ASYNC:
+        return AsyncSessionLocal()
+    return ThreadedSession(SessionLocal(expire_on_commit=False))
+
+# Async dependency for FastAPI, DB_ASYNC selects the driver behind it
+async def get_async_db():
+    async with new_async_session() as db:
+        yield db
+
 # Function to initialize database (create tables)
 def init_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add nullable columns and indexes introduced since
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for c in table.columns:
+                if c.name not in existing and c.nullable:
+                    ddl = f"ALTER TABLE {table.name} ADD COLUMN {c.name} {c.type.compile(engine.dialect)}"
+                    if c.server_default is not None:
+                        # Existing rows get the default too, rather than NULL
+                        ddl += f" DEFAULT {c.server_default.arg.compile(dialect=engine.dialect)}"
+                    conn.execute(text(ddl))
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+async def close_db():
+    await async_engine.dispose()
@@ -0,0 +1,14 @@
+import asyncio
+from app.db.database import new_async_session, init_db, close_db
+from app.services.subscription_service import detect_all
+
+async def main():
+    async with new_async_session() as db:
+        result = await detect_all(db)
+    await close_db()
+    return result
+
+if __name__ == "__main__":
+    init_db()
+    result = asyncio.run(main())
+    print(f"Subscription suggestions refreshed for {result['users']} users ({result['suggestions']} found)")
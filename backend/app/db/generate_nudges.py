@@ -0,0 +1,14 @@
+import asyncio
+from app.db.database import new_async_session, init_db, close_db
+from app.services.notification_service import generate_all
+
+async def main():
+    async with new_async_session() as db:
+        result = await generate_all(db)
+    await close_db()
+    return result
+
+if __name__ == "__main__":
+    init_db()
+    result = asyncio.run(main())
+    print(f"Nudges generated for {result['users']} users ({result['nudges']} active)")
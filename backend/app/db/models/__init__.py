@@ -11,4 +11,10 @@ from .message import Message
 from .nudge import Nudge
 from .permission import Permission
 from .template import Template
-from .widget_config import WidgetConfig
\ No newline at end of file
+from .widget_config import WidgetConfig
+from .monthly_rollup import MonthlyRollup
+from .budget_spend import BudgetSpend
+from .split_participant import SplitParticipant
+from .merchant_rule import MerchantRule
+from .subscription_suggestion import SubscriptionSuggestion
+from .receipt import Receipt
\ No newline at end of file
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Float, DateTime
+from sqlalchemy.sql import func
+from sqlalchemy.sql.schema import ForeignKey
+from app.db.database import Base
+
+class BudgetSpend(Base):
+    """Running spend per budget, maintained on transaction writes when BUDGET_SPENT_COUNTER is on."""
+
+    __tablename__ = "budget_spend"
+
+    budget_id = Column(Integer, ForeignKey("budgets.id", ondelete="CASCADE"), primary_key=True)
+    spent = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
 from app.db.database import Base
@@ -13,6 +13,8 @@ class Friend(Base):
     phone_number = Column(String, nullable=True)
     avatar_url = Column(String, nullable=True)
     is_online = Column(Boolean, default=False)
+    # Unread incoming messages, kept current by every message write (app.services.message_service)
+    unread_count = Column(Integer, default=0, server_default=text("0"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from sqlalchemy.sql.schema import ForeignKey
+from app.db.database import Base
+
+class MerchantRule(Base):
+    """A user's override on top of the merchant dictionary."""
+
+    __tablename__ = "merchant_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    pattern = Column(String, nullable=False)  # keyword matched as whole words, case-insensitive
+    merchant_name = Column(String, nullable=True)
+    category = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
+from sqlalchemy.sql import func, false
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
 from app.db.database import Base
@@ -12,9 +12,18 @@ class Message(Base):
     friend_id = Column(Integer, ForeignKey("friends.id"), nullable=True)
     content = Column(String, nullable=False)
     is_user = Column(Boolean, nullable=False)  # True for user, False for AI
+    # Read state of incoming (is_user False) messages; friends.unread_count counts the unread ones
+    is_read = Column(Boolean, default=False, server_default=false())
     timestamp = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Keyset pagination: newest first, id breaks ties
+        Index("ix_messages_user_id_timestamp_id", user_id, timestamp.desc(), id),
+        # One conversation's history, newest first (GET /messages/conversations/{friend_id})
+        Index("ix_messages_user_id_friend_id_timestamp_id", user_id, friend_id, timestamp.desc(), id),
+    )
+
     user = relationship("User", back_populates="messages")
     friend = relationship("Friend", back_populates="messages")
\ No newline at end of file
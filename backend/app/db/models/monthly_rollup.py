@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy.sql.schema import ForeignKey
+from app.db.database import Base
+
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(Date, nullable=False)  # first day of the month (UTC)
+    category = Column(String, nullable=False, default="")  # "" for uncategorized
+    type = Column(String, nullable=False)  # expense/income
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", "category", "type", name="uq_monthly_rollups_user_month_category_type"),
+    )
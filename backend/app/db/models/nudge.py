@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, DateTime
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
@@ -17,7 +17,18 @@ class Nudge(Base):
     type = Column(String, nullable=False)  # e.g., debt_due, savings_goal
     content = Column(String, nullable=False)
     status = Column(Enum(NudgeStatus), nullable=False, default=NudgeStatus.active)
+    priority = Column(String, nullable=True)  # high/medium/low
+    action_link = Column(String, nullable=True)  # frontend route, e.g. /budgets
+    # Set on nudges generated by the nudge job: one row per (user, key), e.g. "debt:42:2025-03-01"
+    dedupe_key = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Keyset pagination: newest first, id breaks ties
+        Index("ix_nudges_user_id_created_at_id", user_id, created_at.desc(), id),
+        # Conflict target of the nudge job's upsert; rows without a key never conflict
+        Index("uq_nudges_user_id_dedupe_key", user_id, dedupe_key, unique=True),
+    )
+
     user = relationship("User", back_populates="nudges")
\ No newline at end of file
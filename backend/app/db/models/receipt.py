@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Enum, Index
+from sqlalchemy.sql import func
+from sqlalchemy.sql.schema import ForeignKey
+from app.db.database import Base
+import enum
+
+class ReceiptStatus(enum.Enum):
+    queued = "queued"
+    done = "done"
+    failed = "failed"
+
+class Receipt(Base):
+    """An uploaded receipt image; its id is the job id clients poll while OCR runs."""
+
+    __tablename__ = "receipts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    status = Column(Enum(ReceiptStatus), nullable=False, default=ReceiptStatus.queued)
+    filename = Column(String, nullable=True)
+    content_type = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    # The image is stored once per content under RECEIPT_STORE_DIR, named by its SHA-256
+    sha256 = Column(String, nullable=True)
+    phash = Column(String, nullable=True)  # dHash as hex; None when the file couldn't be decoded
+    # The earlier receipt whose image this one resembles (a likely re-photo); it's still read
+    duplicate_of = Column(Integer, ForeignKey("receipts.id", ondelete="SET NULL"), nullable=True)
+    # Extracted by OCR
+    merchant_name = Column(String, nullable=True)
+    amount = Column(Float, nullable=True)
+    receipt_date = Column(Date, nullable=True)
+    text = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    # The expense the receipt is for: an imported one it matched (match_score set) or one made from it
+    transaction_id = Column(Integer, ForeignKey("transactions.id", ondelete="SET NULL"), index=True, nullable=True)
+    match_score = Column(Float, nullable=True)
+    queued_seconds = Column(Float, nullable=True)  # waiting for a worker process
+    ocr_seconds = Column(Float, nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Exact re-uploads are found before the image is stored again; unique, so two racing
+        # uploads of the same bytes can't both become receipts
+        Index("uq_receipts_user_id_sha256", user_id, sha256, unique=True),
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
@@ -22,4 +22,9 @@ class SplitExpense(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Keyset pagination: newest first, id breaks ties
+        Index("ix_split_expenses_user_id_created_at_id", user_id, created_at.desc(), id),
+    )
+
     user = relationship("User", back_populates="split_expenses")
\ No newline at end of file
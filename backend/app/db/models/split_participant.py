@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Float, Index, UniqueConstraint
+from sqlalchemy.sql.schema import ForeignKey
+from app.db.database import Base
+
+class SplitParticipant(Base):
+    """One row per participant of a split, mirrored from SplitExpense.participants."""
+
+    __tablename__ = "split_participants"
+
+    id = Column(Integer, primary_key=True, index=True)
+    split_id = Column(Integer, ForeignKey("split_expenses.id", ondelete="CASCADE"), nullable=False)
+    # Not a foreign key: participants JSON has never been checked against users
+    participant_user_id = Column(Integer, nullable=False)
+    amount_paid = Column(Float, nullable=False, default=0.0)
+    share_amount = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("split_id", "participant_user_id", name="uq_split_participants_split_id_participant_user_id"),
+        # Participant-side lookups: "splits I'm in" and "what I owe"
+        Index("ix_split_participants_participant_user_id_split_id", participant_user_id, split_id),
+    )
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime
+from sqlalchemy.sql import func
+from sqlalchemy.sql.schema import ForeignKey
+from app.db.database import Base
+
+class SubscriptionSuggestion(Base):
+    """A recurring charge found in the ledger that isn't a Subscription yet; rewritten by each detection run."""
+
+    __tablename__ = "subscription_suggestions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    name = Column(String, nullable=False)
+    amount = Column(Float, nullable=False)
+    billing_cycle = Column(String, nullable=False)  # monthly/yearly/weekly
+    next_due_date = Column(Date, nullable=False)
+    category = Column(String, nullable=True)
+    occurrences = Column(Integer, nullable=False)
+    last_charged_at = Column(DateTime(timezone=True), nullable=False)
+    confidence = Column(Float, nullable=False)  # share of gaps that fit the billing cycle
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
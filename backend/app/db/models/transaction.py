@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
@@ -17,6 +17,7 @@ class Transaction(Base):
     amount = Column(Float, nullable=False)
     description = Column(String, nullable=True)
     category = Column(String, nullable=True)
+    category_source = Column(String, nullable=True)  # predicted: filled in by the categorizer, else given
     merchant_name = Column(String, nullable=True)
     bank_name = Column(String, nullable=True)
     confidence = Column(String, nullable=True)  # high/medium/low
@@ -25,4 +26,11 @@ class Transaction(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Keyset pagination: newest first, id breaks ties
+        Index("ix_transactions_user_id_timestamp_id", user_id, timestamp.desc(), id),
+        # Receipt matching: one range scan per receipt over an amount band, filtered by date in the index
+        Index("ix_transactions_user_id_amount_timestamp", user_id, amount, timestamp),
+    )
+
     user = relationship("User", back_populates="transactions")
\ No newline at end of file
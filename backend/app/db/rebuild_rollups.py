@@ -0,0 +1,15 @@
+import asyncio
+import sys
+from app.db.database import new_async_session, init_db, close_db
+from app.services.analytics_service import rebuild_rollups
+
+async def main(user_id=None):
+    async with new_async_session() as db:
+        await rebuild_rollups(db, user_id)
+        await db.commit()
+    await close_db()
+
+if __name__ == "__main__":
+    init_db()
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else None))
+    print("Monthly rollups rebuilt successfully!")
@@ -0,0 +1,17 @@
+import asyncio
+import sys
+from datetime import date
+from app.db.database import new_async_session, init_db, close_db
+from app.services.subscription_service import renew_due
+
+async def main(today=None):
+    async with new_async_session() as db:
+        result = await renew_due(db, today)
+    await close_db()
+    return result
+
+if __name__ == "__main__":
+    # Optional YYYY-MM-DD argument bills as of that day instead of today
+    init_db()
+    result = asyncio.run(main(date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None))
+    print(f"Renewed {result['renewed']} subscriptions ({result['transactions']} transactions posted)")
@@ -2,13 +2,16 @@ from .user import User, UserCreate
 from .transaction import Transaction, TransactionCreate
 from .debt import Debt, DebtCreate
 from .split_expense import SplitExpense, SplitExpenseCreate
-from .subscription import Subscription, SubscriptionCreate, SubscriptionUpdate
+from .subscription import Subscription, SubscriptionCreate, SubscriptionUpdate, SubscriptionSuggestion
 from .budget import Budget, BudgetCreate
 from .goal import Goal, GoalCreate
 from .saving import Saving, SavingCreate
 from .friend import Friend, FriendCreate
-from .message import Message, MessageCreate
+from .message import Message, MessageCreate, MessagesRead
 from .nudge import Nudge, NudgeCreate
 from .permission import Permission, PermissionCreate
 from .template import Template, TemplateCreate
-from .widget_config import WidgetConfig, WidgetConfigCreate
\ No newline at end of file
+from .widget_config import WidgetConfig, WidgetConfigCreate
+from .sms import SmsMessage, SmsBatch, SmsCandidate, SmsParseResult
+from .merchant_rule import MerchantRule, MerchantRuleCreate
+from .receipt import Receipt, ReceiptUpload
\ No newline at end of file
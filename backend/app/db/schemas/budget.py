@@ -19,4 +19,10 @@ class Budget(BudgetBase):
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class BudgetUtilization(Budget):
+    spent: float
+    remaining: float
+    utilization: Optional[float] = None  # spent / amount
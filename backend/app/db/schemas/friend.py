@@ -14,6 +14,7 @@ class FriendCreate(FriendBase):
 class Friend(FriendBase):
     id: int
     user_id: int
+    unread_count: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class MerchantRuleBase(BaseModel):
+    pattern: str
+    merchant_name: Optional[str] = None
+    category: Optional[str] = None
+
+class MerchantRuleCreate(MerchantRuleBase):
+    pass
+
+class MerchantRule(MerchantRuleBase):
+    id: int
+    user_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
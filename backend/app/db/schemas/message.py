@@ -14,8 +14,14 @@ class Message(MessageBase):
     id: int
     user_id: int
     friend_id: Optional[int] = None
+    is_read: bool = False
     created_at: datetime
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class MessagesRead(BaseModel):
+    friend_id: int
+    marked: int
+    unread_count: int
\ No newline at end of file
@@ -11,6 +11,8 @@ class NudgeBase(BaseModel):
     type: str  # e.g., debt_due, savings_goal
     content: str
     status: NudgeStatus = NudgeStatus.active
+    priority: Optional[str] = None
+    action_link: Optional[str] = None
 
 class NudgeCreate(NudgeBase):
     pass
@@ -18,6 +20,7 @@ class NudgeCreate(NudgeBase):
 class Nudge(NudgeBase):
     id: int
     user_id: int
+    dedupe_key: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from datetime import datetime, date
+from typing import Optional
+from enum import Enum
+
+class ReceiptStatus(str, Enum):
+    queued = "queued"
+    done = "done"
+    failed = "failed"
+
+class Receipt(BaseModel):
+    id: int
+    user_id: int
+    status: ReceiptStatus
+    filename: Optional[str] = None
+    content_type: str
+    size: int
+    sha256: Optional[str] = None
+    duplicate_of: Optional[int] = None
+    merchant_name: Optional[str] = None
+    amount: Optional[float] = None
+    receipt_date: Optional[date] = None
+    text: Optional[str] = None
+    error: Optional[str] = None
+    transaction_id: Optional[int] = None
+    match_score: Optional[float] = None
+    queued_seconds: Optional[float] = None
+    ocr_seconds: Optional[float] = None
+    processed_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ReceiptUpload(Receipt):
+    # "exact": the same bytes were already uploaded, and the receipt is the earlier one. "similar":
+    # the image is within RECEIPT_DUPLICATE_DISTANCE bits of duplicate_of's, but is stored and read
+    # all the same, since a receipt from the same shop's template can look alike with other totals
+    duplicate: Optional[str] = None
+    distance: Optional[int] = None
\ No newline at end of file
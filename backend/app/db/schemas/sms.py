@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from app.db.schemas.transaction import TransactionCreate
+
+class SmsMessage(BaseModel):
+    body: str
+    sender: Optional[str] = None  # e.g. "VM-HDFCBK"
+    received_at: Optional[datetime] = None
+
+class SmsBatch(BaseModel):
+    messages: List[SmsMessage]
+
+class SmsCandidate(TransactionCreate):
+    index: int  # position in the submitted batch
+    account_last4: Optional[str] = None
+
+class SmsParseResult(BaseModel):
+    candidates: List[SmsCandidate]
+    unparsed: List[int]  # positions that aren't bank transactions
@@ -24,4 +24,28 @@ class SplitExpense(SplitExpenseBase):
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+class SettlementBalance(BaseModel):
+    type: str  # user/friend
+    id: int
+    balance: float  # positive: is owed, negative: owes
+
+class SettlementTransfer(BaseModel):
+    payer_type: str
+    payer_id: int
+    payee_type: str
+    payee_id: int
+    amount: float
+
+class Settlement(BaseModel):
+    balances: List[SettlementBalance]
+    transfers: List[SettlementTransfer]
+    unbalanced: float  # what the splits' paid and share amounts fail to net out
+
+class OwedToUser(BaseModel):
+    user_id: int  # owner of the splits
+    amount: float
+
+class OwedSummary(BaseModel):
+    total_owed: float
+    by_user: List[OwedToUser]
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from datetime import datetime, date
-from typing import Optional
+from typing import Literal, Optional
 from enum import Enum
 
 class SubscriptionStatus(str, Enum):
@@ -8,10 +8,13 @@ class SubscriptionStatus(str, Enum):
     paused = "paused"
     cancelled = "cancelled"
 
+# subscription_service.CYCLES; anything else would be billed on a guessed schedule
+BillingCycle = Literal["weekly", "monthly", "yearly"]
+
 class SubscriptionBase(BaseModel):
     name: str
     amount: float
-    billing_cycle: str  # monthly/yearly/weekly
+    billing_cycle: BillingCycle
     next_due_date: date
     category: Optional[str] = None
     status: SubscriptionStatus = SubscriptionStatus.active
@@ -23,15 +26,41 @@ class SubscriptionCreate(SubscriptionBase):
 class SubscriptionUpdate(SubscriptionBase):
     name: Optional[str] = None
     amount: Optional[float] = None
-    billing_cycle: Optional[str] = None
+    billing_cycle: Optional[BillingCycle] = None
     next_due_date: Optional[date] = None
     status: Optional[SubscriptionStatus] = None
 
+    @field_validator("name", "amount", "billing_cycle", "next_due_date", "status")
+    @classmethod
+    def not_null(cls, value):
+        # Optional only so they can be left out; an explicit null would break renewals and forecasts
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
 class Subscription(SubscriptionBase):
     id: int
     user_id: int
+    # Rows saved before the cycle was validated still list
+    billing_cycle: str
     created_at: datetime
     updated_at: Optional[datetime] = None
 
+    class Config:
+        from_attributes = True
+
+class SubscriptionSuggestion(BaseModel):
+    id: int
+    user_id: int
+    name: str
+    amount: float
+    billing_cycle: str
+    next_due_date: date
+    category: Optional[str] = None
+    occurrences: int
+    last_charged_at: datetime
+    confidence: float
+    created_at: datetime
+
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -23,6 +23,7 @@ class TransactionCreate(TransactionBase):
 class Transaction(TransactionBase):
     id: int
     user_id: int
+    category_source: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -0,0 +1,164 @@
+from collections import defaultdict
+from datetime import date, timezone
+from sqlalchemy import select, delete, func, cast, Date, String
+from sqlalchemy.dialects import postgresql, sqlite
+from app.db.models.debt import Debt, DebtStatus
+from app.db.models.monthly_rollup import MonthlyRollup
+from app.db.models.saving import Saving
+from app.db.models.transaction import Transaction
+
+def month_of(timestamp):
+    # Rollups bucket by UTC month; naive timestamps are taken as UTC like the database does
+    if getattr(timestamp, "tzinfo", None) is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return date(timestamp.year, timestamp.month, 1)
+
+def _type_value(type):
+    return getattr(type, "value", type)
+
+def rollup_deltas(transactions, sign=1, deltas=None):
+    """Fold transactions (ORM rows or dicts) into {(month, category, type): [total, count]}."""
+    if deltas is None:
+        deltas = defaultdict(lambda: [0.0, 0])
+    for t in transactions:
+        if isinstance(t, dict):
+            timestamp, category, type, amount = t["timestamp"], t.get("category"), t["type"], t["amount"]
+        else:
+            timestamp, category, type, amount = t.timestamp, t.category, t.type, t.amount
+        delta = deltas[(month_of(timestamp), category or "", _type_value(type))]
+        delta[0] += sign * amount
+        delta[1] += sign
+    return deltas
+
+def _insert_for(db):
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+async def apply_rollup_deltas(db, user_id, deltas):
+    """Add deltas onto the user's rollup rows with one multi-row upsert.
+
+    Runs inside the caller's transaction, so the rollups commit or roll back
+    together with the transaction writes that produced them."""
+    if not deltas:
+        return
+    values = [
+        {"user_id": user_id, "month": month, "category": category, "type": type, "total": total, "count": count}
+        for (month, category, type), (total, count) in deltas.items()
+        if total or count
+    ]
+    if not values:
+        return
+    insert = _insert_for(db)
+    stmt = insert(MonthlyRollup).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MonthlyRollup.user_id, MonthlyRollup.month, MonthlyRollup.category, MonthlyRollup.type],
+        set_={
+            "total": MonthlyRollup.total + stmt.excluded.total,
+            "count": MonthlyRollup.count + stmt.excluded.count,
+            "updated_at": func.now(),
+        }
+    )
+    await db.execute(stmt)
+
+async def record_transactions(db, user_id, transactions, sign=1):
+    await apply_rollup_deltas(db, user_id, rollup_deltas(transactions, sign))
+
+async def record_transaction_change(db, user_id, before=None, after=None):
+    """before/after are the transaction (or a snapshot dict) as it was and as it is now."""
+    deltas = rollup_deltas([before], -1) if before is not None else None
+    if after is not None:
+        deltas = rollup_deltas([after], 1, deltas)
+    await apply_rollup_deltas(db, user_id, deltas)
+
+def transaction_snapshot(transaction):
+    return {
+        "timestamp": transaction.timestamp,
+        "category": transaction.category,
+        "category_source": transaction.category_source,
+        "type": transaction.type,
+        "amount": transaction.amount,
+        "merchant_name": transaction.merchant_name,
+        "description": transaction.description,
+    }
+
+async def get_summary(db, user_id):
+    rows = (await db.execute(
+        select(MonthlyRollup.type, func.sum(MonthlyRollup.total))
+        .filter(MonthlyRollup.user_id == user_id)
+        .group_by(MonthlyRollup.type)
+    )).all()
+    totals = {type: total or 0.0 for type, total in rows}
+    total_savings = await db.scalar(select(func.coalesce(func.sum(Saving.amount), 0.0)).filter(Saving.user_id == user_id))
+    total_debts = await db.scalar(
+        select(func.coalesce(func.sum(Debt.amount), 0.0))
+        .filter(Debt.user_id == user_id, Debt.status == DebtStatus.pending)
+    )
+    total_income = totals.get("income", 0.0)
+    total_expenses = totals.get("expense", 0.0)
+    return {
+        "user_id": user_id,
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "net": total_income - total_expenses,
+        "total_savings": total_savings,
+        "total_debts": total_debts,
+    }
+
+async def get_monthly(db, user_id, start_month=None, end_month=None):
+    query = (
+        select(MonthlyRollup.month, MonthlyRollup.type, func.sum(MonthlyRollup.total), func.sum(MonthlyRollup.count))
+        .filter(MonthlyRollup.user_id == user_id)
+        .group_by(MonthlyRollup.month, MonthlyRollup.type)
+        .order_by(MonthlyRollup.month)
+    )
+    if start_month:
+        query = query.filter(MonthlyRollup.month >= month_of(start_month))
+    if end_month:
+        query = query.filter(MonthlyRollup.month <= month_of(end_month))
+    months = {}
+    for month, type, total, count in (await db.execute(query)).all():
+        entry = months.setdefault(month, {"month": month.isoformat(), "income": 0.0, "expenses": 0.0, "count": 0})
+        entry["income" if type == "income" else "expenses"] += total or 0.0
+        entry["count"] += count or 0
+    for entry in months.values():
+        entry["net"] = entry["income"] - entry["expenses"]
+    return list(months.values())
+
+async def get_categories(db, user_id, type="expense", start_month=None, end_month=None):
+    query = (
+        select(MonthlyRollup.category, func.sum(MonthlyRollup.total).label("total"), func.sum(MonthlyRollup.count))
+        .filter(MonthlyRollup.user_id == user_id, MonthlyRollup.type == type)
+        .group_by(MonthlyRollup.category)
+        .having(func.sum(MonthlyRollup.count) > 0)
+        .order_by(func.sum(MonthlyRollup.total).desc())
+    )
+    if start_month:
+        query = query.filter(MonthlyRollup.month >= month_of(start_month))
+    if end_month:
+        query = query.filter(MonthlyRollup.month <= month_of(end_month))
+    return [
+        {"category": category or None, "total": total or 0.0, "count": count or 0}
+        for category, total, count in (await db.execute(query)).all()
+    ]
+
+async def rebuild_rollups(db, user_id=None):
+    """Recompute rollups from transactions with a single INSERT ... SELECT GROUP BY."""
+    clear = delete(MonthlyRollup)
+    if user_id is not None:
+        clear = clear.filter(MonthlyRollup.user_id == user_id)
+    month = cast(func.date_trunc("month", func.timezone("UTC", Transaction.timestamp)), Date)
+    category = func.coalesce(Transaction.category, "")
+    type = cast(Transaction.type, String)
+    grouped = (
+        select(Transaction.user_id, month, category, type, func.sum(Transaction.amount), func.count())
+        .group_by(Transaction.user_id, month, category, type)
+    )
+    if user_id is not None:
+        grouped = grouped.filter(Transaction.user_id == user_id)
+    await db.execute(clear)
+    await db.execute(
+        MonthlyRollup.__table__.insert().from_select(
+            ["user_id", "month", "category", "type", "total", "count"], grouped
+        )
+    )
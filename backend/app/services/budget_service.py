@@ -0,0 +1,131 @@
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from sqlalchemy import select, delete, func, cast, and_, column, values, Date, Float, String
+from sqlalchemy.dialects import postgresql
+from app.config.settings import BUDGET_SPENT_COUNTER
+from app.db.models.budget import Budget
+from app.db.models.budget_spend import BudgetSpend
+from app.db.models.transaction import Transaction, TransactionType
+
+def day_of(timestamp):
+    # Budget windows are matched on the UTC calendar day, like the monthly rollups
+    if getattr(timestamp, "tzinfo", None) is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return date(timestamp.year, timestamp.month, timestamp.day)
+
+def _spent_on(db):
+    if db.bind.dialect.name == "postgresql":
+        return cast(func.timezone("UTC", Transaction.timestamp), Date)
+    return func.date(Transaction.timestamp)
+
+def _spend_join(db):
+    """Expenses in the budget's category that fall inside its date window."""
+    return and_(
+        Transaction.user_id == Budget.user_id,
+        Transaction.type == TransactionType.expense,
+        Transaction.category == Budget.category,
+        _spent_on(db).between(Budget.start_date, Budget.end_date),
+    )
+
+def utilization_query(db, active_on):
+    """(Budget, spent) for budgets active on a day, for every user; callers add the user filter.
+
+    Reads the spend counter when BUDGET_SPENT_COUNTER is on, so the cost only
+    depends on the number of budgets; otherwise aggregates the ledger in one
+    grouped join."""
+    query = select(Budget).filter(Budget.start_date <= active_on, Budget.end_date >= active_on)
+    if BUDGET_SPENT_COUNTER:
+        return query.add_columns(func.coalesce(BudgetSpend.spent, 0.0)).outerjoin(
+            BudgetSpend, BudgetSpend.budget_id == Budget.id
+        )
+    return query.add_columns(func.coalesce(func.sum(Transaction.amount), 0.0)).outerjoin(
+        Transaction, _spend_join(db)
+    ).group_by(Budget.id)
+
+async def get_utilization(db, user_id, active_on=None):
+    """Spent vs limit for every budget active on a day (today, UTC, by default)."""
+    active_on = active_on or datetime.now(timezone.utc).date()
+    query = utilization_query(db, active_on).filter(Budget.user_id == user_id).order_by(Budget.category, Budget.id)
+    utilization = []
+    for budget, spent in (await db.execute(query)).all():
+        utilization.append({
+            **{c.key: getattr(budget, c.key) for c in Budget.__table__.columns},
+            "spent": spent,
+            "remaining": budget.amount - spent,
+            "utilization": spent / budget.amount if budget.amount else None,
+        })
+    return utilization
+
+def spend_deltas(transactions, sign=1, deltas=None):
+    """Fold transactions (ORM rows or dicts) into {(category, day): amount} for expenses."""
+    if deltas is None:
+        deltas = defaultdict(float)
+    for t in transactions:
+        if isinstance(t, dict):
+            timestamp, category, type, amount = t["timestamp"], t.get("category"), t["type"], t["amount"]
+        else:
+            timestamp, category, type, amount = t.timestamp, t.category, t.type, t.amount
+        if getattr(type, "value", type) != "expense" or not category:
+            continue
+        deltas[(category, day_of(timestamp))] += sign * amount
+    return deltas
+
+async def apply_spend_deltas(db, user_id, deltas):
+    """Add deltas onto every budget whose category and window they fall in, with one upsert."""
+    rows = [(category, day, amount) for (category, day), amount in deltas.items() if amount]
+    if not rows:
+        return
+    changes = values(
+        column("category", String), column("day", Date), column("amount", Float), name="changes"
+    ).data(rows)
+    grouped = (
+        select(Budget.id, func.sum(changes.c.amount))
+        .join(changes, and_(
+            changes.c.category == Budget.category,
+            changes.c.day.between(Budget.start_date, Budget.end_date),
+        ))
+        .filter(Budget.user_id == user_id)
+        .group_by(Budget.id)
+    )
+    stmt = postgresql.insert(BudgetSpend).from_select(["budget_id", "spent"], grouped)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BudgetSpend.budget_id],
+        set_={"spent": BudgetSpend.spent + stmt.excluded.spent, "updated_at": func.now()}
+    )
+    await db.execute(stmt)
+
+async def record_transactions(db, user_id, transactions, sign=1):
+    if BUDGET_SPENT_COUNTER:
+        await apply_spend_deltas(db, user_id, spend_deltas(transactions, sign))
+
+async def record_transaction_change(db, user_id, before=None, after=None):
+    """before/after are the transaction (or a snapshot dict) as it was and as it is now."""
+    if not BUDGET_SPENT_COUNTER:
+        return
+    deltas = spend_deltas([before], -1) if before is not None else None
+    if after is not None:
+        deltas = spend_deltas([after], 1, deltas)
+    await apply_spend_deltas(db, user_id, deltas)
+
+async def rebuild_budget_spend(db, user_id=None, budget_id=None):
+    """Recompute spend counters from the ledger with a single INSERT ... SELECT GROUP BY."""
+    clear = delete(BudgetSpend)
+    grouped = (
+        select(Budget.id, func.coalesce(func.sum(Transaction.amount), 0.0))
+        .outerjoin(Transaction, _spend_join(db))
+        .group_by(Budget.id)
+    )
+    if budget_id is not None:
+        clear = clear.filter(BudgetSpend.budget_id == budget_id)
+        grouped = grouped.filter(Budget.id == budget_id)
+    if user_id is not None:
+        clear = clear.filter(BudgetSpend.budget_id.in_(select(Budget.id).filter(Budget.user_id == user_id)))
+        grouped = grouped.filter(Budget.user_id == user_id)
+    await db.execute(clear)
+    await db.execute(BudgetSpend.__table__.insert().from_select(["budget_id", "spent"], grouped))
+
+async def refresh_budget(db, budget):
+    # A budget's category or window changed, so its counter is recomputed from scratch
+    if BUDGET_SPENT_COUNTER:
+        await db.flush()
+        await rebuild_budget_spend(db, budget_id=budget.id)
@@ -0,0 +1,177 @@
+import math
+import threading
+import zlib
+import numpy as np
+from cachetools import TTLCache
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import (
+    CATEGORIZER_FEATURES, CATEGORIZER_CACHE_SIZE, CATEGORIZER_TTL_SECONDS, CATEGORIZER_MAX_TRAINING_ROWS,
+    CATEGORIZER_MIN_SAMPLES, CATEGORIZER_MIN_CONFIDENCE,
+)
+from app.db.models.transaction import Transaction
+from app.services.merchant_service import clean
+
+# category_source of a category the model filled in; the model only learns from the others
+PREDICTED = "predicted"
+
+def _predicted(row):
+    source = row.get("category_source") if isinstance(row, dict) else getattr(row, "category_source", None)
+    return source == PREDICTED
+
+def _fields(row):
+    if isinstance(row, dict):
+        return row.get("merchant_name"), row.get("description"), row.get("amount"), row.get("type"), row.get("category")
+    return row.merchant_name, row.description, row.amount, row.type, row.category
+
+def tokens(merchant, description, amount, type):
+    """(context words, text words) of a row; only text words count as evidence for a category."""
+    # The type word is always there, so every row has at least one feature
+    context = [f"t:{getattr(type, 'value', type)}"]
+    if amount is not None:
+        context.append(f"a:{int(math.log2(abs(amount) + 1))}")  # order of magnitude
+    text = []
+    if merchant:
+        merchant = clean(merchant).strip()
+        text.append(f"mm:{merchant}")
+        text.extend(f"m:{word}" for word in merchant.split())
+    if description:
+        text.extend(f"d:{word}" for word in clean(description).split())
+    return context, text
+
+def featurize(rows, dim):
+    """Hashed feature ids of all rows, flattened, which of them are text features, and the
+    offset where each row's ids start."""
+    ids = []
+    is_text = []
+    offsets = []
+    for row in rows:
+        offsets.append(len(ids))
+        merchant, description, amount, type, _ = _fields(row)
+        context, text = tokens(merchant, description, amount, type)
+        ids.extend(zlib.crc32(word.encode()) % dim for word in context + text)
+        is_text.extend([False] * len(context) + [True] * len(text))
+    return np.array(ids, dtype=np.int64), np.array(is_text, dtype=bool), np.array(offsets, dtype=np.int64)
+
+class CategoryModel:
+    """Multinomial naive Bayes over hashed merchant/description/amount features, for one user.
+
+    Training is just adding feature counts, so writes update the model in
+    place (and edits or deletes subtract) instead of retraining."""
+
+    def __init__(self, dim=CATEGORIZER_FEATURES):
+        self.dim = dim
+        self.categories = []
+        self.index = {}
+        self.counts = np.zeros((0, dim), dtype=np.float32)
+        self.samples = np.zeros(0, dtype=np.float64)
+        self.weights = None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return int(self.samples.sum())
+
+    def _class_ids(self, categories):
+        new = [c for c in dict.fromkeys(categories) if c not in self.index]
+        if new:
+            for category in new:
+                self.index[category] = len(self.categories)
+                self.categories.append(category)
+            self.counts = np.vstack([self.counts, np.zeros((len(new), self.dim), dtype=np.float32)])
+            self.samples = np.concatenate([self.samples, np.zeros(len(new))])
+        return np.array([self.index[c] for c in categories], dtype=np.int64)
+
+    def learn(self, rows, sign=1):
+        # Its own guesses would only make it surer of them, right or wrong
+        rows = [row for row in rows if _fields(row)[4] and not _predicted(row)]
+        if not rows:
+            return
+        ids, _, offsets = featurize(rows, self.dim)
+        lengths = np.diff(np.append(offsets, len(ids)))
+        with self.lock:
+            classes = self._class_ids([_fields(row)[4] for row in rows])
+            np.add.at(self.counts, (np.repeat(classes, lengths), ids), sign)
+            np.add.at(self.samples, classes, sign)
+            if sign < 0:
+                # Forgetting a row the model never saw must not leave negative counts
+                np.maximum(self.counts, 0, out=self.counts)
+                np.maximum(self.samples, 0, out=self.samples)
+            self.weights = None
+
+    def _log_weights(self):
+        if self.weights is None:
+            smoothed = self.counts + 1.0  # Laplace smoothing
+            likelihood = np.log(smoothed / smoothed.sum(axis=1, keepdims=True)).T
+            prior = np.log((self.samples + 1.0) / (self.samples.sum() + len(self.samples)))
+            seen = self.counts.sum(axis=0) > 0
+            self.weights = (np.ascontiguousarray(likelihood, dtype=np.float32), prior, seen, list(self.categories))
+        return self.weights
+
+    def predict(self, rows):
+        """(category, probability) for every row, scored for the whole batch at once.
+
+        A row none of whose merchant or description words were ever seen gets
+        (None, 0.0) rather than a guess from its amount and the priors."""
+        if not rows or not self.categories:
+            return [(None, 0.0)] * len(rows)
+        ids, is_text, offsets = featurize(rows, self.dim)
+        with self.lock:
+            likelihood, prior, seen, categories = self._log_weights()
+        # Gather every feature's (features x classes) log-likelihoods and sum them per row
+        scores = np.add.reduceat(likelihood[ids], offsets, axis=0) + prior
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        confidence = probabilities[np.arange(len(best)), best]
+        evidence = np.add.reduceat(seen[ids] & is_text, offsets) > 0
+        return [
+            (categories[b], float(p)) if known else (None, 0.0)
+            for b, p, known in zip(best, confidence, evidence)
+        ]
+
+# Per worker; the TTL bounds how long writes made through other workers stay unseen
+_models = TTLCache(maxsize=CATEGORIZER_CACHE_SIZE, ttl=CATEGORIZER_TTL_SECONDS)
+
+async def get_model(db, user_id):
+    """The user's model, trained from their most recent transactions with a given (not predicted)
+    category on a cache miss."""
+    model = _models.get(user_id)
+    if model is None:
+        rows = (await db.execute(
+            select(Transaction.merchant_name, Transaction.description, Transaction.amount, Transaction.type,
+                   Transaction.category)
+            .filter(Transaction.user_id == user_id, Transaction.category.is_not(None),
+                    Transaction.category_source.is_distinct_from(PREDICTED))
+            .order_by(Transaction.timestamp.desc())
+            .limit(CATEGORIZER_MAX_TRAINING_ROWS)
+        )).all()
+        model = CategoryModel()
+        await run_in_threadpool(model.learn, rows)
+        _models[user_id] = model
+    return model
+
+def learn(user_id, rows, sign=1):
+    """Fold written (sign=1) or removed (sign=-1) transactions into the user's model, if loaded."""
+    model = _models.get(user_id)
+    if model is not None:
+        model.learn(rows, sign)
+
+def invalidate(user_id):
+    _models.pop(user_id, None)
+
+def categorize(model, rows, min_confidence=CATEGORIZER_MIN_CONFIDENCE, min_samples=CATEGORIZER_MIN_SAMPLES):
+    """Fill category on the dict rows that have none, where the model is confident enough, and
+    mark it PREDICTED in category_source.
+
+    Returns how many rows were filled."""
+    missing = [row for row in rows if not row.get("category")]
+    if not missing or len(model) < min_samples:
+        return 0
+    filled = 0
+    for row, (category, probability) in zip(missing, model.predict(missing)):
+        if probability >= min_confidence:
+            row["category"] = category
+            row["category_source"] = PREDICTED
+            filled += 1
+    return filled
@@ -0,0 +1,370 @@
+import re
+from calendar import monthrange
+from datetime import date, datetime, time, timedelta, timezone
+from cachetools import LRUCache
+from sqlalchemy import select, func, bindparam, Date, String
+from app.config.settings import CHAT_PLAN_CACHE_SIZE
+from app.db.models.budget import Budget
+from app.db.models.debt import Debt, DebtStatus
+from app.db.models.friend import Friend
+from app.db.models.monthly_rollup import MonthlyRollup
+from app.db.models.subscription import Subscription, SubscriptionStatus
+from app.db.models.transaction import Transaction
+from app.services import budget_service
+from app.services.subscription_service import add_cycle
+
+# Aggregate questions ("how much on food last month", "biggest merchant this year") are parsed
+# into an intent and answered with one grouped query, without a model call. Questions the
+# parser doesn't recognize return None and go to retrieval and the LLM instead.
+
+MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august", "september",
+          "october", "november", "december"]
+UNITS = {"day": 1, "week": 7}
+
+PERIOD = re.compile(
+    r"\b(?:(?:in|during|over|for|from) )?(?:the )?(?:(?P<named>today|yesterday|this week|last week|this month|last month|previous month|this year|last year)"
+    r"|(?:last|past) (?P<count>\d+) (?P<unit>day|week|month)s?"
+    r"|(?P<month>" + "|".join(MONTHS) + r")(?: (?P<year>\d{4}))?"
+    r"|(?P<all>all time|ever|overall))\b"
+)
+TERM = re.compile(r"\b(?:on|for|at|from|with|to|in)\s+(?:my\s+|the\s+)?(?P<term>[a-z0-9][a-z0-9&' -]*?)\s*$")
+# "my food budget"
+BUDGET_TERM = re.compile(r"\b([a-z]+) budgets?\b")
+TOP_N = re.compile(r"\btop (\d+)\b")
+
+SUBJECTS = [
+    ("budgets", re.compile(r"\bbudgets?\b")),
+    ("debts", re.compile(r"\b(?:debts?|owe|owed|owes|lent|borrowed|loans?)\b")),
+    ("subscriptions", re.compile(r"\b(?:subscriptions?|recurring)\b")),
+    ("transactions", re.compile(
+        r"\b(?:spend|spent|spending|expenses?|costs?|paid|pay|earn|earned|income|salary|received|"
+        r"transactions?|purchases?|merchants?|categor(?:y|ies)|shops?|stores?)\b"
+    )),
+]
+# Ledger questions need one of these to be planned; "what did I pay Zomato?" is a lookup for retrieval
+AGGREGATE = re.compile(
+    r"\b(?:how much|how many|total|sum|number of|count|average|avg|typical|biggest|largest|highest|"
+    r"most expensive|top|most|breakdown|by (?:category|merchant|month)|per (?:category|merchant|month)|monthly)\b"
+)
+INCOME = re.compile(r"\b(?:earn|earned|income|salary|received|credited)\b")
+COUNT = re.compile(r"\b(?:how many|number of|count)\b")
+AVERAGE = re.compile(r"\b(?:average|avg|typical)\b")
+TOP = re.compile(r"\b(?:biggest|largest|highest|most expensive|top|most)\b")
+BY_CATEGORY = re.compile(r"\bcategor(?:y|ies)\b")
+BY_MERCHANT = re.compile(r"\b(?:merchants?|shops?|stores?|where)\b")
+BY_MONTH = re.compile(r"\b(?:(?:by|per|each|every) month|monthly|month by month)\b")
+# A grouping phrase with its "by"/"per", cut out before the term is taken: "food by month" is about food
+GROUPING = re.compile(
+    r"(?:\b(?:by|per|each|every) )?(?:" + "|".join(p.pattern for p in (BY_MONTH, BY_CATEGORY, BY_MERCHANT)) + ")"
+)
+PLURAL = re.compile(r"\b(?:categories|merchants|shops|stores|expenses|purchases|transactions)\b")
+OVERDUE = re.compile(r"\b(?:overdue|late)\b")
+# Words a captured term can't be: "top categories for this year" has no category filter
+NOT_TERMS = {"category", "categories", "merchant", "merchants", "shop", "shops", "store", "stores", "me",
+             "it", "them", "everything", "all", "total", "average", "budget", "budgets", "debts", "subscriptions"}
+
+def normalize(question):
+    return " ".join(re.sub(r"[^a-z0-9&' ]+", " ", question.lower()).split())
+
+def _month_start(day, months=0):
+    return add_cycle(day.replace(day=1), "monthly", months)
+
+def period(match, today):
+    """(start, end exclusive, label) for a PERIOD match, or None for all time."""
+    named = match.group("named")
+    if named == "today":
+        return today, today + timedelta(days=1), "today"
+    if named == "yesterday":
+        return today - timedelta(days=1), today, "yesterday"
+    if named in ("this week", "last week"):
+        monday = today - timedelta(days=today.weekday())
+        if named == "this week":
+            return monday, monday + timedelta(days=7), named
+        return monday - timedelta(days=7), monday, named
+    if named == "this month":
+        return _month_start(today), _month_start(today, 1), named
+    if named in ("last month", "previous month"):
+        return _month_start(today, -1), _month_start(today), "last month"
+    if named == "this year":
+        return date(today.year, 1, 1), date(today.year + 1, 1, 1), named
+    if named == "last year":
+        return date(today.year - 1, 1, 1), date(today.year, 1, 1), named
+    if match.group("count"):
+        count, unit = int(match.group("count")), match.group("unit")
+        start = add_cycle(today, "monthly", -count) if unit == "month" else today - timedelta(days=count * UNITS[unit])
+        return start + timedelta(days=1), today + timedelta(days=1), f"in the last {count} {unit}s"
+    if match.group("month"):
+        month = MONTHS.index(match.group("month")) + 1
+        # Without a year, the latest such month that has started
+        year = int(match.group("year") or (today.year if month <= today.month else today.year - 1))
+        start = date(year, month, 1)
+        return start, start + timedelta(days=monthrange(year, month)[1]), f"in {start:%B %Y}"
+    return None
+
+def parse(question, today):
+    """The intent of an aggregate question, or None if it isn't one the planner answers."""
+    text = normalize(question)
+    subject = next((name for name, pattern in SUBJECTS if pattern.search(text)), None)
+    aggregate = AGGREGATE.search(text)
+    if subject is None and aggregate:
+        # "how much on uber yesterday"
+        subject = "transactions"
+    if subject is None or subject == "transactions" and not aggregate:
+        return None
+    intent = {"subject": subject, "period": None, "term": None}
+    match = PERIOD.search(text)
+    if match:
+        intent["period"] = period(match, today)
+        text = (text[:match.start()] + text[match.end():]).strip()
+    term = TERM.search(" ".join(GROUPING.sub(" ", text).split()))
+    if term and term.group("term") not in NOT_TERMS and not SUBJECTS[3][1].fullmatch(term.group("term")):
+        intent["term"] = term.group("term")
+    elif subject == "budgets":
+        term = BUDGET_TERM.search(text)
+        if term and term.group(1) not in NOT_TERMS | {"my", "the", "a", "monthly", "weekly", "yearly", "active"}:
+            intent["term"] = term.group(1)
+    if subject == "transactions":
+        intent["type"] = "income" if INCOME.search(text) else "expense"
+        intent["metric"] = ("count" if COUNT.search(text) else "avg" if AVERAGE.search(text)
+                            else "top" if TOP.search(text) else "sum")
+        intent["group"] = ("month" if BY_MONTH.search(text) else "category" if BY_CATEGORY.search(text)
+                           else "merchant" if BY_MERCHANT.search(text) else None)
+        top = TOP_N.search(text)
+        intent["limit"] = (int(top.group(1)) if top else 12 if intent["metric"] != "top"
+                           else 5 if PLURAL.search(text) else 1)
+        if not match:
+            # This month, or this year for a month-by-month breakdown
+            intent["period"] = period(PERIOD.search("this year" if intent["group"] == "month" else "this month"), today)
+    elif subject == "debts":
+        intent["overdue"] = bool(OVERDUE.search(text))
+    return intent
+
+def _plural_forms(term):
+    forms = {term, f"{term}s"}
+    if term.endswith("ies"):
+        forms.add(f"{term[:-3]}y")
+    elif term.endswith("y"):
+        forms.add(f"{term[:-1]}ies")
+    if term.endswith("s"):
+        forms.add(term[:-1])
+    return sorted(forms)
+
+async def _category_for(db, user_id, term):
+    # The user's own category spelled like the term, from the small rollups table
+    return await db.scalar(
+        select(MonthlyRollup.category)
+        .filter(MonthlyRollup.user_id == user_id, func.lower(MonthlyRollup.category).in_(_plural_forms(term)))
+        .limit(1)
+    )
+
+def _month_of_timestamp(dialect):
+    if dialect == "postgresql":
+        return func.cast(func.date_trunc("month", func.timezone("UTC", Transaction.timestamp)), Date)
+    return func.date(Transaction.timestamp, "start of month")
+
+def transaction_plan(dialect, metric, group, rollups, by_category, by_merchant, has_period):
+    """The statement for a transaction intent; every value is a bind parameter, so one plan
+    serves every user and period.
+
+    Whole-month periods without a merchant filter read monthly_rollups (a
+    few rows per month) instead of scanning the ledger."""
+    if rollups:
+        total, count = func.coalesce(func.sum(MonthlyRollup.total), 0.0), func.coalesce(func.sum(MonthlyRollup.count), 0)
+        filters = [MonthlyRollup.user_id == bindparam("user_id"), MonthlyRollup.type == bindparam("type", type_=String)]
+        if has_period:
+            filters += [MonthlyRollup.month >= bindparam("start", type_=Date), MonthlyRollup.month < bindparam("end", type_=Date)]
+        if by_category:
+            filters.append(MonthlyRollup.category == bindparam("category"))
+        keys = {"category": func.nullif(MonthlyRollup.category, ""), "month": MonthlyRollup.month}
+    else:
+        total, count = func.coalesce(func.sum(Transaction.amount), 0.0), func.count()
+        filters = [Transaction.user_id == bindparam("user_id"),
+                   Transaction.type == bindparam("type", type_=Transaction.type.type)]
+        if has_period:
+            filters += [Transaction.timestamp >= bindparam("start_at"), Transaction.timestamp < bindparam("end_at")]
+        if by_category:
+            filters.append(Transaction.category == bindparam("category"))
+        if by_merchant:
+            filters.append(func.lower(Transaction.merchant_name).like(bindparam("merchant")))
+        if metric == "top" and group is None:
+            # The largest single transactions
+            return (
+                select(Transaction.amount, Transaction.merchant_name, Transaction.description, Transaction.category,
+                       Transaction.timestamp)
+                .filter(*filters).order_by(Transaction.amount.desc()).limit(bindparam("limit"))
+            )
+        keys = {"category": Transaction.category, "merchant": Transaction.merchant_name,
+                "month": _month_of_timestamp(dialect)}
+    if group is None:
+        return select(total, count).filter(*filters)
+    key = keys[group].label("key")
+    stmt = select(key, total.label("total"), count.label("count")).filter(*filters).group_by(key)
+    if group == "merchant":
+        stmt = stmt.filter(key.is_not(None))
+    if group == "month":
+        return stmt.order_by(key)
+    return stmt.order_by(total.label("total").desc()).limit(bindparam("limit"))
+
+def budget_plan(db, by_category):
+    stmt = budget_service.utilization_query(db, bindparam("today", type_=Date))
+    stmt = stmt.filter(Budget.user_id == bindparam("user_id"))
+    if by_category:
+        stmt = stmt.filter(func.lower(Budget.category).in_(bindparam("categories", expanding=True)))
+    return stmt.order_by(Budget.category, Budget.id)
+
+def debt_plan(by_friend, overdue):
+    name = func.coalesce(Friend.name, "").label("name")
+    stmt = (
+        select(name, func.sum(Debt.amount), func.count(), func.min(Debt.due_date))
+        .outerjoin(Friend, Friend.id == Debt.friend_id)
+        .filter(Debt.user_id == bindparam("user_id"), Debt.status == DebtStatus.pending)
+        .group_by(name)
+        .order_by(func.sum(Debt.amount).desc())
+    )
+    if by_friend:
+        stmt = stmt.filter(func.lower(Friend.name).like(bindparam("friend")))
+    if overdue:
+        stmt = stmt.filter(Debt.due_date < bindparam("today", type_=Date))
+    return stmt
+
+def subscription_plan():
+    return (
+        select(Subscription.name, Subscription.amount, Subscription.billing_cycle, Subscription.next_due_date)
+        .filter(Subscription.user_id == bindparam("user_id"), Subscription.status == SubscriptionStatus.active)
+        .order_by(Subscription.amount.desc())
+    )
+
+# Compiled statements by intent shape (never by user, period or term, which are bound per call)
+_plans = LRUCache(maxsize=CHAT_PLAN_CACHE_SIZE)
+
+def plan(key, build):
+    statement = _plans.get(key)
+    if statement is None:
+        statement = _plans[key] = build()
+    return statement
+
+def _money(amount):
+    return f"₹{amount:,.2f}"
+
+def _when(intent):
+    return f" {intent['period'][2]}" if intent["period"] else ""
+
+def _day(value):
+    return f"{value.day} {value:%b %Y}"
+
+async def _answer_transactions(db, user_id, intent):
+    dialect = db.bind.dialect.name
+    params = {"user_id": user_id, "type": intent["type"], "limit": intent["limit"]}
+    category = merchant = None
+    if intent["term"]:
+        category = await _category_for(db, user_id, intent["term"])
+        merchant = None if category else intent["term"]
+    start_end = intent["period"]
+    if start_end:
+        params.update(start=start_end[0], end=start_end[1],
+                      start_at=datetime.combine(start_end[0], time.min, timezone.utc),
+                      end_at=datetime.combine(start_end[1], time.min, timezone.utc))
+    if category:
+        params["category"] = category
+    if merchant:
+        params["merchant"] = f"%{merchant}%"
+    whole_months = start_end is None or (start_end[0].day == 1 and start_end[1].day == 1)
+    top_rows = intent["metric"] == "top" and intent["group"] is None
+    rollups = whole_months and merchant is None and intent["group"] != "merchant" and not top_rows
+    key = ("transactions", dialect, intent["metric"], intent["group"], rollups, bool(category), bool(merchant),
+           bool(start_end))
+    statement = plan(key, lambda: transaction_plan(
+        dialect, intent["metric"], intent["group"], rollups, bool(category), bool(merchant), bool(start_end),
+    ))
+    rows = (await db.execute(statement, params)).all()
+    verb = "earned" if intent["type"] == "income" else "spent"
+    scope = f" on {category}" if category else f" at {merchant}" if merchant else ""
+    when = _when(intent)
+    if top_rows:
+        if not rows:
+            return f"No {intent['type']} transactions{scope}{when}.", rows
+        lines = [f"{_money(r.amount)} at {r.merchant_name or r.description or r.category or 'unknown'} on {_day(r.timestamp)}"
+                 for r in rows]
+        return f"Your largest {intent['type']}{scope}{when}: " + "; ".join(lines) + ".", rows
+    if intent["group"] is None:
+        total, count = rows[0]
+        if intent["metric"] == "count":
+            return f"You have {count} {intent['type']} transactions{scope}{when}, {_money(total)} in total.", rows
+        if intent["metric"] == "avg":
+            average = total / count if count else 0.0
+            return f"On average you {verb} {_money(average)} per transaction{scope}{when} ({count} transactions).", rows
+        return f"You {verb} {_money(total)}{scope}{when} across {count} transactions.", rows
+    if not rows:
+        return f"No {intent['type']} transactions{scope}{when}.", rows
+    label = {"category": "categories", "merchant": "merchants", "month": "months"}[intent["group"]]
+    described = [
+        f"{r.key.strftime('%B %Y') if intent['group'] == 'month' else r.key or 'Uncategorized'}: {_money(r.total)}"
+        for r in rows
+    ]
+    if intent["metric"] == "top" and intent["limit"] == 1:
+        return f"Your biggest {intent['group']}{scope}{when} was {described[0]} ({rows[0].count} transactions).", rows
+    return f"You {verb}{scope}{when} by {intent['group']}: " + "; ".join(described) + ".", rows
+
+async def _answer_budgets(db, user_id, intent, today):
+    dialect = db.bind.dialect.name
+    params = {"user_id": user_id, "today": today}
+    if intent["term"]:
+        params["categories"] = _plural_forms(intent["term"])
+    statement = plan(("budgets", dialect, bool(intent["term"])), lambda: budget_plan(db, bool(intent["term"])))
+    rows = (await db.execute(statement, params)).all()
+    if not rows:
+        return "You have no active budgets" + (f" for {intent['term']}." if intent["term"] else "."), rows
+    lines = []
+    for budget, spent in rows:
+        state = "over by " + _money(spent - budget.amount) if spent > budget.amount else _money(budget.amount - spent) + " left"
+        lines.append(f"{budget.category}: {_money(spent)} of {_money(budget.amount)} ({state})")
+    return "Your budgets: " + "; ".join(lines) + ".", [(budget.category, budget.amount, spent) for budget, spent in rows]
+
+async def _answer_debts(db, user_id, intent, today):
+    params = {"user_id": user_id, "today": today}
+    if intent["term"]:
+        params["friend"] = f"%{intent['term']}%"
+    statement = plan(("debts", bool(intent["term"]), intent["overdue"]),
+                     lambda: debt_plan(bool(intent["term"]), intent["overdue"]))
+    rows = (await db.execute(statement, params)).all()
+    kind = "overdue debts" if intent["overdue"] else "pending debts"
+    if not rows:
+        return f"You have no {kind}" + (f" with {intent['term']}." if intent["term"] else "."), rows
+    total = sum(r[1] for r in rows)
+    count = sum(r[2] for r in rows)
+    lines = [f"{name or 'no friend'}: {_money(amount)}" + (f", next due {_day(due)}" if due else "")
+             for name, amount, _, due in rows]
+    return f"You have {count} {kind} totalling {_money(total)}: " + "; ".join(lines) + ".", rows
+
+async def _answer_subscriptions(db, user_id, intent, today):
+    statement = plan(("subscriptions",), subscription_plan)
+    rows = (await db.execute(statement, {"user_id": user_id})).all()
+    if not rows:
+        return "You have no active subscriptions.", rows
+    per_month = {"weekly": 52 / 12, "monthly": 1, "yearly": 1 / 12}
+    monthly = sum(amount * per_month.get(cycle, 1) for _, amount, cycle, _ in rows)
+    lines = [f"{name} {_money(amount)} {cycle}, next {_day(due)}" for name, amount, cycle, due in rows[:5]]
+    return (f"You have {len(rows)} active subscriptions costing about {_money(monthly)} a month: "
+            + "; ".join(lines) + ("; ..." if len(rows) > 5 else "") + "."), rows
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+async def answer(db, user_id, question, today=None):
+    """{"intent", "answer", "rows"} for an aggregate question, or None if it isn't one."""
+    today = today or datetime.now(timezone.utc).date()
+    intent = parse(question, today)
+    if intent is None:
+        return None
+    if intent["subject"] == "transactions":
+        text, rows = await _answer_transactions(db, user_id, intent)
+    elif intent["subject"] == "budgets":
+        text, rows = await _answer_budgets(db, user_id, intent, today)
+    elif intent["subject"] == "debts":
+        text, rows = await _answer_debts(db, user_id, intent, today)
+    else:
+        text, rows = await _answer_subscriptions(db, user_id, intent, today)
+    if intent["period"]:
+        start, end, label = intent["period"]
+        intent["period"] = {"start": start.isoformat(), "end": (end - timedelta(days=1)).isoformat(), "label": label}
+    return {"intent": intent, "answer": text, "rows": [[_plain(value) for value in row] for row in rows]}
@@ -0,0 +1,170 @@
+import asyncio
+import time
+import weakref
+from datetime import date, datetime, timezone
+from sqlalchemy import select, func
+from sqlalchemy.exc import SQLAlchemyError
+from app.config.settings import DASHBOARD_MAX_SESSIONS
+from app.db.database import new_async_session
+from app.db.models.debt import Debt, DebtStatus
+from app.db.models.goal import Goal
+from app.db.models.transaction import Transaction
+from app.db.models.widget_config import WidgetConfig
+from app.services import analytics_service, budget_service
+
+# Layout used until the user saves their own WidgetConfig rows (mirrors the frontend defaults)
+DEFAULT_WIDGETS = [
+    "recent-transactions",
+    "cash-flow-summary",
+    "budget-overview",
+    "goal-progress",
+    "spending-summary",
+    "spending-trends",
+    "debt-summary",
+]
+
+def _current_month():
+    return analytics_service.month_of(datetime.now(timezone.utc))
+
+def _months_back(month, count):
+    year, index = divmod(month.year * 12 + month.month - 1 - count, 12)
+    return date(year, index + 1, 1)
+
+async def recent_transactions(db, user_id, settings):
+    limit = int(settings.get("limit", 5))
+    rows = (await db.scalars(
+        select(Transaction)
+        .filter(Transaction.user_id == user_id)
+        .order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+        .limit(limit)
+    )).all()
+    return [
+        {
+            "id": t.id,
+            "amount": t.amount,
+            "type": t.type.value,
+            "category": t.category,
+            "merchant_name": t.merchant_name,
+            "description": t.description,
+            "timestamp": t.timestamp.isoformat(),
+        }
+        for t in rows
+    ]
+
+async def cash_flow_summary(db, user_id, settings):
+    month = _current_month()
+    months = await analytics_service.get_monthly(db, user_id, month, month)
+    if months:
+        return months[0]
+    return {"month": month.isoformat(), "income": 0.0, "expenses": 0.0, "count": 0, "net": 0.0}
+
+async def savings_rate(db, user_id, settings):
+    summary = await cash_flow_summary(db, user_id, settings)
+    income = summary["income"]
+    return {
+        "month": summary["month"],
+        "income": income,
+        "saved": summary["net"],
+        "rate": summary["net"] / income if income else None,
+    }
+
+async def budget_overview(db, user_id, settings):
+    return await budget_service.get_utilization(db, user_id)
+
+async def goal_progress(db, user_id, settings):
+    goals = (await db.scalars(select(Goal).filter(Goal.user_id == user_id).order_by(Goal.target_date))).all()
+    return [
+        {
+            "id": g.id,
+            "name": g.name,
+            "current_amount": g.current_amount,
+            "target_amount": g.target_amount,
+            "progress": g.current_amount / g.target_amount if g.target_amount else None,
+            "target_date": g.target_date.isoformat(),
+        }
+        for g in goals
+    ]
+
+async def spending_summary(db, user_id, settings):
+    month = _current_month()
+    return await analytics_service.get_categories(db, user_id, "expense", month, month)
+
+async def spending_trends(db, user_id, settings):
+    month = _current_month()
+    months = int(settings.get("months", 6))
+    return await analytics_service.get_monthly(db, user_id, _months_back(month, months - 1), month)
+
+async def debt_summary(db, user_id, settings):
+    total, count, next_due = (await db.execute(
+        select(func.coalesce(func.sum(Debt.amount), 0.0), func.count(Debt.id), func.min(Debt.due_date))
+        .filter(Debt.user_id == user_id, Debt.status == DebtStatus.pending)
+    )).one()
+    return {
+        "total_pending": total,
+        "pending_count": count,
+        "next_due_date": next_due.isoformat() if next_due else None,
+    }
+
+WIDGETS = {
+    "recent-transactions": recent_transactions,
+    "cash-flow-summary": cash_flow_summary,
+    "budget-overview": budget_overview,
+    "goal-progress": goal_progress,
+    "spending-summary": spending_summary,
+    "spending-trends": spending_trends,
+    "debt-summary": debt_summary,
+    "savings-rate": savings_rate,
+}
+
+# Per event loop (a semaphore is bound to the loop it first waits on); one in production
+_session_slots = weakref.WeakKeyDictionary()
+
+def _slots():
+    loop = asyncio.get_running_loop()
+    if loop not in _session_slots:
+        _session_slots[loop] = asyncio.Semaphore(DASHBOARD_MAX_SESSIONS)
+    return _session_slots[loop]
+
+async def _compute_widget(user_id, widget):
+    # Each widget gets its own session (and connection) so the queries run concurrently, at most
+    # DASHBOARD_MAX_SESSIONS across all dashboards at a time
+    started = time.perf_counter()
+    result = {key: widget[key] for key in ("id", "type", "position")}
+    compute = WIDGETS.get(widget["type"])
+    try:
+        if compute is None:
+            raise ValueError(f"Unknown widget type {widget['type']!r}")
+        async with _slots(), new_async_session() as db:
+            result["data"] = await compute(db, user_id, widget["settings"])
+    except (SQLAlchemyError, OSError, TimeoutError):
+        # The database or pool failing isn't one widget's problem; the request fails
+        raise
+    except Exception as e:
+        # A widget's own error (unknown type, bad settings) is reported in its place
+        result["data"] = None
+        result["error"] = str(e)
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+async def get_dashboard(db, user_id):
+    started = time.perf_counter()
+    configs = (await db.scalars(
+        select(WidgetConfig).filter(WidgetConfig.user_id == user_id).order_by(WidgetConfig.position)
+    )).all()
+    if configs:
+        widgets = [
+            {"id": c.id, "type": c.widget_type, "position": c.position, "settings": c.settings or {}}
+            for c in configs
+            if (c.settings or {}).get("enabled", True)
+        ]
+    else:
+        widgets = [
+            {"id": None, "type": type, "position": position, "settings": {}}
+            for position, type in enumerate(DEFAULT_WIDGETS, 1)
+        ]
+    results = await asyncio.gather(*(_compute_widget(user_id, widget) for widget in widgets))
+    return {
+        "user_id": user_id,
+        "widgets": results,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
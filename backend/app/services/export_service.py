@@ -0,0 +1,123 @@
+import csv
+import enum
+import io
+import json
+import zipfile
+import zlib
+from datetime import date, datetime
+from sqlalchemy import select
+from app.config.settings import EXPORT_CHUNK_SIZE
+from app.db.database import new_async_session
+from app.db.models.debt import Debt
+from app.db.models.split_expense import SplitExpense
+from app.db.models.subscription import Subscription
+from app.db.models.transaction import Transaction
+
+class ExportFormat(str, enum.Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+class ExportSection(str, enum.Enum):
+    debts = "debts"
+    subscriptions = "subscriptions"
+    split_expenses = "split_expenses"
+
+SECTIONS = {
+    "transactions": (Transaction, Transaction.timestamp),
+    "debts": (Debt, Debt.created_at),
+    "subscriptions": (Subscription, Subscription.created_at),
+    "split_expenses": (SplitExpense, SplitExpense.created_at),
+}
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _csv_value(value):
+    value = _plain(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+def _section_query(name, user_id):
+    model, order_column = SECTIONS[name]
+    columns = [c for c in model.__table__.columns if c.key != "user_id"]
+    stmt = (
+        select(*columns)
+        .filter(model.user_id == user_id)
+        .order_by(order_column, model.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    return [c.key for c in columns], stmt
+
+async def _iter_encoded(db, name, user_id, format):
+    """Encode one section chunk by chunk, never holding more than a partition."""
+    names, stmt = _section_query(name, user_id)
+    if format == ExportFormat.csv:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(names)
+        yield buffer.getvalue().encode()
+    result = await db.stream(stmt)
+    try:
+        async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+            buffer = io.StringIO()
+            if format == ExportFormat.csv:
+                csv.writer(buffer).writerows([_csv_value(v) for v in row] for row in rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps({k: _plain(v) for k, v in zip(names, row)}))
+                    buffer.write("\n")
+            yield buffer.getvalue().encode()
+    finally:
+        await result.close()
+
+class _ChunkSink:
+    """Write-only file object for ZipFile; compressed bytes are drained after each write."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def export_filename(format, sections):
+    if sections:
+        return "ledger.zip"
+    return f"transactions.{format.value}.gz"
+
+async def stream_export(user_id, format, sections):
+    """Yield the export as gzip (transactions only) or as a zip with one file per section.
+
+    Runs on its own session because the response outlives the request's
+    dependencies, and reads every section through a server-side cursor."""
+    async with new_async_session() as db:
+        if not sections:
+            compressor = zlib.compressobj(wbits=31)  # 31: gzip container
+            async for chunk in _iter_encoded(db, "transactions", user_id, format):
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.flush()
+            return
+        sink = _ChunkSink()
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for name in ["transactions", *[s.value for s in sections]]:
+                with archive.open(f"{name}.{format.value}", "w") as member:
+                    async for chunk in _iter_encoded(db, name, user_id, format):
+                        member.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+        yield sink.drain()
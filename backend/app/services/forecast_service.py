@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from sqlalchemy import select, func
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import SUBSCRIPTION_DETECT_LOOKBACK_DAYS
+from app.db.models.debt import Debt, DebtStatus
+from app.db.models.monthly_rollup import MonthlyRollup
+from app.db.models.subscription import Subscription, SubscriptionStatus
+from app.db.models.transaction import Transaction, TransactionType
+from app.services import subscription_service
+from app.services.subscription_service import add_cycle
+
+MONTH_STEPS = {"monthly": 1, "yearly": 12}
+
+def occurrences(next_due, billing_cycle, start, end):
+    """Every due date of a set of recurring items inside [start, end], as day offsets from start.
+
+    next_due is a datetime64[D] array and billing_cycle a matching array of
+    cycle names. Each cycle is expanded for all of its items at once on a
+    (items x periods) grid; monthly and yearly dates keep the item's day of
+    month, clamped to short months. Returns (item index, day offset) arrays."""
+    horizon = (end - start).astype(int)
+    items, offsets = [], []
+    weekly = np.flatnonzero(billing_cycle == "weekly")
+    if len(weekly):
+        first = (next_due[weekly] - start).astype(int)
+        first = np.where(first < 0, np.mod(first, 7), first)  # overdue: from the first date in range
+        grid = first[:, None] + 7 * np.arange(horizon // 7 + 1)
+        row, col = np.nonzero((grid >= 0) & (grid <= horizon))
+        items.append(weekly[row])
+        offsets.append(grid[row, col])
+    for cycle, step in MONTH_STEPS.items():
+        selected = np.flatnonzero(billing_cycle == cycle)
+        if not len(selected):
+            continue
+        due = next_due[selected]
+        first_month = due.astype("datetime64[M]")
+        day = (due - first_month.astype("datetime64[D]")).astype(int)
+        periods = int((end.astype("datetime64[M]") - first_month.min()).astype(int)) // step + 1
+        months = first_month[:, None] + step * np.arange(max(periods, 1))
+        month_start = months.astype("datetime64[D]")
+        month_length = ((months + 1).astype("datetime64[D]") - month_start).astype(int)
+        grid = (month_start + np.minimum(day[:, None], month_length - 1) - start).astype(int)
+        row, col = np.nonzero((grid >= 0) & (grid <= horizon))
+        items.append(selected[row])
+        offsets.append(grid[row, col])
+    if not items:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(items), np.concatenate(offsets)
+
+def project(starting_balance, start, end, recurring, one_off):
+    """Daily inflow, outflow and balance from start to end (dates).
+
+    recurring is a list of (signed amount, billing_cycle, next_due_date),
+    one_off a list of (signed amount, date); one-offs dated before start
+    land on start."""
+    first = np.datetime64(start, "D")
+    last = np.datetime64(end, "D")
+    days = (last - first).astype(int) + 1
+    inflow = np.zeros(days)
+    outflow = np.zeros(days)
+    if recurring:
+        amounts = np.array([amount for amount, _, _ in recurring])
+        cycles = np.array([cycle for _, cycle, _ in recurring])
+        next_due = np.array([due for _, _, due in recurring], dtype="datetime64[D]")
+        item, offset = occurrences(next_due, cycles, first, last)
+        flows = amounts[item]
+        np.add.at(inflow, offset[flows > 0], flows[flows > 0])
+        np.add.at(outflow, offset[flows < 0], -flows[flows < 0])
+    for amount, day in one_off:
+        offset = min(max((np.datetime64(day, "D") - first).astype(int), 0), days - 1)
+        if amount > 0:
+            inflow[offset] += amount
+        else:
+            outflow[offset] -= amount
+    balance = starting_balance + np.cumsum(inflow - outflow)
+    return inflow, outflow, balance
+
+async def _starting_balance(db, user_id):
+    rows = (await db.execute(
+        select(MonthlyRollup.type, func.sum(MonthlyRollup.total))
+        .filter(MonthlyRollup.user_id == user_id)
+        .group_by(MonthlyRollup.type)
+    )).all()
+    totals = {type: total or 0.0 for type, total in rows}
+    return totals.get("income", 0.0) - totals.get("expense", 0.0)
+
+async def _recurring_income(db, user_id, today):
+    # Salary and other regular credits, found the same way as subscription suggestions
+    since = datetime.combine(today - timedelta(days=SUBSCRIPTION_DETECT_LOOKBACK_DAYS), datetime.min.time(), timezone.utc)
+    rows = (await db.execute(
+        select(
+            func.coalesce(Transaction.merchant_name, Transaction.description, Transaction.category, "Income"),
+            Transaction.amount, Transaction.timestamp, Transaction.category,
+        )
+        .filter(Transaction.user_id == user_id, Transaction.type == TransactionType.income,
+                Transaction.timestamp >= since)
+    )).all()
+    return await run_in_threadpool(subscription_service.detect, rows, today)
+
+async def get_forecast(db, user_id, months, today=None):
+    """Projected daily balance for the next `months` months.
+
+    Starts from the ledger's net balance and adds active subscriptions
+    (outflows, by billing cycle), pending debts (outflows on their due date,
+    overdue ones tomorrow) and recurring income detected in the ledger."""
+    today = today or datetime.now(timezone.utc).date()
+    start = today + timedelta(days=1)
+    end = add_cycle(today, "monthly", months)
+    subscriptions = (await db.execute(
+        select(Subscription.name, Subscription.amount, Subscription.billing_cycle, Subscription.next_due_date)
+        .filter(Subscription.user_id == user_id, Subscription.status == SubscriptionStatus.active)
+    )).all()
+    debts = (await db.execute(
+        select(Debt.description, Debt.amount, Debt.due_date)
+        .filter(Debt.user_id == user_id, Debt.status == DebtStatus.pending, Debt.due_date.is_not(None),
+                Debt.due_date <= end)
+    )).all()
+    income = await _recurring_income(db, user_id, today)
+    starting_balance = await _starting_balance(db, user_id)
+    recurring = [(-amount, cycle, due) for _, amount, cycle, due in subscriptions if cycle in subscription_service.CYCLES]
+    recurring += [(i["amount"], i["billing_cycle"], i["next_due_date"]) for i in income]
+    one_off = [(-amount, due) for _, amount, due in debts]
+    inflow, outflow, balance = await run_in_threadpool(project, starting_balance, start, end, recurring, one_off)
+    dates = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1).astype(str)
+    lowest = int(balance.argmin())
+    return {
+        "user_id": user_id,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "starting_balance": round(starting_balance, 2),
+        "ending_balance": round(float(balance[-1]), 2),
+        "lowest_balance": {"date": str(dates[lowest]), "balance": round(float(balance[lowest]), 2)},
+        "recurring": {
+            "subscriptions": [
+                {"name": name, "amount": amount, "billing_cycle": cycle, "next_due_date": due.isoformat()}
+                for name, amount, cycle, due in subscriptions
+            ],
+            "debts": [
+                {"description": description, "amount": amount, "due_date": due.isoformat()}
+                for description, amount, due in debts
+            ],
+            "income": [
+                {"name": i["name"], "amount": i["amount"], "billing_cycle": i["billing_cycle"],
+                 "next_due_date": i["next_due_date"].isoformat()}
+                for i in income
+            ],
+        },
+        "days": [
+            {"date": day, "inflow": round(i, 2), "outflow": round(o, 2), "balance": round(b, 2)}
+            for day, i, o, b in zip(dates.tolist(), inflow.tolist(), outflow.tolist(), balance.tolist())
+        ],
+    }
@@ -0,0 +1,179 @@
+import json
+import re
+from cachetools import LRUCache
+from sqlalchemy import select, update
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import MERCHANT_DICTIONARY_PATH, MERCHANT_RULES_CACHE_SIZE, MERCHANT_RENORMALIZE_BATCH_SIZE
+from app.db.models.merchant_rule import MerchantRule
+from app.db.models.transaction import Transaction
+from app.services import analytics_service, budget_service
+from app.utils.aho_corasick import Automaton
+
+# Built-in dictionary; MERCHANT_DICTIONARY_PATH replaces it with a JSON file of the same shape
+DEFAULT_DICTIONARY = [
+    {"merchant": "Amazon", "category": "Shopping", "aliases": ["AMZN", "AMZN MKTP", "AMAZON PAY", "AMAZON IN"]},
+    {"merchant": "Amazon Prime Video", "category": "Entertainment", "aliases": ["PRIME VIDEO", "AMAZON PRIME"]},
+    {"merchant": "Flipkart", "category": "Shopping", "aliases": ["FLIPKART INTERNET", "FKRT"]},
+    {"merchant": "Myntra", "category": "Shopping", "aliases": ["MYNTRA DESIGNS"]},
+    {"merchant": "Swiggy", "category": "Food & Dining", "aliases": ["BUNDL TECHNOLOGIES", "SWIGGY INSTAMART"]},
+    {"merchant": "Zomato", "category": "Food & Dining", "aliases": ["ZOMATO MEDIA", "ZOMATO LTD"]},
+    {"merchant": "Starbucks", "category": "Food & Dining", "aliases": ["STARBUCKS COFFEE", "TATA STARBUCKS"]},
+    {"merchant": "BigBasket", "category": "Food & Dining", "aliases": ["BIG BASKET", "SUPERMARKET GROCERY SUPPLIES"]},
+    {"merchant": "Blinkit", "category": "Food & Dining", "aliases": ["GROFERS"]},
+    {"merchant": "Zepto", "category": "Food & Dining", "aliases": ["KIRANAKART"]},
+    {"merchant": "DMart", "category": "Food & Dining", "aliases": ["D MART", "AVENUE SUPERMARTS"]},
+    {"merchant": "Reliance Fresh", "category": "Food & Dining", "aliases": ["RELIANCE RETAIL"]},
+    {"merchant": "Big Bazaar", "category": "Food & Dining", "aliases": ["BIGBAZAAR"]},
+    {"merchant": "Uber", "category": "Transportation", "aliases": ["UBER INDIA", "UBER TRIP"]},
+    {"merchant": "Ola", "category": "Transportation", "aliases": ["OLACABS", "OLA CABS", "ANI TECHNOLOGIES"]},
+    {"merchant": "Rapido", "category": "Transportation", "aliases": ["ROPPEN TRANSPORTATION"]},
+    {"merchant": "Indian Oil", "category": "Transportation", "aliases": ["IOCL", "INDIANOIL"]},
+    {"merchant": "HP Petrol", "category": "Transportation", "aliases": ["HPCL", "HINDUSTAN PETROLEUM"]},
+    {"merchant": "Bharat Petroleum", "category": "Transportation", "aliases": ["BPCL"]},
+    {"merchant": "IRCTC", "category": "Travel", "aliases": ["IRCTC WEB"]},
+    {"merchant": "MakeMyTrip", "category": "Travel", "aliases": ["MAKEMYTRIP", "MMT"]},
+    {"merchant": "Netflix", "category": "Entertainment", "aliases": ["NETFLIX COM"]},
+    {"merchant": "Spotify", "category": "Entertainment", "aliases": ["SPOTIFY INDIA"]},
+    {"merchant": "BookMyShow", "category": "Entertainment", "aliases": ["BOOKMYSHOW", "BIGTREE ENTERTAINMENT"]},
+    {"merchant": "Airtel", "category": "Bills & Utilities", "aliases": ["BHARTI AIRTEL"]},
+    {"merchant": "Jio", "category": "Bills & Utilities", "aliases": ["RELIANCE JIO", "JIO PREPAID"]},
+    {"merchant": "Tata Power", "category": "Bills & Utilities", "aliases": ["TATA POWER DDL"]},
+    {"merchant": "Apollo Pharmacy", "category": "Healthcare", "aliases": ["APOLLO PHARMACIES"]},
+    {"merchant": "PharmEasy", "category": "Healthcare", "aliases": ["PHARMEASY"]},
+    {"merchant": "Coursera", "category": "Education", "aliases": ["COURSERA INC"]},
+]
+
+NOISE = re.compile(r"[^0-9A-Z]+")
+
+def clean(text):
+    # Upper-cased, with punctuation and reference noise (AMZN MKTP IN*2X3) turned into single
+    # spaces, padded so every word has a space on both sides and a match is checked for whole words
+    return f" {NOISE.sub(' ', text.upper()).strip()} "
+
+def _automaton(entries):
+    """entries are (keyword, (merchant_name, category)) pairs."""
+    return Automaton((clean(keyword).strip(), value) for keyword, value in entries if clean(keyword).strip())
+
+def best_match(automaton, text):
+    """Longest keyword that is whole words of the cleaned text ("OLA" must match neither "COLA"
+    nor "OLAM", nor "UBER" "UBEREATS")."""
+    best = None
+    for start, length, value in automaton.iter(text):
+        # clean() pads the text, so both neighbours always exist
+        whole = text[start - 1] == " " and text[start + length] == " "
+        if whole and (best is None or length > best[0]):
+            best = (length, value)
+    return best[1] if best else None
+
+def load_dictionary(path=MERCHANT_DICTIONARY_PATH):
+    entries = DEFAULT_DICTIONARY
+    if path:
+        with open(path) as f:
+            entries = json.load(f)
+    return _automaton(
+        (keyword, (entry["merchant"], entry.get("category")))
+        for entry in entries
+        for keyword in [entry["merchant"], *entry.get("aliases", [])]
+    )
+
+dictionary = load_dictionary()
+
+def reload_dictionary(path=MERCHANT_DICTIONARY_PATH):
+    """Rebuild the dictionary and swap it in; matchers already handed out keep the old one."""
+    global dictionary
+    dictionary = load_dictionary(path)
+    return len(dictionary)
+
+# Per worker: rule writes through another worker are only seen here once the entry is evicted
+_user_rules = LRUCache(maxsize=MERCHANT_RULES_CACHE_SIZE)
+
+def invalidate_rules(user_id):
+    _user_rules.pop(user_id, None)
+
+async def _rules_for(db, user_id):
+    rules = _user_rules.get(user_id)
+    if rules is None:
+        rows = (await db.execute(
+            select(MerchantRule.pattern, MerchantRule.merchant_name, MerchantRule.category)
+            .filter(MerchantRule.user_id == user_id)
+        )).all()
+        rules = _automaton((pattern, (merchant_name, category)) for pattern, merchant_name, category in rows)
+        _user_rules[user_id] = rules
+    return rules
+
+class MerchantMatcher:
+    """The merchant dictionary with one user's override rules layered on top."""
+
+    def __init__(self, dictionary, rules):
+        self.dictionary = dictionary
+        self.rules = rules
+
+    def match(self, text):
+        """(merchant_name, category) for a raw merchant string; either may be None."""
+        if not text:
+            return None, None
+        text = clean(text)
+        rule_merchant, rule_category = best_match(self.rules, text) or (None, None)
+        merchant, category = best_match(self.dictionary, text) or (None, None)
+        return rule_merchant or merchant, rule_category or category
+
+    def apply(self, row, overwrite_category=False):
+        """Normalize a transaction dict in place: canonical merchant_name, category filled in if empty."""
+        merchant, category = self.match(row.get("merchant_name") or row.get("description"))
+        if merchant:
+            row["merchant_name"] = merchant
+        if category and (overwrite_category or not row.get("category")):
+            row["category"] = category
+        return row
+
+async def get_matcher(db, user_id):
+    return MerchantMatcher(dictionary, await _rules_for(db, user_id))
+
+def _renormalize_rows(matcher, rows, overwrite_category):
+    changes, before, after = [], [], []
+    for row in rows:
+        current = row._asdict()
+        normalized = matcher.apply(dict(current), overwrite_category)
+        if normalized["merchant_name"] == current["merchant_name"] and normalized["category"] == current["category"]:
+            continue
+        changes.append({
+            "id": row.id, "merchant_name": normalized["merchant_name"], "category": normalized["category"],
+            # A rule's category replacing a predicted one isn't a prediction any more
+            "category_source": current["category_source"] if normalized["category"] == current["category"] else None,
+        })
+        if normalized["category"] != current["category"]:
+            before.append(current)
+            after.append(normalized)
+    return changes, before, after
+
+async def renormalize_history(db, user_id, overwrite_category=False, batch_size=MERCHANT_RENORMALIZE_BATCH_SIZE):
+    """Re-run normalization over the user's whole ledger in one keyset pass by id.
+
+    Each batch is written with one bulk UPDATE by primary key, and category
+    moves are applied to the rollups and budget counters as deltas. The
+    caller commits."""
+    matcher = await get_matcher(db, user_id)
+    columns = (Transaction.id, Transaction.merchant_name, Transaction.description, Transaction.category,
+               Transaction.category_source, Transaction.timestamp, Transaction.type, Transaction.amount)
+    last_id = 0
+    scanned = updated = 0
+    while True:
+        rows = (await db.execute(
+            select(*columns)
+            .filter(Transaction.user_id == user_id, Transaction.id > last_id)
+            .order_by(Transaction.id)
+            .limit(batch_size)
+        )).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+        changes, before, after = await run_in_threadpool(_renormalize_rows, matcher, rows, overwrite_category)
+        if changes:
+            await db.execute(update(Transaction), changes)
+            await analytics_service.record_transactions(db, user_id, before, -1)
+            await analytics_service.record_transactions(db, user_id, after)
+            await budget_service.record_transactions(db, user_id, before, -1)
+            await budget_service.record_transactions(db, user_id, after)
+            updated += len(changes)
+    return {"scanned": scanned, "updated": updated}
@@ -0,0 +1,59 @@
+from sqlalchemy import select, insert, update, func, case
+from app.db.models.friend import Friend
+from app.db.models.message import Message
+
+# friends.unread_count is the number of a conversation's incoming (is_user False) messages not
+# yet read. Every write adjusts it in the same transaction with a relative UPDATE, so concurrent
+# writers don't overwrite each other and the friends list reads counts without a COUNT(*).
+
+def is_unread(message):
+    return message.friend_id is not None and not message.is_user and not message.is_read
+
+async def adjust_unread(db, user_id, friend_id, delta):
+    """Add delta to one conversation's counter (never below zero). Returns the friend's new
+    unread_count, or None if friend_id isn't one of the user's friends."""
+    return await db.scalar(
+        update(Friend)
+        .filter(Friend.id == friend_id, Friend.user_id == user_id)
+        .values(unread_count=case((Friend.unread_count + delta > 0, Friend.unread_count + delta), else_=0))
+        .returning(Friend.unread_count)
+    )
+
+async def mark_read(db, user_id, friend_id, up_to=None):
+    """Mark the conversation's unread messages (those at or before up_to, if given) as read.
+
+    Returns (marked, unread_count). The messages UPDATE locks the rows it
+    changes, so two concurrent calls can't both count the same message."""
+    stmt = (
+        update(Message)
+        .filter(Message.user_id == user_id, Message.friend_id == friend_id,
+                Message.is_user.is_(False), Message.is_read.is_(False))
+        .values(is_read=True)
+    )
+    if up_to is not None:
+        stmt = stmt.filter(Message.timestamp <= up_to)
+    marked = (await db.execute(stmt, execution_options={"synchronize_session": False})).rowcount
+    return marked, await adjust_unread(db, user_id, friend_id, -marked)
+
+async def rebuild_unread_counts(db, user_id=None):
+    """Recompute every friend's counter from the messages with one correlated UPDATE."""
+    unread = (
+        select(func.count())
+        .filter(Message.user_id == Friend.user_id, Message.friend_id == Friend.id,
+                Message.is_user.is_(False), Message.is_read.is_(False))
+        .scalar_subquery()
+    )
+    stmt = update(Friend).values(unread_count=unread)
+    if user_id is not None:
+        stmt = stmt.filter(Friend.user_id == user_id)
+    await db.execute(stmt, execution_options={"synchronize_session": False})
+
+async def record_chat(db, user_id, turns):
+    """Store (content, is_user, timestamp) assistant chat turns with one INSERT; returns their ids.
+
+    The caller commits."""
+    rows = [
+        {"user_id": user_id, "content": content, "is_user": is_user, "timestamp": timestamp}
+        for content, is_user, timestamp in turns
+    ]
+    return (await db.scalars(insert(Message).returning(Message.id), rows)).all()
@@ -0,0 +1,167 @@
+import math
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, delete
+from app.config.settings import (
+    NUDGE_USER_BATCH, NUDGE_UPSERT_CHUNK, NUDGE_GOAL_DAYS, NUDGE_DEBT_DAYS, NUDGE_SUBSCRIPTION_DAYS,
+)
+from app.db.models.budget import Budget
+from app.db.models.debt import Debt, DebtStatus
+from app.db.models.friend import Friend
+from app.db.models.goal import Goal
+from app.db.models.nudge import Nudge, NudgeStatus
+from app.db.models.subscription import Subscription, SubscriptionStatus
+from app.db.models.user import User
+from app.db.schemas.nudge import Nudge as NudgeSchema
+from app.services import budget_service
+from app.services.analytics_service import _insert_for
+from app.utils.push import push
+
+# The rules below mirror what the frontend used to compute in the browser (AppContext.generateNudges).
+# Every nudge has a dedupe key naming what it is about, so reruns update rather than duplicate it.
+
+def _nudge(user_id, key, type, content, priority, action_link):
+    return {"user_id": user_id, "dedupe_key": key, "type": type, "content": content,
+            "priority": priority, "action_link": action_link}
+
+def budget_nudges(rows):
+    """rows are (Budget, spent) for budgets active today."""
+    for budget, spent in rows:
+        if not budget.amount:
+            continue
+        percentage = spent / budget.amount * 100
+        if percentage >= 100:
+            yield _nudge(budget.user_id, f"budget:{budget.id}:exceeded", "budget",
+                         f"You've exceeded your {budget.category} budget by ₹{spent - budget.amount:,.0f}",
+                         "high", "/budgets")
+        elif percentage >= 80:
+            yield _nudge(budget.user_id, f"budget:{budget.id}:80", "budget",
+                         f"You're {percentage:.0f}% through your {budget.category} budget for this month!",
+                         "medium", "/budgets")
+
+def goal_nudges(goals, today):
+    for goal in goals:
+        days_left = (goal.target_date - today).days
+        if days_left <= 0 or goal.current_amount >= goal.target_amount * 0.8:
+            continue
+        daily = math.ceil((goal.target_amount - goal.current_amount) / days_left)
+        yield _nudge(goal.user_id, f"goal:{goal.id}:{goal.target_date}", "goal",
+                     f'Only {days_left} days left for "{goal.name}"! Consider saving ₹{daily:,} daily.',
+                     "high", "/goals")
+
+def debt_nudges(rows, today):
+    """rows are (Debt, friend name or None) for pending debts due soon or overdue."""
+    for debt, friend_name in rows:
+        days_left = (debt.due_date - today).days
+        whom = f" to {friend_name}" if friend_name else ""
+        when = f"is due in {days_left} days" if days_left > 0 else "is due today" if days_left == 0 \
+            else f"was due {-days_left} days ago"
+        yield _nudge(debt.user_id, f"debt:{debt.id}:{debt.due_date}", "debt",
+                     f"Reminder: ₹{debt.amount:,.0f}{whom} {when}", "high", "/debts")
+
+def subscription_nudges(subscriptions, today):
+    for subscription in subscriptions:
+        days_left = (subscription.next_due_date - today).days
+        when = f"in {days_left} days" if days_left > 0 else "today"
+        yield _nudge(subscription.user_id, f"subscription:{subscription.id}:{subscription.next_due_date}",
+                     "subscription", f"{subscription.name} renews {when} (₹{subscription.amount:,.0f})",
+                     "medium", "/subscriptions")
+
+async def _collect(db, user_ids, today):
+    budgets = (await db.execute(
+        budget_service.utilization_query(db, today).filter(Budget.user_id.in_(user_ids))
+    )).all()
+    goals = (await db.scalars(
+        select(Goal).filter(Goal.user_id.in_(user_ids), Goal.target_date > today,
+                            Goal.target_date <= today + timedelta(days=NUDGE_GOAL_DAYS))
+    )).all()
+    debts = (await db.execute(
+        select(Debt, Friend.name)
+        .outerjoin(Friend, Friend.id == Debt.friend_id)
+        .filter(Debt.user_id.in_(user_ids), Debt.status == DebtStatus.pending,
+                Debt.due_date <= today + timedelta(days=NUDGE_DEBT_DAYS))
+    )).all()
+    subscriptions = (await db.scalars(
+        select(Subscription).filter(
+            Subscription.user_id.in_(user_ids), Subscription.status == SubscriptionStatus.active,
+            Subscription.next_due_date.between(today, today + timedelta(days=NUDGE_SUBSCRIPTION_DAYS)),
+        )
+    )).all()
+    return [
+        *budget_nudges(budgets),
+        *goal_nudges(goals, today),
+        *debt_nudges(debts, today),
+        *subscription_nudges(subscriptions, today),
+    ]
+
+async def generate_nudges(db, user_ids, today=None):
+    """Recompute the generated nudges of user_ids: a few set-based reads, then a bulk upsert.
+
+    A nudge that already exists keeps its status (a dismissed one stays
+    dismissed) and gets fresh content. Active generated nudges that this run
+    didn't produce are deleted, since their condition no longer holds. The
+    caller commits. Returns how many nudges were upserted."""
+    run_at = datetime.now(timezone.utc)
+    # The UTC day, as due dates and dedupe keys are compared by the (UTC-scheduled) job
+    today = today or run_at.date()
+    nudges = await _collect(db, user_ids, today)
+    stmt = _insert_for(db)(Nudge)
+    # One statement, executed for every row (pipelined by the driver) instead of a multi-row VALUES
+    # that SQLAlchemy would have to recompile for every chunk size
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Nudge.user_id, Nudge.dedupe_key],
+        set_={
+            "type": stmt.excluded.type,
+            "content": stmt.excluded.content,
+            "priority": stmt.excluded.priority,
+            "action_link": stmt.excluded.action_link,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    for start in range(0, len(nudges), NUDGE_UPSERT_CHUNK):
+        chunk = [{**nudge, "status": NudgeStatus.active, "updated_at": run_at}
+                 for nudge in nudges[start:start + NUDGE_UPSERT_CHUNK]]
+        await db.execute(stmt, chunk)
+    await db.execute(delete(Nudge).filter(
+        Nudge.user_id.in_(user_ids), Nudge.dedupe_key.is_not(None), Nudge.status == NudgeStatus.active,
+        Nudge.updated_at < run_at,
+    ))
+    return len(nudges)
+
+async def _dedupe_keys(db, user_ids):
+    return set((await db.execute(
+        select(Nudge.user_id, Nudge.dedupe_key)
+        .filter(Nudge.user_id.in_(user_ids), Nudge.dedupe_key.is_not(None))
+    )).all())
+
+async def publish_new(db, user_ids, before):
+    """Push the generated nudges of user_ids whose (user_id, dedupe_key) isn't in `before`.
+
+    Only new nudges are pushed: a rerun that merely refreshes content
+    shouldn't ping every connected client again."""
+    rows = (await db.scalars(
+        select(Nudge).filter(Nudge.user_id.in_(user_ids), Nudge.dedupe_key.is_not(None),
+                             Nudge.status == NudgeStatus.active)
+    )).all()
+    for nudge in rows:
+        if (nudge.user_id, nudge.dedupe_key) not in before:
+            await push.publish(nudge.user_id, "notification", NudgeSchema.model_validate(nudge).model_dump(mode="json"))
+
+async def generate_all(db, batch_size=NUDGE_USER_BATCH, today=None):
+    """Nudge job over every user, keyset-paginated by id with one commit per batch.
+
+    Nudges a batch creates are pushed to their users once it commits."""
+    last_id = 0
+    users = nudges = 0
+    while True:
+        user_ids = (await db.scalars(
+            select(User.id).filter(User.id > last_id).order_by(User.id).limit(batch_size)
+        )).all()
+        if not user_ids:
+            break
+        last_id = user_ids[-1]
+        before = await _dedupe_keys(db, user_ids)
+        nudges += await generate_nudges(db, user_ids, today)
+        await db.commit()
+        await publish_new(db, user_ids, before)
+        users += len(user_ids)
+    return {"users": users, "nudges": nudges}
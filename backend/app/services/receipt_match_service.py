@@ -0,0 +1,157 @@
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+from sqlalchemy import DateTime, Float, Integer, and_, column, select, values
+from app.config.settings import (
+    RECEIPT_MATCH_DAYS, RECEIPT_MATCH_AMOUNT_TOLERANCE, RECEIPT_MATCH_MIN_SCORE, RECEIPT_MATCH_BATCH_SIZE,
+)
+from app.db.models.receipt import Receipt
+from app.db.models.transaction import Transaction, TransactionType
+from app.services import analytics_service, budget_service, categorizer_service, merchant_service
+from app.services.merchant_service import clean
+from app.utils.cache import response_cache
+
+# Weights of the merchant, amount and date closeness (each 0 to 1) in a match's score. Merchant
+# counts most: in a busy month plenty of unrelated spends share an amount band and a few days
+MERCHANT_WEIGHT, AMOUNT_WEIGHT, DATE_WEIGHT = 0.5, 0.3, 0.2
+
+# A ledger has few distinct merchant names, and a month's candidates repeat them
+@lru_cache(maxsize=4096)
+def trigrams(text):
+    text = clean(text)
+    return frozenset(text[i:i + 3] for i in range(len(text) - 2))
+
+def merchant_similarity(a, b):
+    """Dice coefficient of two merchant names' character trigrams, so "SHREE GANESH GEN STORE"
+    is close to "Shree Ganesh Stores"; 0.5, no evidence either way, when a name is missing."""
+    a, b = trigrams(a or ""), trigrams(b or "")
+    if not a or not b:
+        return 0.5
+    return 2 * len(a & b) / (len(a) + len(b))
+
+def amount_tolerance(amount, fraction=RECEIPT_MATCH_AMOUNT_TOLERANCE):
+    return max(1.0, abs(amount) * fraction)
+
+def purchase_day(receipt):
+    # Receipts whose date couldn't be read count as bought the day they were uploaded
+    return receipt.receipt_date or receipt.created_at.astimezone(timezone.utc).date()
+
+def score(merchant, amount, day, transaction, days=RECEIPT_MATCH_DAYS, fraction=RECEIPT_MATCH_AMOUNT_TOLERANCE):
+    """How well an expense (anything with amount, timestamp, merchant_name and description) fits a
+    receipt's merchant, total and purchase day, 0 to 1."""
+    # Halved every eighth of the tolerance: a charge is nearly always the receipt's total to the paisa,
+    # so an exact amount outweighs a day's difference
+    off = abs(transaction.amount - amount) / amount_tolerance(amount, fraction)
+    amount_score = 0.5 ** (8 * off) if off < 1 else 0.0
+    days_apart = abs((transaction.timestamp.astimezone(timezone.utc).date() - day).days)
+    date_score = 1 - min(1.0, days_apart / (days + 1))
+    merchant_score = merchant_similarity(merchant, transaction.merchant_name or transaction.description)
+    return MERCHANT_WEIGHT * merchant_score + AMOUNT_WEIGHT * amount_score + DATE_WEIGHT * date_score
+
+def candidates_query(user_id, receipts, days=RECEIPT_MATCH_DAYS, fraction=RECEIPT_MATCH_AMOUNT_TOLERANCE):
+    """(receipt id, expense) rows for the user's expenses no receipt is attached to, within each
+    receipt's amount band and date window, in one query.
+
+    The receipts' bands and windows are a VALUES list joined to transactions,
+    so each receipt is one range scan of ix_transactions_user_id_amount_timestamp
+    however long the ledger is."""
+    wanted = values(
+        column("receipt_id", Integer), column("low", Float), column("high", Float),
+        column("start", DateTime(timezone=True)), column("end", DateTime(timezone=True)), name="wanted",
+    ).data([
+        (receipt.id, receipt.amount - amount_tolerance(receipt.amount, fraction),
+         receipt.amount + amount_tolerance(receipt.amount, fraction),
+         datetime.combine(purchase_day(receipt) - timedelta(days=days), time.min, timezone.utc),
+         datetime.combine(purchase_day(receipt) + timedelta(days=days + 1), time.min, timezone.utc))
+        for receipt in receipts
+    ])
+    return (
+        select(wanted.c.receipt_id, Transaction.id, Transaction.amount, Transaction.timestamp,
+               Transaction.merchant_name, Transaction.description)
+        .select_from(wanted)
+        .join(Transaction, and_(
+            Transaction.user_id == user_id,
+            Transaction.amount.between(wanted.c.low, wanted.c.high),
+            Transaction.timestamp >= wanted.c.start, Transaction.timestamp < wanted.c.end,
+        ))
+        .filter(Transaction.type == TransactionType.expense,
+                ~select(Receipt.id).filter(Receipt.transaction_id == Transaction.id).exists())
+    )
+
+async def match(db, user_id, receipts, days=RECEIPT_MATCH_DAYS, fraction=RECEIPT_MATCH_AMOUNT_TOLERANCE,
+                min_score=RECEIPT_MATCH_MIN_SCORE, batch_size=RECEIPT_MATCH_BATCH_SIZE):
+    """{receipt id: (transaction id, score)} for the receipts (with an amount) that fit one of the
+    user's unclaimed expenses.
+
+    All pairs scoring min_score or more are taken best first, so each
+    receipt gets at most one expense and each expense at most one receipt,
+    and a batch (a month of receipts) is matched jointly rather than in
+    upload order."""
+    receipts = [receipt for receipt in receipts if receipt.amount]
+    if not receipts:
+        return {}
+    matcher = await merchant_service.get_matcher(db, user_id)
+    by_id = {
+        # Imported expenses carry the canonical merchant name, so the receipt's is normalized too
+        receipt.id: (matcher.match(receipt.merchant_name)[0] or receipt.merchant_name, receipt.amount,
+                     purchase_day(receipt))
+        for receipt in receipts
+    }
+    pairs = []
+    for start in range(0, len(receipts), batch_size):
+        query = candidates_query(user_id, receipts[start:start + batch_size], days, fraction)
+        for row in (await db.execute(query)).all():
+            fit = score(*by_id[row.receipt_id], row, days, fraction)
+            if fit >= min_score:
+                pairs.append((-fit, row.receipt_id, row.id))
+    matches, taken = {}, set()
+    for fit, receipt_id, transaction_id in sorted(pairs):
+        if receipt_id not in matches and transaction_id not in taken:
+            matches[receipt_id] = (transaction_id, round(-fit, 4))
+            taken.add(transaction_id)
+    return matches
+
+def receipt_transaction(user_id, receipt):
+    return {
+        "user_id": user_id,
+        "amount": receipt.amount,
+        "description": receipt.merchant_name,
+        "merchant_name": receipt.merchant_name,
+        "type": TransactionType.expense,
+        "timestamp": datetime.combine(purchase_day(receipt), time.min, timezone.utc),
+    }
+
+async def attach(db, user_id, receipts, create=True, **options):
+    """Attach each read receipt with no expense yet to the imported expense it matches (see
+    match), and with create, record the rest as new expenses; then commit.
+
+    Returns counts of receipts matched, created, left unmatched (create off) and skipped (no
+    amount read)."""
+    receipts = [receipt for receipt in receipts if receipt.transaction_id is None]
+    matches = await match(db, user_id, receipts, **options)
+    for receipt in receipts:
+        if receipt.id in matches:
+            receipt.transaction_id, receipt.match_score = matches[receipt.id]
+    unmatched = [receipt for receipt in receipts if receipt.amount and receipt.id not in matches]
+    rows = []
+    if create and unmatched:
+        matcher = await merchant_service.get_matcher(db, user_id)
+        model = await categorizer_service.get_model(db, user_id)
+        rows = [matcher.apply(receipt_transaction(user_id, receipt)) for receipt in unmatched]
+        categorizer_service.categorize(model, rows)
+        await analytics_service.record_transactions(db, user_id, rows)
+        await budget_service.record_transactions(db, user_id, rows)
+        transactions = [Transaction(**row) for row in rows]
+        db.add_all(transactions)
+        await db.flush()
+        for receipt, transaction in zip(unmatched, transactions):
+            receipt.transaction_id = transaction.id
+    await db.commit()
+    if rows:
+        await response_cache.invalidate_user(user_id)
+        categorizer_service.learn(user_id, rows)
+    return {
+        "matched": len(matches),
+        "created": len(rows),
+        "unmatched": len(unmatched) - len(rows),
+        "skipped": sum(1 for receipt in receipts if not receipt.amount),
+    }
@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from cachetools import LRUCache
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import (
+    RECEIPT_WORKERS, RECEIPT_QUEUE_SIZE, OCR_BACKEND, RECEIPT_STORE_DIR, RECEIPT_THUMBNAIL_SIZE,
+    RECEIPT_DUPLICATE_DISTANCE, RECEIPT_HASH_CACHE_SIZE,
+)
+from app.db.database import new_async_session
+from app.db.models.receipt import Receipt, ReceiptStatus
+from app.db.schemas.receipt import Receipt as ReceiptSchema
+from app.services import receipt_match_service
+from app.utils import ocr
+from app.utils.images import HASH_SIZE, HammingIndex, image_hash, thumbnail
+from app.utils.push import push
+
+logger = logging.getLogger(__name__)
+
+def stored_path(sha256, store_dir=RECEIPT_STORE_DIR):
+    return os.path.join(store_dir, sha256[:2], sha256)
+
+def thumbnail_path(sha256, store_dir=RECEIPT_STORE_DIR):
+    return f"{stored_path(sha256, store_dir)}.thumb.jpg"
+
+def store(spooled, sha256, store_dir=RECEIPT_STORE_DIR):
+    """Move a spooled upload to its content address; bytes already stored (by anyone) are dropped."""
+    path = stored_path(sha256, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(spooled)
+    else:
+        os.replace(spooled, path)
+    return path
+
+class HashIndex:
+    """One user's receipt hashes, and the last receipt id it has taken in."""
+
+    def __init__(self):
+        self.hashes = HammingIndex()
+        self.last_id = 0
+
+# Per worker; each lookup first adds receipts stored since (by any worker), one small indexed read
+_hash_indexes = LRUCache(maxsize=RECEIPT_HASH_CACHE_SIZE)
+
+async def similar_receipt(db, user_id, phash, max_distance=RECEIPT_DUPLICATE_DISTANCE):
+    """(receipt id, distance) of the user's receipt whose image hash is nearest phash, if within
+    max_distance bits."""
+    index = _hash_indexes.get(user_id)
+    if index is None:
+        index = _hash_indexes[user_id] = HashIndex()
+    rows = (await db.execute(
+        select(Receipt.id, Receipt.phash)
+        .filter(Receipt.user_id == user_id, Receipt.id > index.last_id, Receipt.phash.is_not(None))
+        .order_by(Receipt.id)
+    )).all()
+    for receipt_id, phash_hex in rows:
+        if receipt_id > index.last_id:
+            index.hashes.add(int(phash_hex, 16), receipt_id)
+            index.last_id = receipt_id
+    matches = index.hashes.search(phash, max_distance)
+    return (matches[0][1], matches[0][0]) if matches else None
+
+async def _exact(db, user_id, sha256):
+    return await db.scalar(
+        select(Receipt).filter(Receipt.user_id == user_id, Receipt.sha256 == sha256).order_by(Receipt.id).limit(1)
+    )
+
+async def accept(db, user_id, upload):
+    """Turn a spooled upload (from spool_file) into a stored, queued receipt, unless the user
+    already has those exact bytes.
+
+    Returns (receipt, duplicate, distance). duplicate is None for a new
+    receipt; "exact" (same SHA-256) with the earlier receipt, which is then
+    not queued; or "similar" (perceptual hash within RECEIPT_DUPLICATE_DISTANCE
+    bits of duplicate_of's) with a new receipt, stored and queued like any
+    other, since a look-alike isn't proof of a repeat. The spooled file is
+    gone either way."""
+    existing = await _exact(db, user_id, upload["sha256"])
+    if existing:
+        os.remove(upload["path"])
+        return existing, "exact", 0
+    phash = await run_in_threadpool(image_hash, upload["path"])
+    match = await similar_receipt(db, user_id, phash) if phash is not None else None
+    await run_in_threadpool(store, upload["path"], upload["sha256"])
+    receipt = Receipt(
+        user_id=user_id, filename=upload["filename"], content_type=upload["content_type"], size=upload["size"],
+        sha256=upload["sha256"], phash=None if phash is None else f"{phash:0{HASH_SIZE * HASH_SIZE // 4}x}",
+        duplicate_of=match[0] if match else None,
+    )
+    db.add(receipt)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # The same bytes uploaded concurrently (a double tap, a client retry) and committed first;
+        # the stored file is theirs too
+        await db.rollback()
+        return await _exact(db, user_id, upload["sha256"]), "exact", 0
+    await db.refresh(receipt)
+    return receipt, ("similar" if match else None), (match[1] if match else None)
+
+async def _attach(db, user_id, receipt):
+    original = await db.get(Receipt, receipt.duplicate_of) if receipt.duplicate_of else None
+    if original and (original.amount, original.receipt_date) == (receipt.amount, receipt.receipt_date):
+        # A re-photo after all: it's for the original's expense, not a second one
+        receipt.transaction_id = original.transaction_id
+        await db.commit()
+    else:
+        # The imported expense it's for, or a new one
+        await receipt_match_service.attach(db, user_id, [receipt])
+
+async def _save(receipt_id, user_id, values):
+    """Store a job's outcome on the receipt, attached to its expense in the same commit, so a
+    receipt reads as done only once it's attached."""
+    async with new_async_session() as db:
+        receipt = await db.get(Receipt, receipt_id)
+        for name, value in values.items():
+            setattr(receipt, name, value)
+        if receipt.status == ReceiptStatus.done:
+            try:
+                await _attach(db, user_id, receipt)
+            except Exception:
+                # Saved read but unattached; POST /receipts/match retries it
+                logger.exception("Attaching receipt %s failed", receipt_id)
+                await db.rollback()
+                receipt = await db.get(Receipt, receipt_id)
+                for name, value in values.items():
+                    setattr(receipt, name, value)
+        await db.commit()
+        await db.refresh(receipt)
+        return receipt
+
+async def _fail(receipt_id, error):
+    """Mark a receipt failed when its outcome couldn't be saved, so it isn't left queued; None if
+    that fails too."""
+    try:
+        async with new_async_session() as db:
+            receipt = await db.get(Receipt, receipt_id)
+            receipt.status = ReceiptStatus.failed
+            receipt.error = error
+            receipt.processed_at = datetime.now(timezone.utc)
+            await db.commit()
+            await db.refresh(receipt)
+            return receipt
+    except Exception:
+        logger.exception("Could not mark receipt %s failed either", receipt_id)
+        return None
+
+class ReceiptPipeline:
+    """This app worker's OCR jobs, run in a pool of worker processes.
+
+    At most queue_size jobs are in flight (uploading, waiting for a process
+    or running); reserve() refuses past that, and the upload endpoint turns
+    the refusal into 429 before reading the body."""
+
+    def __init__(self, workers=RECEIPT_WORKERS, queue_size=RECEIPT_QUEUE_SIZE, backend=OCR_BACKEND):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.backend = backend
+        self.executor = None
+        self.in_flight = 0
+        self.tasks = set()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queued_seconds = 0.0
+        self.ocr_seconds = 0.0
+        # Completion times (monotonic) for the recent throughput
+        self.finished = deque(maxlen=10000)
+
+    def reserve(self):
+        if self.in_flight >= self.queue_size:
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+    def retry_after(self):
+        """Seconds until a slot is likely free: one round of the jobs ahead, at least 1."""
+        per_job = self.ocr_seconds / self.completed if self.completed else 1.0
+        return max(1, math.ceil(per_job * self.in_flight / self.workers))
+
+    def submit(self, receipt_id, user_id, sha256):
+        """OCR and thumbnail the stored image for a reserved slot, then store the fields on the
+        receipt, attach it to its expense and push a "receipt" event to the user."""
+        task = asyncio.get_running_loop().create_task(self._run(receipt_id, user_id, sha256))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def _run(self, receipt_id, user_id, sha256):
+        self.submitted += 1
+        queued_at = time.time()
+        loop = asyncio.get_running_loop()
+        try:
+            if self.executor is None:
+                # spawn: workers don't inherit the app's threads, event loop or pooled connections
+                self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            result = await loop.run_in_executor(self.executor, ocr.extract, stored_path(sha256), self.backend)
+            values = {
+                "status": ReceiptStatus.done, "merchant_name": result["merchant_name"], "amount": result["amount"],
+                "receipt_date": result["receipt_date"], "text": result["text"],
+                "queued_seconds": max(0.0, result["started_at"] - queued_at), "ocr_seconds": result["seconds"],
+            }
+            self.completed += 1
+            self.queued_seconds += values["queued_seconds"]
+            self.ocr_seconds += values["ocr_seconds"]
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # A worker died (out of memory, a crashing decoder); start a fresh pool for the next job
+                self.executor = None
+            logger.warning("Reading receipt %s failed: %s: %s", receipt_id, type(e).__name__, e)
+            values = {"status": ReceiptStatus.failed, "error": f"{type(e).__name__}: {e}"}
+            self.failed += 1
+        try:
+            if self.executor is not None:
+                # In the same slot as the OCR, so in_flight is the pool's real load
+                await loop.run_in_executor(
+                    self.executor, thumbnail, stored_path(sha256), thumbnail_path(sha256), RECEIPT_THUMBNAIL_SIZE
+                )
+        except Exception as e:
+            # A missing thumbnail (not an image, no Pillow) only means GET .../thumbnail is 404
+            if isinstance(e, BrokenProcessPool):
+                self.executor = None
+            logger.warning("Thumbnailing receipt %s failed: %s: %s", receipt_id, type(e).__name__, e)
+        finally:
+            self.release()
+            self.finished.append(time.monotonic())
+        values["processed_at"] = datetime.now(timezone.utc)
+        try:
+            receipt = await _save(receipt_id, user_id, values)
+        except Exception as e:
+            logger.exception("Saving receipt %s failed", receipt_id)
+            receipt = await _fail(receipt_id, f"{type(e).__name__}: {e}")
+            if receipt is None:
+                return
+        try:
+            await push.publish(user_id, "receipt", ReceiptSchema.model_validate(receipt).model_dump(mode="json"))
+        except Exception:
+            # The receipt is saved either way; the client sees it on its next GET
+            logger.exception("Pushing receipt %s failed", receipt_id)
+
+    async def stop(self):
+        # Let accepted jobs finish so none is left queued forever
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def stats(self):
+        now = time.monotonic()
+        last_minute = sum(1 for finished in self.finished if now - finished <= 60)
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "waiting": max(0, self.in_flight - self.workers),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "finished_last_minute": last_minute,
+            "avg_queued_seconds": round(self.queued_seconds / self.completed, 4) if self.completed else None,
+            "avg_ocr_seconds": round(self.ocr_seconds / self.completed, 4) if self.completed else None,
+        }
+
+pipeline = ReceiptPipeline()
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+import zlib
+from functools import lru_cache
+import numpy as np
+from cachetools import LRUCache
+from sqlalchemy import select, func, literal, union_all
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import RAG_INDEX_DIR, RAG_DIMENSIONS, RAG_MAX_TRANSACTIONS, RAG_TOP_K, RAG_CACHE_SIZE
+from app.db.models.budget import Budget
+from app.db.models.debt import Debt
+from app.db.models.friend import Friend
+from app.db.models.goal import Goal
+from app.db.models.monthly_rollup import MonthlyRollup
+from app.db.models.transaction import Transaction
+
+# Stored vectors are int8: a component v in [-1, 1] is kept as round(v * SCALE)
+SCALE = 127
+# Rows scored per matrix product; a chunk converted to float32 (8 MiB at 512 dimensions) stays in cache
+SEARCH_CHUNK = 4096
+# Cosine similarity below which a record isn't worth showing: a short record sharing a single
+# colliding hash with the question can score ~0.15
+MIN_SCORE = 0.15
+# ...and, once something matches well, records scoring under this share of the best are dropped
+MIN_RELATIVE_SCORE = 0.6
+# Age past which a build removes other versions' index files (and abandoned temporary files);
+# any reader has long since mapped them by then
+STALE_SECONDS = 300
+
+WORD = re.compile(r"[a-z0-9]+")
+# Question words that would otherwise match every record ("on 5 May", "of ₹200")
+STOPWORDS = frozenset(
+    "a an and are at did do does for from how i in is it me much my of on or spend spent the to "
+    "was what when where which who with".split()
+)
+
+def words(text):
+    return [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+
+@lru_cache(maxsize=200000)
+def word_features(word, dim):
+    """(columns, signed weights) of a word: the word itself (weight 1) and its character
+    trigrams (weight 0.5 each), so "groceries" still matches "grocery".
+
+    Each feature's CRC32 picks a column and, from its top bit, a sign, so
+    collisions tend to cancel instead of piling up."""
+    features = [(word, 1.0)]
+    if not word.isdigit():
+        # Numbers only match exactly: "764" shouldn't resemble "1,764"
+        padded = f"#{word}#"
+        features += [(padded[i:i + 3], 0.5) for i in range(len(padded) - 2)]
+    columns, weights = [], []
+    for feature, weight in features:
+        h = zlib.crc32(feature.encode())
+        columns.append(h % dim)
+        weights.append(weight if h >> 31 else -weight)
+    return columns, weights
+
+def embed(texts, dim=RAG_DIMENSIONS):
+    """L2-normalized feature-hashing vectors, one float32 row per text; counts are log-scaled."""
+    rows, columns, weights = [], [], []
+    for row, text in enumerate(texts):
+        for word in words(text):
+            word_columns, word_weights = word_features(word, dim)
+            rows.extend([row] * len(word_columns))
+            columns.extend(word_columns)
+            weights.extend(word_weights)
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    np.add.at(vectors, (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64)), weights)
+    vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+def quantize(vectors):
+    # A quarter of float32's size; cosine scores move by well under 0.01
+    return np.rint(vectors * SCALE).astype(np.int8)
+
+def top_k(vectors, queries, k):
+    """(indices, scores) of the k best rows of quantized vectors for each query, best first.
+
+    vectors may be a memory map; it's scored SEARCH_CHUNK rows at a time with
+    one matrix product per chunk, keeping only each chunk's k best."""
+    queries = np.asarray(queries, dtype=np.float32) / SCALE
+    best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+    best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+    for start in range(0, len(vectors), SEARCH_CHUNK):
+        scores = queries @ np.asarray(vectors[start:start + SEARCH_CHUNK], dtype=np.float32).T
+        if scores.shape[1] > k:
+            keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, keep, axis=1)
+        else:
+            keep = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        best_ids = np.concatenate([best_ids, keep + start], axis=1)
+        best_scores = np.concatenate([best_scores, scores], axis=1)
+    order = np.argsort(-best_scores, axis=1)[:, :k]
+    return np.take_along_axis(best_ids, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+def _day(value):
+    return f"{value.day} {value:%B %Y}" if value else "no date"
+
+def _amount(value):
+    return f"₹{value:,.2f}"
+
+def transaction_text(t):
+    where = f" at {t.merchant_name}" if t.merchant_name else ""
+    text = f"{t.type.value.capitalize()} of {_amount(t.amount)}{where} on {_day(t.timestamp)}"
+    if t.category:
+        text += f", category {t.category}"
+    if t.description and t.description != t.merchant_name:
+        text += f": {t.description}"
+    return text
+
+def budget_text(b):
+    return (f"Budget of {_amount(b.amount)} ({b.period}) for {b.category} "
+            f"from {_day(b.start_date)} to {_day(b.end_date)}")
+
+def goal_text(g):
+    return (f"Savings goal \"{g.name}\": {_amount(g.current_amount)} saved of {_amount(g.target_amount)}, "
+            f"target date {_day(g.target_date)}")
+
+def debt_text(d, friend_name):
+    whom = f" with {friend_name}" if friend_name else ""
+    text = f"Debt of {_amount(d.amount)}{whom}, {d.status.value}, due {_day(d.due_date)}"
+    return f"{text}: {d.description}" if d.description else text
+
+async def fingerprint(db, user_id):
+    """Changes whenever the user's indexed records change.
+
+    Transactions are tracked through their monthly rollups (count, total and
+    last update), which every ledger write touches, so this stays a few
+    small index reads however long the ledger is. An edit that only changes
+    a description or merchant is picked up with the next ledger change."""
+    parts = [
+        select(literal(model.__tablename__), func.count(), func.max(model.id),
+               func.max(func.coalesce(model.updated_at, model.created_at)))
+        .filter(model.user_id == user_id)
+        for model in (Budget, Goal, Debt, Friend)
+    ]
+    parts.append(
+        select(literal(MonthlyRollup.__tablename__), func.sum(MonthlyRollup.count), func.sum(MonthlyRollup.total),
+               func.max(func.coalesce(MonthlyRollup.updated_at, MonthlyRollup.created_at)))
+        .filter(MonthlyRollup.user_id == user_id)
+    )
+    rows = (await db.execute(union_all(*parts))).all()
+    state = json.dumps([list(row) for row in sorted(rows)] + [RAG_DIMENSIONS], default=str)
+    return hashlib.sha1(state.encode()).hexdigest()[:16]
+
+async def documents(db, user_id, max_transactions=RAG_MAX_TRANSACTIONS):
+    """(kind, id, text) for the user's most recent transactions and all budgets, goals and debts."""
+    transactions = (await db.scalars(
+        select(Transaction).filter(Transaction.user_id == user_id)
+        .order_by(Transaction.timestamp.desc()).limit(max_transactions)
+    )).all()
+    budgets = (await db.scalars(select(Budget).filter(Budget.user_id == user_id))).all()
+    goals = (await db.scalars(select(Goal).filter(Goal.user_id == user_id))).all()
+    debts = (await db.execute(
+        select(Debt, Friend.name).outerjoin(Friend, Friend.id == Debt.friend_id).filter(Debt.user_id == user_id)
+    )).all()
+    return [
+        *(("budget", b.id, budget_text(b)) for b in budgets),
+        *(("goal", g.id, goal_text(g)) for g in goals),
+        *(("debt", d.id, debt_text(d, name)) for d, name in debts),
+        *(("transaction", t.id, transaction_text(t)) for t in transactions),
+    ]
+
+class UserIndex:
+    """One user's records and their embedding matrix (usually a read-only memory map)."""
+
+    def __init__(self, key, documents, vectors):
+        self.key = key
+        self.documents = documents
+        self.vectors = vectors
+
+    def search(self, query, k=RAG_TOP_K, min_score=MIN_SCORE):
+        if not self.documents:
+            return []
+        ids, scores = top_k(self.vectors, embed([query], self.vectors.shape[1]), k)
+        min_score = max(min_score, float(scores[0, 0]) * MIN_RELATIVE_SCORE)
+        return [
+            {"kind": self.documents[i][0], "id": self.documents[i][1], "text": self.documents[i][2],
+             "score": round(float(score), 3)}
+            for i, score in zip(ids[0], scores[0]) if score >= min_score
+        ]
+
+def _paths(user_id, key, index_dir):
+    base = os.path.join(index_dir, str(user_id), key)
+    return f"{base}.npy", f"{base}.json"
+
+def load(user_id, key, index_dir=RAG_INDEX_DIR):
+    vectors_path, documents_path = _paths(user_id, key, index_dir)
+    # The documents file is written last, so its presence means the pair is complete
+    try:
+        with open(documents_path) as f:
+            records = [tuple(document) for document in json.load(f)]
+        return UserIndex(key, records, np.load(vectors_path, mmap_mode="r"))
+    except FileNotFoundError:
+        # Never built, or cleaned up under us by a build of another version
+        return None
+
+def build(user_id, key, records, index_dir=RAG_INDEX_DIR):
+    """Embed records and store them as the user's index for `key`, replacing older versions.
+
+    Files are named after the fingerprint and renamed into place, so other
+    workers either see a complete index or none. Other versions' files are
+    unlinked once older than STALE_SECONDS, so a version another worker has
+    just built (for a newer or older fingerprint; the names don't tell) is
+    left for its readers, and unlinking doesn't disturb a worker still
+    reading one through a mapping."""
+    directory = os.path.join(index_dir, str(user_id))
+    os.makedirs(directory, exist_ok=True)
+    vectors_path, documents_path = _paths(user_id, key, index_dir)
+    # Unique per call: two requests in one worker can build the same key at once
+    tmp = f".{uuid.uuid4().hex}.tmp"
+    np.save(f"{vectors_path}{tmp}.npy", quantize(embed([text for _, _, text in records])))
+    os.replace(f"{vectors_path}{tmp}.npy", vectors_path)
+    with open(f"{documents_path}{tmp}", "w") as f:
+        json.dump(records, f)
+    os.replace(f"{documents_path}{tmp}", documents_path)
+    stale = time.time() - STALE_SECONDS
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if not name.startswith(key) and os.path.getmtime(path) < stale:
+                os.remove(path)
+        except FileNotFoundError:
+            pass  # removed by a concurrent build
+    return load(user_id, key, index_dir)
+
+# Per worker; entries are memory maps, so the page cache (shared by workers) holds the vectors
+_indexes = LRUCache(maxsize=RAG_CACHE_SIZE)
+
+async def get_index(db, user_id):
+    """The user's current index: from this worker's cache, else from disk, else built now."""
+    key = await fingerprint(db, user_id)
+    index = _indexes.get(user_id)
+    if index is None or index.key != key:
+        index = await run_in_threadpool(load, user_id, key)
+        if index is None:
+            records = await documents(db, user_id)
+            index = await run_in_threadpool(build, user_id, key, records)
+        if index is None:
+            raise RuntimeError(f"Retrieval index {key} for user {user_id} vanished as it was built")
+        _indexes[user_id] = index
+    return index
+
+async def retrieve(db, user_id, question, k=RAG_TOP_K):
+    index = await get_index(db, user_id)
+    return await run_in_threadpool(index.search, question, k)
@@ -0,0 +1,174 @@
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# Building blocks shared by the templates below; every template is compiled once at import
+FRAGMENTS = {
+    "amount": r"(?:(?:Rs\.?|INR)\s*)?(?P<amount>\d[\d,]*(?:\.\d+)?)",
+    "money": r"(?:Rs\.?|INR)\s*(?P<amount>\d[\d,]*(?:\.\d+)?)",  # amount with a currency marker
+    "account": r"[X*]*(?P<account>\d{3,6})",
+    "merchant": r"(?P<merchant>[\w@&.' -]+?)",
+    "date": r"(?P<date>\d{1,2}[-/ ]?(?:\d{1,2}|[A-Za-z]{3})[-/ ]?\d{2,4})",
+}
+
+# Per bank: the DLT sender codes it sends from (the part after "VM-", "AD-", ...) and its
+# templates as (pattern, transaction type), tried in order
+BANK_TEMPLATES = {
+    "HDFC Bank": {
+        "senders": ["HDFCBK", "HDFCBN"],
+        "templates": [
+            (r"Card ending {account} has been used for {amount} at {merchant} on {date}", "expense"),
+            (r"{amount} debited from a/c {account} on {date} to VPA {merchant} \(", "expense"),
+            (r"{amount} credited to a/c {account} on {date} by (?:a/c linked to )?VPA {merchant} \(", "income"),
+            (r"{amount} credited to a/c {account} on {date}", "income"),
+        ],
+    },
+    "ICICI Bank": {
+        "senders": ["ICICIB", "ICICIT"],
+        "templates": [
+            (r"Acct {account} debited for {amount} on {date}; {merchant} credited", "expense"),
+            (r"Acct {account} is credited with {amount} on {date} from {merchant}\.", "income"),
+            (r"Card {account} used for {amount} on {date} at {merchant}\.", "expense"),
+        ],
+    },
+    "State Bank of India": {
+        "senders": ["SBIINB", "SBIUPI", "ATMSBI", "SBIPSG"],
+        "templates": [
+            (r"A/C {account} debited by {amount} on date {date} trf to {merchant} Ref", "expense"),
+            (r"A/c {account}-credited by {amount} on {date} transfer from {merchant} Ref", "income"),
+        ],
+    },
+    "Axis Bank": {
+        "senders": ["AXISBK", "AXISBN"],
+        "templates": [
+            (r"{amount} spent on Axis Bank Card no\. {account} on {date} at {merchant}\.", "expense"),
+            (r"{amount} debited from A/c no\. {account} on {date} (?:at|for) {merchant}\.", "expense"),
+            (r"{amount} credited to A/c no\. {account} on {date}", "income"),
+        ],
+    },
+    "Kotak Mahindra Bank": {
+        "senders": ["KOTAKB", "KMBANK"],
+        "templates": [
+            (r"Sent {amount} from Kotak Bank AC {account} to {merchant} on {date}", "expense"),
+            (r"Received {amount} in your Kotak Bank AC {account} from {merchant} on {date}", "income"),
+        ],
+    },
+}
+
+# Unknown senders, or a known bank whose templates all missed: amount plus direction only
+GENERIC_TEMPLATES = [
+    (r"{money} (?:has been )?(?:debited|spent|withdrawn|paid)", "expense"),
+    (r"(?:debited|spent|sent|paid)[\w ]*? {money}", "expense"),
+    (r"{money} (?:has been )?(?:credited|received|deposited)", "income"),
+    (r"(?:credited|received)[\w ]*? {money}", "income"),
+]
+
+# One-time passwords and the like quote amounts without being transactions
+NOT_A_TRANSACTION = re.compile(r"\bOTP\b|[Oo]ne [Tt]ime [Pp]assword|will be debited|is due|[Rr]equest")
+
+def _compile(templates, flags=0):
+    return [(re.compile(pattern.format(**FRAGMENTS), flags), type) for pattern, type in templates]
+
+def compile_registry(bank_templates):
+    """Map every sender code to (bank name, compiled templates)."""
+    registry = {}
+    for bank_name, bank in bank_templates.items():
+        compiled = _compile(bank["templates"])
+        for sender in bank["senders"]:
+            registry[sender] = (bank_name, compiled)
+    return registry
+
+REGISTRY = compile_registry(BANK_TEMPLATES)
+# Bank templates are case-sensitive (banks send fixed text, and it scans faster); the fallback isn't
+GENERIC = _compile(GENERIC_TEMPLATES, re.IGNORECASE)
+
+MONTHS = {name: index for index, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1
+)}
+DATE_PARTS = re.compile(r"(\d{1,2})[-/ ]?(\d{1,2}|[A-Za-z]{3})[-/ ]?(\d{2,4})")
+
+@lru_cache(maxsize=4096)
+def parse_date(text):
+    """Day-first SMS dates (21-01-25, 21/01/2025, 21-Jan-25, 21Jan25); None if not a date."""
+    parts = DATE_PARTS.fullmatch(text)
+    if not parts:
+        return None
+    day, month, year = parts.groups()
+    month = int(month) if month.isdigit() else MONTHS.get(month.lower())
+    year = int(year) + 2000 if len(year) == 2 else int(year)
+    try:
+        return datetime(year, month, int(day), tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+def lookup_sender(sender):
+    """Resolve a sender id such as "VM-HDFCBK" or "JD-HDFCBK-S" to its registry entry."""
+    if not sender:
+        return None
+    for part in sender.upper().split("-"):
+        entry = REGISTRY.get(part)
+        if entry:
+            return entry
+    return None
+
+def _match(templates, body):
+    for pattern, type in templates:
+        found = pattern.search(body)
+        if found:
+            return found, type
+    return None, None
+
+def parse_message(body, sender=None, received_at=None):
+    """Turn one bank SMS into a transaction candidate dict, or None if it isn't one.
+
+    Confidence is high when the sender's own template gave amount, merchant
+    and date, medium when it gave only some of them, and low when only the
+    generic amount-and-direction patterns matched."""
+    if NOT_A_TRANSACTION.search(body):
+        return None
+    bank_name, templates = lookup_sender(sender) or (None, None)
+    found = type = None
+    if templates:
+        found, type = _match(templates, body)
+    if found:
+        groups = found.groupdict()
+        merchant = groups.get("merchant")
+        timestamp = parse_date(groups["date"]) if groups.get("date") else None
+        confidence = "high" if merchant and timestamp else "medium"
+    else:
+        found, type = _match(GENERIC, body)
+        if not found:
+            return None
+        groups = found.groupdict()
+        merchant = timestamp = None
+        confidence = "low"
+    if received_at and (timestamp is None or timestamp.date() == received_at.date()):
+        timestamp = received_at
+    if merchant:
+        merchant = merchant.strip(" .")
+    return {
+        "amount": float(groups["amount"].replace(",", "")),
+        "type": type,
+        "merchant_name": merchant or None,
+        "bank_name": bank_name,
+        "confidence": confidence,
+        "timestamp": timestamp or datetime.now(timezone.utc),
+        "account_last4": groups["account"][-4:] if groups.get("account") else None,
+    }
+
+def parse_batch(messages, matcher=None):
+    """Parse (body, sender, received_at) tuples; returns (candidates, indexes that didn't parse).
+
+    With a merchant matcher, candidates come back with normalized merchants and categories."""
+    candidates = []
+    unparsed = []
+    for index, (body, sender, received_at) in enumerate(messages):
+        candidate = parse_message(body, sender, received_at)
+        if candidate is None:
+            unparsed.append(index)
+        else:
+            candidate["index"] = index
+            if matcher:
+                matcher.apply(candidate)
+            candidates.append(candidate)
+    return candidates, unparsed
@@ -0,0 +1,162 @@
+import heapq
+from collections import defaultdict
+from sqlalchemy import select, insert, delete, func, cast, true, Float, Integer
+from starlette.concurrency import run_in_threadpool
+from app.db.models.debt import Debt, DebtStatus
+from app.db.models.split_expense import SplitExpense
+from app.db.models.split_participant import SplitParticipant
+
+# Settlement parties are ("user", users.id) for split participants and ("friend", friends.id)
+# for the other side of a debt
+
+def net_balances(splits, debts=()):
+    """Net every party's position in cents: positive is owed money, negative owes money.
+
+    splits is an iterable of participant lists ({user_id, amount_paid, share_amount});
+    debts is an iterable of (user_id, friend_id, amount) where the user owes the friend."""
+    users = defaultdict(int)
+    for participants in splits:
+        nets = {}
+        for p in participants:
+            user_id = p.get("user_id")
+            if user_id is not None:
+                user_id = int(user_id)
+                nets[user_id] = nets.get(user_id, 0) + round((p.get("amount_paid", 0) - p.get("share_amount", 0)) * 100)
+        residual = sum(nets.values())
+        if residual and abs(residual) <= len(nets):
+            # Shares rounded to cents (100 / 3) leave a few pennies over; the biggest payer absorbs them
+            nets[max(nets, key=nets.get)] -= residual
+        for user_id, cents in nets.items():
+            users[user_id] += cents
+    balances = defaultdict(int, {("user", user_id): cents for user_id, cents in users.items()})
+    for user_id, friend_id, amount in debts:
+        if friend_id is not None:
+            balances[("user", user_id)] -= round(amount * 100)
+            balances[("friend", friend_id)] += round(amount * 100)
+    return balances
+
+def settle(balances):
+    """Greedy min-cash-flow: repeatedly pay the largest creditor from the largest debtor.
+
+    Every step settles at least one party, so the plan has at most n - 1
+    transfers, in O(n log n). Returns (transfers, unbalanced cents) where
+    unbalanced is whatever the input's balances fail to net to zero."""
+    creditors = [(-cents, party) for party, cents in balances.items() if cents > 0]
+    debtors = [(cents, party) for party, cents in balances.items() if cents < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+    transfers = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append((debtor, creditor, amount))
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+    unbalanced = -sum(cents for cents, _ in creditors) + sum(cents for cents, _ in debtors)
+    return transfers, unbalanced
+
+def _settlement(splits, debts):
+    balances = net_balances(splits, debts)
+    transfers, unbalanced = settle(balances)
+    return {
+        "balances": [
+            {"type": type, "id": id, "balance": cents / 100}
+            for (type, id), cents in sorted(balances.items())
+            if cents
+        ],
+        "transfers": [
+            {"payer_type": payer[0], "payer_id": payer[1], "payee_type": payee[0], "payee_id": payee[1], "amount": cents / 100}
+            for payer, payee, cents in transfers
+        ],
+        "unbalanced": unbalanced / 100,
+    }
+
+async def get_settlement(db, user_id, split_ids=None, include_debts=True):
+    """Settlement plan over the splits the user created or is in (or just split_ids) and pending debts."""
+    query = select(SplitExpense.participants).filter(
+        (SplitExpense.user_id == user_id) | SplitExpense.id.in_(participating_split_ids(user_id))
+    )
+    if split_ids:
+        query = query.filter(SplitExpense.id.in_(split_ids))
+    splits = (await db.scalars(query)).all()
+    debts = []
+    if include_debts:
+        debts = (await db.execute(
+            select(Debt.user_id, Debt.friend_id, Debt.amount)
+            .filter(Debt.user_id == user_id, Debt.status == DebtStatus.pending)
+        )).all()
+    # Netting and the heap are pure CPU; keep them off the event loop for large groups
+    return await run_in_threadpool(_settlement, splits, debts)
+
+def participant_rows(split_id, participants):
+    # A user listed twice in one split is merged, the same way net_balances counts them
+    rows = {}
+    for p in participants:
+        user_id = p.get("user_id")
+        if user_id is None:
+            continue
+        row = rows.setdefault(int(user_id), {
+            "split_id": split_id, "participant_user_id": int(user_id), "amount_paid": 0.0, "share_amount": 0.0
+        })
+        row["amount_paid"] += p.get("amount_paid", 0)
+        row["share_amount"] += p.get("share_amount", 0)
+    return list(rows.values())
+
+async def sync_participants(db, split):
+    """Mirror split.participants into split_participants; runs in the caller's transaction."""
+    await db.flush()
+    await db.execute(delete(SplitParticipant).filter(SplitParticipant.split_id == split.id))
+    rows = participant_rows(split.id, split.participants)
+    if rows:
+        await db.execute(insert(SplitParticipant), rows)
+
+def participating_split_ids(user_id):
+    return select(SplitParticipant.split_id).filter(SplitParticipant.participant_user_id == user_id)
+
+async def get_owed(db, user_id):
+    """What the user owes (share minus paid) on other people's splits, per split owner."""
+    owed = func.sum(SplitParticipant.share_amount - SplitParticipant.amount_paid)
+    rows = (await db.execute(
+        select(SplitExpense.user_id, owed)
+        .select_from(SplitParticipant)
+        .join(SplitExpense, SplitExpense.id == SplitParticipant.split_id)
+        .filter(SplitParticipant.participant_user_id == user_id, SplitExpense.user_id != user_id)
+        .group_by(SplitExpense.user_id)
+        .having(owed > 0)
+        .order_by(owed.desc())
+    )).all()
+    by_user = [{"user_id": owner_id, "amount": round(amount, 2)} for owner_id, amount in rows]
+    return {"total_owed": round(sum(amount for _, amount in rows), 2), "by_user": by_user}
+
+async def rebuild_split_participants(db, user_id=None):
+    """Backfill split_participants from the participants JSON with a single INSERT ... SELECT (Postgres)."""
+    element = func.json_array_elements(SplitExpense.participants).table_valued("value").render_derived(name="p")
+    def field(name):
+        return element.c.value.op("->>")(name)
+    participant = cast(cast(field("user_id"), Float), Integer)
+    grouped = (
+        select(
+            SplitExpense.id,
+            participant,
+            func.coalesce(func.sum(cast(field("amount_paid"), Float)), 0.0),
+            func.coalesce(func.sum(cast(field("share_amount"), Float)), 0.0),
+        )
+        .select_from(SplitExpense)
+        .join(element, true())
+        .filter(field("user_id").is_not(None))
+        .group_by(SplitExpense.id, participant)
+    )
+    clear = delete(SplitParticipant)
+    if user_id is not None:
+        owned = select(SplitExpense.id).filter(SplitExpense.user_id == user_id)
+        clear = clear.filter(SplitParticipant.split_id.in_(owned))
+        grouped = grouped.filter(SplitExpense.user_id == user_id)
+    await db.execute(clear)
+    await db.execute(
+        SplitParticipant.__table__.insert().from_select(
+            ["split_id", "participant_user_id", "amount_paid", "share_amount"], grouped
+        )
+    )
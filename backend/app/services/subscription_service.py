@@ -0,0 +1,298 @@
+import asyncio
+import logging
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import groupby
+import numpy as np
+from sqlalchemy import select, delete, insert
+from app.config.settings import (
+    SUBSCRIPTION_DETECT_LOOKBACK_DAYS, SUBSCRIPTION_DETECT_MIN_OCCURRENCES, SUBSCRIPTION_DETECT_AMOUNT_TOLERANCE,
+    SUBSCRIPTION_DETECT_USER_BATCH, SUBSCRIPTION_RENEWAL_INTERVAL_SECONDS, SUBSCRIPTION_RENEWAL_BATCH_SIZE,
+    SUBSCRIPTION_RENEWAL_MAX_CATCH_UP,
+)
+from app.db.database import new_async_session
+from app.db.models.subscription import Subscription, SubscriptionStatus
+from app.db.models.subscription_suggestion import SubscriptionSuggestion
+from app.db.models.transaction import Transaction, TransactionType
+from app.db.models.user import User
+from app.services import analytics_service, budget_service, categorizer_service, merchant_service
+from app.services.merchant_service import clean
+from app.utils.cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Billing cycle -> (shortest, longest) gap in days between charges still counted as that cycle
+CYCLES = {
+    "weekly": (6, 8),
+    "monthly": (26, 35),
+    "yearly": (355, 375),
+}
+# Share of a series' gaps that must fit its cycle
+MIN_REGULARITY = 0.75
+
+def add_cycle(day, billing_cycle, count=1):
+    """The due date `count` billing cycles after day; month ends clamp (Jan 31 -> Feb 28).
+
+    Raises ValueError for a cycle not in CYCLES."""
+    if billing_cycle not in CYCLES:
+        raise ValueError(f"Unknown billing cycle {billing_cycle!r}")
+    if billing_cycle == "weekly":
+        return day + timedelta(weeks=count)
+    months = count * (12 if billing_cycle == "yearly" else 1)
+    year, index = divmod(day.year * 12 + day.month - 1 + months, 12)
+    return date(year, index + 1, min(day.day, monthrange(year, index + 1)[1]))
+
+def amount_bands(charges, tolerance):
+    """Split one merchant's charges into bands of similar amounts.
+
+    Charges are sorted by amount and a band closes once the next amount is
+    more than `tolerance` above the band's smallest, so a price rise of a
+    few percent stays in its band while a 99 and a 499 plan don't mix."""
+    bands = []
+    band = []
+    for charge in sorted(charges, key=lambda c: c[1]):
+        if band and charge[1] > band[0][1] * (1 + tolerance):
+            bands.append(band)
+            band = []
+        band.append(charge)
+    if band:
+        bands.append(band)
+    return bands
+
+def _one_per_day(charges):
+    # A retried or duplicated charge isn't a billing cycle of its own
+    return [charge for i, charge in enumerate(charges) if i == 0 or charge[2].date() != charges[i - 1][2].date()]
+
+def detect(charges, today, existing=(), min_occurrences=SUBSCRIPTION_DETECT_MIN_OCCURRENCES,
+           tolerance=SUBSCRIPTION_DETECT_AMOUNT_TOLERANCE):
+    """Suggested subscriptions from one user's (merchant_name, amount, timestamp, category) expenses.
+
+    Charges are grouped by merchant and amount band into series; the gap
+    statistics of every series are then computed together on one flat array
+    of day numbers, so the whole pass is linear in the number of charges
+    (plus the per-merchant sorts). Merchants in `existing` (cleaned names of
+    the user's subscriptions) are skipped."""
+    by_merchant = defaultdict(list)
+    for charge in charges:
+        key = clean(charge[0])
+        if key not in existing:
+            by_merchant[key].append(charge)
+    series = []
+    for merchant_charges in by_merchant.values():
+        for band in amount_bands(merchant_charges, tolerance):
+            band = _one_per_day(sorted(band, key=lambda c: c[2]))
+            if len(band) >= min_occurrences:
+                series.append(band)
+    if not series:
+        return []
+    lengths = np.array([len(s) for s in series])
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    days = np.array([charge[2].toordinal() for s in series for charge in s])
+    gaps = np.diff(days)
+    # gaps[i] runs from charge i to i + 1; the gap from one series' last charge into the next series doesn't count
+    valid = np.ones(len(gaps), dtype=bool)
+    valid[(starts + lengths - 1)[:-1]] = False
+    fits = np.stack([
+        np.add.reduceat((gaps >= shortest) & (gaps <= longest) & valid, starts)
+        for shortest, longest in CYCLES.values()
+    ]) / (lengths - 1)
+    best = fits.argmax(axis=0)
+    names = list(CYCLES)
+    suggestions = []
+    for s, cycle_index, regularity in zip(series, best, fits[best, np.arange(len(series))]):
+        billing_cycle = names[cycle_index]
+        last = s[-1]
+        last_day = last[2].date()
+        # A series that stopped more than a cycle and a half ago was cancelled
+        if regularity < MIN_REGULARITY or (today - last_day).days > CYCLES[billing_cycle][1] * 1.5:
+            continue
+        next_due_date = add_cycle(last_day, billing_cycle)
+        while next_due_date < today:
+            next_due_date = add_cycle(next_due_date, billing_cycle)
+        suggestions.append({
+            "name": last[0],
+            "amount": last[1],
+            "billing_cycle": billing_cycle,
+            "next_due_date": next_due_date,
+            "category": next((c[3] for c in reversed(s) if c[3]), None),
+            "occurrences": len(s),
+            "last_charged_at": last[2],
+            "confidence": round(float(regularity), 3),
+        })
+    return suggestions
+
+async def _existing_names(db, user_ids):
+    rows = (await db.execute(
+        select(Subscription.user_id, Subscription.name).filter(Subscription.user_id.in_(user_ids))
+    )).all()
+    existing = defaultdict(set)
+    for user_id, name in rows:
+        existing[user_id].add(clean(name))
+    return existing
+
+async def refresh_suggestions(db, user_ids, today=None):
+    """Re-detect and replace the stored suggestions of user_ids, with one ledger read for all of them.
+
+    The caller commits. Returns how many suggestions were stored."""
+    today = today or datetime.now(timezone.utc).date()
+    since = datetime.combine(today - timedelta(days=SUBSCRIPTION_DETECT_LOOKBACK_DAYS), datetime.min.time(), timezone.utc)
+    rows = (await db.execute(
+        select(Transaction.user_id, Transaction.merchant_name, Transaction.amount, Transaction.timestamp,
+               Transaction.category)
+        .filter(
+            Transaction.user_id.in_(user_ids),
+            Transaction.type == TransactionType.expense,
+            Transaction.merchant_name.is_not(None),
+            Transaction.timestamp >= since,
+        )
+        .order_by(Transaction.user_id)
+    )).all()
+    existing = await _existing_names(db, user_ids)
+    suggestions = []
+    for user_id, charges in groupby(rows, key=lambda row: row[0]):
+        for suggestion in detect([row[1:] for row in charges], today, existing[user_id]):
+            suggestions.append({**suggestion, "user_id": user_id})
+    await db.execute(delete(SubscriptionSuggestion).filter(SubscriptionSuggestion.user_id.in_(user_ids)))
+    if suggestions:
+        await db.execute(insert(SubscriptionSuggestion), suggestions)
+    return len(suggestions)
+
+async def detect_all(db, batch_size=SUBSCRIPTION_DETECT_USER_BATCH, today=None):
+    """Batch job: refresh every user's suggestions, batch_size users (and one commit) at a time."""
+    last_id = 0
+    users = stored = 0
+    while True:
+        user_ids = (await db.scalars(
+            select(User.id).filter(User.id > last_id).order_by(User.id).limit(batch_size)
+        )).all()
+        if not user_ids:
+            break
+        last_id = user_ids[-1]
+        stored += await refresh_suggestions(db, user_ids, today)
+        await db.commit()
+        users += len(user_ids)
+    return {"users": users, "suggestions": stored}
+
+async def drop_suggestions(db, user_id, name):
+    """Forget suggestions the user has turned into a subscription (same cleaned name)."""
+    key = clean(name)
+    stored = await get_suggestions(db, user_id)
+    ids = [suggestion.id for suggestion in stored if clean(suggestion.name) == key]
+    if ids:
+        await db.execute(delete(SubscriptionSuggestion).filter(SubscriptionSuggestion.id.in_(ids)))
+
+async def get_suggestions(db, user_id):
+    return (await db.scalars(
+        select(SubscriptionSuggestion)
+        .filter(SubscriptionSuggestion.user_id == user_id)
+        .order_by(SubscriptionSuggestion.next_due_date, SubscriptionSuggestion.id)
+    )).all()
+
+
+def renewal_charges(subscription, today, max_catch_up=SUBSCRIPTION_RENEWAL_MAX_CATCH_UP):
+    """Due dates to bill (oldest first, at most max_catch_up) and the next_due_date after today.
+
+    After an outage every missed cycle is billed on its own due date; cycles
+    beyond max_catch_up (a subscription left stale for years) are skipped."""
+    due = subscription.next_due_date
+    missed = []
+    while due <= today:
+        missed.append(due)
+        due = add_cycle(due, subscription.billing_cycle)
+    return missed[max(len(missed) - max_catch_up, 0):], due
+
+def _renewal_transaction(subscription, due):
+    return {
+        "user_id": subscription.user_id,
+        "amount": subscription.amount,
+        "description": f"{subscription.name} ({subscription.billing_cycle} renewal)",
+        "category": subscription.category,
+        "merchant_name": subscription.name,
+        "type": TransactionType.expense,
+        "timestamp": datetime.combine(due, time.min, timezone.utc),
+    }
+
+async def _renew_batch(db, today, batch_size, max_catch_up):
+    # SKIP LOCKED: concurrent workers each claim a disjoint batch instead of waiting on (or
+    # double-billing) one another; the locks hold until the batch's commit
+    subscriptions = (await db.scalars(
+        select(Subscription)
+        .filter(Subscription.status == SubscriptionStatus.active, Subscription.next_due_date <= today,
+                Subscription.billing_cycle.in_(CYCLES))
+        .order_by(Subscription.next_due_date, Subscription.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )).all()
+    by_user = defaultdict(list)
+    for subscription in subscriptions:
+        dues, subscription.next_due_date = renewal_charges(subscription, today, max_catch_up)
+        by_user[subscription.user_id].extend(_renewal_transaction(subscription, due) for due in dues)
+    rows = []
+    for user_id, user_rows in by_user.items():
+        matcher = await merchant_service.get_matcher(db, user_id)
+        for row in user_rows:
+            matcher.apply(row)
+        if user_rows:
+            await analytics_service.record_transactions(db, user_id, user_rows)
+            await budget_service.record_transactions(db, user_id, user_rows)
+        rows.extend(user_rows)
+    if rows:
+        await db.execute(insert(Transaction), rows)
+    await db.commit()
+    for user_id, user_rows in by_user.items():
+        await response_cache.invalidate_user(user_id)
+        categorizer_service.learn(user_id, user_rows)
+    return len(subscriptions), len(rows)
+
+async def renew_due(db, today=None, batch_size=SUBSCRIPTION_RENEWAL_BATCH_SIZE,
+                    max_catch_up=SUBSCRIPTION_RENEWAL_MAX_CATCH_UP):
+    """Bill every active subscription due on or before today and move it to its next due date.
+
+    Works through batches of batch_size, committing each one (its expense
+    transactions, rollup and budget deltas and the advanced due dates land
+    together), until no unclaimed due subscription is left. Subscriptions
+    whose billing cycle isn't one of CYCLES are logged and skipped."""
+    today = today or datetime.now(timezone.utc).date()
+    renewed = posted = 0
+    while True:
+        claimed, transactions = await _renew_batch(db, today, batch_size, max_catch_up)
+        if not claimed:
+            break
+        renewed += claimed
+        posted += transactions
+    # Rows written before billing_cycle was validated; left unbilled rather than guessed at
+    skipped = (await db.scalars(
+        select(Subscription.id)
+        .filter(Subscription.status == SubscriptionStatus.active, Subscription.next_due_date <= today,
+                Subscription.billing_cycle.not_in(CYCLES))
+    )).all()
+    if skipped:
+        logger.error("Subscriptions with an unknown billing cycle not renewed: %s", skipped)
+    return {"renewed": renewed, "transactions": posted, "skipped": len(skipped)}
+
+async def run_scheduler(interval=SUBSCRIPTION_RENEWAL_INTERVAL_SECONDS):
+    while True:
+        try:
+            async with new_async_session() as db:
+                await renew_due(db)
+        except Exception:
+            logger.exception("Subscription renewal run failed")
+        await asyncio.sleep(interval)
+
+_scheduler = None
+
+def start_scheduler(interval=SUBSCRIPTION_RENEWAL_INTERVAL_SECONDS):
+    global _scheduler
+    if interval > 0 and _scheduler is None:
+        _scheduler = asyncio.get_running_loop().create_task(run_scheduler(interval))
+
+async def stop_scheduler():
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.cancel()
+        try:
+            await _scheduler
+        except asyncio.CancelledError:
+            pass
+        _scheduler = None
@@ -0,0 +1,134 @@
+import asyncio
+import json
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import BULK_BATCH_SIZE, BULK_MAX_ROWS
+from app.db.models.transaction import Transaction
+from app.db.schemas.transaction import TransactionCreate
+from app.services import analytics_service, budget_service, categorizer_service, merchant_service
+
+class BulkLimitExceeded(ValueError):
+    pass
+
+async def iter_ndjson(stream):
+    """Yield one raw line per NDJSON record from an async byte stream."""
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+async def iter_rows(rows):
+    for row in rows:
+        yield row
+
+COPY_COLUMNS = ("id", "user_id", "amount", "description", "category", "category_source", "merchant_name",
+                "bank_name", "confidence", "type", "timestamp")
+
+def _uses_asyncpg(db):
+    return isinstance(db, AsyncSession) and db.bind.dialect.driver == "asyncpg"
+
+async def _copy_batch(db, batch):
+    # Ids are drawn from the serial sequence up front so COPY can still report them
+    conn = await db.connection()
+    ids = (await conn.execute(
+        text("SELECT nextval(pg_get_serial_sequence('transactions', 'id')) FROM generate_series(1, :n)"),
+        {"n": len(batch)}
+    )).scalars().all()
+    records = [
+        (id, row["user_id"], row["amount"], row["description"], row["category"], row.get("category_source"),
+         row["merchant_name"], row["bank_name"], row["confidence"], row["type"].value, row["timestamp"])
+        for id, row in zip(ids, batch)
+    ]
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        Transaction.__tablename__, records=records, columns=COPY_COLUMNS
+    )
+    return ids
+
+async def _insert_batch(db, user_id, batch):
+    if _uses_asyncpg(db):
+        ids = await _copy_batch(db, batch)
+    else:
+        # insertmanyvalues turns this into multi-row INSERT ... RETURNING statements
+        stmt = insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True)
+        ids = (await db.scalars(stmt, batch)).all()
+    await analytics_service.record_transactions(db, user_id, batch)
+    await budget_service.record_transactions(db, user_id, batch)
+    return ids
+
+def _validate_batch(user_id, matcher, model, records, offset):
+    rows = []
+    errors = []
+    for index, record in enumerate(records, offset):
+        try:
+            if isinstance(record, (bytes, str)):
+                record = json.loads(record)
+            transaction = TransactionCreate.model_validate(record)
+        except json.JSONDecodeError as e:
+            errors.append({"index": index, "errors": [{"type": "json_invalid", "loc": [], "msg": str(e)}]})
+            continue
+        except ValidationError as e:
+            errors.append({"index": index, "errors": e.errors(include_url=False, include_context=False, include_input=False)})
+            continue
+        # category_source on every row, so a batch is one shape for the multi-row INSERT
+        rows.append(matcher.apply({**transaction.model_dump(), "user_id": user_id, "category_source": None}))
+    # Scored as one batch, then learned so later batches benefit from this one
+    categorizer_service.categorize(model, rows)
+    model.learn(rows)
+    return rows, errors
+
+async def _read_batch(records, batch_size):
+    batch = []
+    async for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            break
+    return batch
+
+async def bulk_create_transactions(db, user_id, records, batch_size=BULK_BATCH_SIZE, max_rows=BULK_MAX_ROWS):
+    """Validate and insert records (dicts, or raw JSON lines) in batches.
+
+    Invalid rows are reported by their position and skipped; valid rows have
+    their merchant normalized (and category predicted when missing) and are written batch by batch but only
+    committed by the caller, so the whole load lands in one database
+    transaction. Validation runs in the threadpool and overlaps with the
+    previous batch's write, keeping the event loop free."""
+    records = records.__aiter__()
+    matcher = await merchant_service.get_matcher(db, user_id)
+    model = await categorizer_service.get_model(db, user_id)
+    ids = []
+    errors = []
+    received = 0
+    pending = None
+    try:
+        while True:
+            raw = await _read_batch(records, batch_size)
+            if not raw:
+                break
+            received += len(raw)
+            if received > max_rows:
+                raise BulkLimitExceeded(f"Bulk requests are limited to {max_rows} rows")
+            rows, batch_errors = await run_in_threadpool(_validate_batch, user_id, matcher, model, raw, received - len(raw))
+            errors.extend(batch_errors)
+            if pending:
+                ids.extend(await pending)
+                pending = None
+            if rows:
+                pending = asyncio.ensure_future(_insert_batch(db, user_id, rows))
+        if pending:
+            ids.extend(await pending)
+            pending = None
+    except Exception:
+        categorizer_service.invalidate(user_id)
+        raise
+    finally:
+        if pending:
+            pending.cancel()
+    return {"received": received, "inserted": len(ids), "ids": ids, "errors": errors}
@@ -0,0 +1,58 @@
+from collections import deque
+
+class Automaton:
+    """Aho-Corasick matcher: finds every keyword in one pass over the text.
+
+    Built once from (keyword, value) pairs, then immutable, so a rebuilt
+    automaton can replace a live one with a plain assignment."""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        self.size = 0
+        for keyword, value in keywords:
+            self._add(keyword, value)
+        self._link()
+
+    def __len__(self):
+        return self.size
+
+    def _add(self, keyword, value):
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = next_state
+        self.outputs[state].append((len(keyword), value))
+        self.size += 1
+
+    def _link(self):
+        # Breadth-first, so a state's fail target is always linked before the state itself
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def iter(self, text):
+        """Yield (start, length, value) for every keyword occurrence."""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in outputs[state]:
+                yield end - length, length, value
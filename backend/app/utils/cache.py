@@ -0,0 +1,124 @@
+import json
+from cachetools import TTLCache
+from app.config.settings import CACHE_BACKEND, CACHE_URL, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS
+
+MISSING = object()
+
+class _CountingTTLCache(TTLCache):
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+        self.expirations = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        return expired
+
+class MemoryCacheBackend:
+    """Per-process LRU with TTL. Invalidations are only seen by this worker."""
+
+    name = "memory"
+
+    def __init__(self, maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.entries = _CountingTTLCache(maxsize=maxsize, ttl=ttl)
+        # Never evicted: losing a version would make older entries reachable again
+        self.versions = {}
+
+    async def get(self, key):
+        return self.entries.get(key, MISSING)
+
+    async def set(self, key, value):
+        self.entries[key] = value
+
+    async def get_version(self, user_id):
+        return self.versions.get(user_id, 0)
+
+    async def bump_version(self, user_id):
+        self.versions[user_id] = self.versions.get(user_id, 0) + 1
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "max_entries": self.entries.maxsize,
+            "evictions": self.entries.evictions,
+            "expirations": self.entries.expirations,
+        }
+
+class RedisCacheBackend:
+    """Shared by every worker pointed at the same Redis (e.g. one on localhost).
+
+    Redis applies the TTL and its own maxmemory eviction policy."""
+
+    name = "redis"
+
+    def __init__(self, url=CACHE_URL, ttl=CACHE_TTL_SECONDS):
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+
+    async def get(self, key):
+        raw = await self.client.get(key)
+        return MISSING if raw is None else json.loads(raw)
+
+    async def set(self, key, value):
+        await self.client.set(key, json.dumps(value, default=str), ex=self.ttl)
+
+    async def get_version(self, user_id):
+        return int(await self.client.get(f"cache:version:{user_id}") or 0)
+
+    async def bump_version(self, user_id):
+        await self.client.incr(f"cache:version:{user_id}")
+
+    def stats(self):
+        return {}
+
+BACKENDS = {
+    "memory": MemoryCacheBackend,
+    "redis": RedisCacheBackend,
+}
+
+class ResponseCache:
+    """Caches per-user read responses.
+
+    Keys embed the user's current version, so a write only has to bump the
+    version: every older entry becomes unreachable and ages out of the LRU."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(user_id, version, route, params):
+        return f"cache:{user_id}:{version}:{route}:{json.dumps(params, sort_keys=True, default=str)}"
+
+    async def get_or_compute(self, user_id, route, params, compute):
+        # Version is read before computing, so a write landing mid-compute
+        # leaves the result under the superseded version
+        version = await self.backend.get_version(user_id)
+        key = self._key(user_id, version, route, params)
+        value = await self.backend.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await compute()
+        await self.backend.set(key, value)
+        return value
+
+    async def invalidate_user(self, user_id):
+        await self.backend.bump_version(user_id)
+
+    def stats(self):
+        return {"backend": self.backend.name, "hits": self.hits, "misses": self.misses, **self.backend.stats()}
+
+response_cache = ResponseCache(BACKENDS[CACHE_BACKEND]())
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import re
+from app.config.settings import (
+    LLM_BACKEND, LLM_URL, LLM_MODEL, LLM_API_KEY, LLM_TIMEOUT_SECONDS, LLM_STUB_TOKEN_DELAY_SECONDS,
+)
+
+SYSTEM_PROMPT = (
+    "You are LogUp's personal finance assistant. Answer the user's question using only the records "
+    "below, which come from their own transactions, budgets, goals and debts. Amounts are in rupees. "
+    "If the records don't answer the question, say so."
+)
+
+def prompt(question, context):
+    """Chat messages for a question and its retrieved records (dicts with "text")."""
+    records = "\n".join(f"- {document['text']}" for document in context) or "(no matching records)"
+    return [
+        {"role": "system", "content": f"{SYSTEM_PROMPT}\n\nRecords:\n{records}"},
+        {"role": "user", "content": question},
+    ]
+
+class StubLLM:
+    """Offline and deterministic: lists the retrieved records under a fixed template.
+
+    stream() yields it a word at a time, waiting token_delay seconds before
+    each, to stand in for a model's generation speed."""
+
+    name = "stub"
+
+    def __init__(self, token_delay=LLM_STUB_TOKEN_DELAY_SECONDS):
+        self.token_delay = token_delay
+
+    async def complete(self, question, context):
+        if not context:
+            return "I couldn't find anything about that in your transactions, budgets, goals or debts."
+        lines = "\n".join(f"- {document['text']}" for document in context)
+        return f'Here is what I found in your records about "{question}":\n{lines}'
+
+    async def stream(self, question, context):
+        for token in re.findall(r"\s*\S+", await self.complete(question, context)):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+    async def aclose(self):
+        pass
+
+class OpenAICompatibleLLM:
+    """Any server speaking the OpenAI chat completions API (a local Ollama or vLLM, or a hosted one)."""
+
+    name = "openai"
+
+    def __init__(self, url=LLM_URL, model=LLM_MODEL, api_key=LLM_API_KEY, timeout=LLM_TIMEOUT_SECONDS):
+        try:
+            import httpx
+        except ImportError:
+            raise RuntimeError("LLM_BACKEND=openai requires the httpx package")
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.AsyncClient(base_url=url.rstrip("/"), headers=headers, timeout=timeout)
+        self.model = model
+
+    async def complete(self, question, context):
+        response = await self.client.post(
+            "/chat/completions", json={"model": self.model, "messages": prompt(question, context)}
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def stream(self, question, context):
+        # Leaving this generator early (the client went away) closes the response, which stops
+        # the server generating
+        async with self.client.stream(
+            "POST", "/chat/completions",
+            json={"model": self.model, "messages": prompt(question, context), "stream": True},
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: ") or line == "data: [DONE]":
+                    continue
+                token = json.loads(line[len("data: "):])["choices"][0]["delta"].get("content")
+                if token:
+                    yield token
+
+    async def aclose(self):
+        await self.client.aclose()
+
+BACKENDS = {
+    "stub": StubLLM,
+    "openai": OpenAICompatibleLLM,
+}
+
+llm = BACKENDS[LLM_BACKEND]()
@@ -0,0 +1,102 @@
+import re
+import time
+from datetime import date
+from app.config.settings import OCR_BACKEND
+
+# Everything here runs in the receipt worker processes (receipt_service), never on the event loop
+
+AMOUNT = re.compile(r"(?<![\d.])(\d{1,3}(?:,\d{2,3})+(?:\.\d{1,2})?|\d+\.\d{1,2}|\d+)(?![\d.])")
+TOTAL = re.compile(r"\b(?:grand total|net total|total|amount due|amount paid|net amount|to pay)\b", re.I)
+SUBTOTAL = re.compile(r"\bsub\s*-?\s*total\b", re.I)
+MONTHS = {name: i + 1 for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+)}
+DATES = [
+    (re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b"), lambda m: (m[1], m[2], m[3])),
+    # Day first, as printed in India
+    (re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4}|\d{2})\b"), lambda m: (m[3], m[2], m[1])),
+    (re.compile(r"\b(\d{1,2})[ -]?(" + "|".join(MONTHS) + r")[a-z]*[ ,-]*(\d{4}|\d{2})\b", re.I),
+     lambda m: (m[3], MONTHS[m[2].lower()], m[1])),
+]
+# Lines that aren't the shop's name
+NOT_MERCHANT = re.compile(r"\b(?:tax|gst|gstin|invoice|bill|receipt|tel|phone|date|cash|total)\b", re.I)
+
+def _amounts(line):
+    return [float(value.replace(",", "")) for value in AMOUNT.findall(line)]
+
+def _date(text):
+    for pattern, order in DATES:
+        for match in pattern.finditer(text):
+            year, month, day = (int(part) for part in order(match))
+            try:
+                return date(year + 2000 if year < 100 else year, month, day)
+            except ValueError:
+                continue
+    return None
+
+def fields(text):
+    """merchant_name, amount and receipt_date read from a receipt's OCR text (None where not found).
+
+    The amount is the last figure on the last total line, falling back to the
+    largest figure with paise; the merchant is the first line that reads
+    like a name."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    amount = None
+    for line in lines:
+        if TOTAL.search(line) and not SUBTOTAL.search(line) and _amounts(line):
+            amount = _amounts(line)[-1]
+    if amount is None:
+        decimals = [float(value.replace(",", "")) for value in AMOUNT.findall(text) if "." in value]
+        amount = max(decimals, default=None)
+    merchant = next((line for line in lines[:5] if sum(c.isalpha() for c in line) >= 3
+                     and not NOT_MERCHANT.search(line) and not _date(line)), None)
+    return {"merchant_name": merchant, "amount": amount, "receipt_date": _date(text)}
+
+class StubOCR:
+    """For development and tests: the image file is read as UTF-8 text, so a plain-text
+    receipt goes through the same pipeline a photo would. Real images read as no text."""
+
+    name = "stub"
+
+    def text(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            return ""
+
+class TesseractOCR:
+    name = "tesseract"
+
+    def __init__(self):
+        try:
+            import pytesseract
+            from PIL import Image
+        except ImportError:
+            raise RuntimeError("OCR_BACKEND=tesseract requires the pytesseract and Pillow packages")
+        self.pytesseract = pytesseract
+        self.Image = Image
+
+    def text(self, path):
+        with self.Image.open(path) as image:
+            return self.pytesseract.image_to_string(image.convert("L"))
+
+BACKENDS = {
+    "stub": StubOCR,
+    "tesseract": TesseractOCR,
+}
+
+# One engine per worker process, created by its first job
+_engine = None
+
+def extract(path, backend=OCR_BACKEND):
+    """OCR one receipt image: its fields and text, plus when (wall clock) the worker started
+    on it and how long it took."""
+    global _engine
+    started_at = time.time()
+    started = time.perf_counter()
+    if _engine is None or _engine.name != backend:
+        _engine = BACKENDS[backend]()
+    text = _engine.text(path).strip()
+    return {**fields(text), "text": text, "started_at": started_at, "seconds": time.perf_counter() - started}
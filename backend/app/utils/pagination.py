@@ -0,0 +1,45 @@
+import base64
+import json
+from datetime import datetime
+from typing import Generic, List, Optional, TypeVar
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import tuple_
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+def encode_cursor(timestamp: datetime, id: int) -> str:
+    raw = json.dumps([timestamp.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+async def paginate(db, stmt, timestamp_column, id_column, cursor: Optional[str], limit: int):
+    """Keyset page over (timestamp_column DESC, id_column DESC).
+
+    The cursor points at the last row of the previous page, so the next page
+    is a range scan on a (user_id, timestamp DESC, id) index no matter how deep
+    the client has paged."""
+    if cursor:
+        stmt = stmt.filter(tuple_(timestamp_column, id_column) < tuple_(*decode_cursor(cursor)))
+    stmt = stmt.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1)
+    rows = (await db.scalars(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
+    return {"items": rows, "next_cursor": next_cursor}
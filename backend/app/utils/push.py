@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from app.config.settings import (
+    PUSH_BACKEND, PUSH_URL, PUSH_QUEUE_SIZE, PUSH_RESTART_SECONDS, PUSH_RESTART_MAX_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+class ConnectionRegistry:
+    """This worker's open push connections: one bounded queue per connection, grouped by user.
+
+    An idle connection costs a queue and the task waiting on it. A client
+    that stops reading loses its oldest events rather than growing the
+    queue without bound."""
+
+    def __init__(self, queue_size=PUSH_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.connections = defaultdict(set)
+        self.delivered = 0
+        self.dropped = 0
+
+    def connect(self, user_id):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.connections[user_id].add(queue)
+        return queue
+
+    def disconnect(self, user_id, queue):
+        queues = self.connections.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.connections[user_id]
+
+    def deliver(self, user_id, event):
+        for queue in self.connections.get(user_id, ()):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(event)
+            self.delivered += 1
+
+    def stats(self):
+        return {
+            "users": len(self.connections),
+            "connections": sum(len(queues) for queues in self.connections.values()),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+class LocalBroadcastBackend:
+    """Delivers straight into this worker's registry; for a single worker, and for tests."""
+
+    name = "memory"
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    async def start(self):
+        pass
+
+    async def publish(self, user_id, event):
+        self.registry.deliver(user_id, event)
+
+    async def stop(self):
+        pass
+
+class RedisBroadcastBackend:
+    """Fans events out to every worker subscribed to the same Redis channel.
+
+    Each worker runs one subscriber task and hands what it receives to its
+    own registry, so the publisher doesn't need to know where a user is
+    connected. A subscriber that dies (say the connection to Redis drops) is
+    restarted with backoff until stop()."""
+
+    name = "redis"
+    channel = "push:events"
+
+    def __init__(self, registry, url=PUSH_URL, client=None,
+                 restart_seconds=PUSH_RESTART_SECONDS, restart_max_seconds=PUSH_RESTART_MAX_SECONDS):
+        if client is None:
+            try:
+                from redis import asyncio as redis
+            except ImportError:
+                raise RuntimeError("PUSH_BACKEND=redis requires the redis package")
+            client = redis.from_url(url)
+        self.registry = registry
+        self.client = client
+        self.restart_seconds = restart_seconds
+        self.restart_max_seconds = restart_max_seconds
+        self.listener = None
+        self.restart = None
+        self.failures = 0
+        self.restarts = 0
+
+    async def start(self):
+        # Claimed before any await, so concurrent first connections start one listener
+        if self.listener is None:
+            self._spawn()
+
+    def _spawn(self):
+        self.restart = None
+        self.listener = asyncio.get_running_loop().create_task(self._listen())
+        self.listener.add_done_callback(self._listener_done)
+
+    def _listener_done(self, task):
+        # stop() cancels on purpose; anything else leaves this worker deaf until restarted
+        if task.cancelled() or task is not self.listener:
+            return
+        error = task.exception()
+        delay = min(self.restart_max_seconds, self.restart_seconds * 2 ** self.failures)
+        self.failures += 1
+        self.restarts += 1
+        logger.error("Push subscriber stopped; restarting in %.1fs", delay, exc_info=error)
+        self.restart = asyncio.get_running_loop().call_later(delay, self._spawn)
+
+    async def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.channel)
+            # Subscribed again, so the next failure starts the backoff over
+            self.failures = 0
+            async for message in pubsub.listen():
+                payload = json.loads(message["data"])
+                self.registry.deliver(payload["user_id"], payload["event"])
+        finally:
+            await pubsub.aclose()
+
+    async def publish(self, user_id, event):
+        await self.client.publish(self.channel, json.dumps({"user_id": user_id, "event": event}, default=str))
+
+    async def stop(self):
+        if self.restart is not None:
+            self.restart.cancel()
+            self.restart = None
+        if self.listener is not None:
+            listener, self.listener = self.listener, None
+            listener.cancel()
+            try:
+                await listener
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                # Already logged by _listener_done
+                pass
+
+BACKENDS = {
+    "memory": LocalBroadcastBackend,
+    "redis": RedisBroadcastBackend,
+}
+
+class Push:
+    """Pushes events ({"type", "data"}) to every open connection of a user, on any worker."""
+
+    def __init__(self, registry, backend):
+        self.registry = registry
+        self.backend = backend
+
+    async def publish(self, user_id, type, data):
+        await self.backend.publish(user_id, {"type": type, "data": data})
+
+    async def connect(self, user_id):
+        # The backend's subscriber starts with the first connection this worker sees
+        await self.backend.start()
+        return self.registry.connect(user_id)
+
+    def disconnect(self, user_id, queue):
+        self.registry.disconnect(user_id, queue)
+
+    async def stop(self):
+        await self.backend.stop()
+
+    def stats(self):
+        return {"backend": self.backend.name, **self.registry.stats()}
+
+registry = ConnectionRegistry()
+push = Push(registry, BACKENDS[PUSH_BACKEND](registry))
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import tempfile
+from fastapi import HTTPException, status
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+class _FilePart:
+    """MultipartParser callbacks collecting one file field's data, chunk by chunk."""
+
+    def __init__(self, field, max_bytes):
+        self.field = field
+        self.max_bytes = max_bytes
+        self.header_name = self.header_value = b""
+        self.headers = {}
+        self.writing = False
+        self.found = False
+        self.filename = None
+        self.content_type = None
+        self.size = 0
+        self.pending = []
+
+    def on_part_begin(self):
+        self.headers = {}
+
+    def on_header_field(self, data, start, end):
+        self.header_name += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers[self.header_name.lower()] = self.header_value
+        self.header_name = self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        # Only the first file sent under `field` is kept; other parts are skipped unread
+        self.writing = not self.found and options.get(b"name") == self.field.encode() and b"filename" in options
+        if self.writing:
+            self.found = True
+            self.filename = os.path.basename(options[b"filename"].decode("utf-8", "replace")) or None
+            self.content_type = parse_options_header(self.headers.get(b"content-type", b""))[0].decode("latin-1")
+
+    def on_part_data(self, data, start, end):
+        if self.writing:
+            self.size += end - start
+            if self.size > self.max_bytes:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                    detail=f"File is larger than {self.max_bytes} bytes")
+            self.pending.append(data[start:end])
+
+    def on_part_end(self):
+        self.writing = False
+
+def _write(out, digest, chunks):
+    for chunk in chunks:
+        digest.update(chunk)
+        out.write(chunk)
+
+async def spool_file(request, field, directory, max_bytes, content_types=("image/",)):
+    """Stream the file sent as multipart field `field` into a new file in directory.
+
+    The body is parsed as it arrives and each received chunk is written out
+    before the next is read, so memory use doesn't grow with the upload.
+    Returns {"path", "filename", "content_type", "size", "sha256"}; the
+    caller owns (and removes) the file."""
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a multipart/form-data upload")
+    if int(request.headers.get("content-length") or 0) > max_bytes + 64 * 1024:
+        # Refused before reading anything; the part's own size is still checked as it streams
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"File is larger than {max_bytes} bytes")
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".upload")
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            part = _FilePart(field, max_bytes)
+            parser = MultipartParser(options[b"boundary"], {
+                name: getattr(part, name) for name in (
+                    "on_part_begin", "on_header_field", "on_header_value", "on_header_end",
+                    "on_headers_finished", "on_part_data", "on_part_end",
+                )
+            })
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if part.pending:
+                    await run_in_threadpool(_write, out, digest, part.pending)
+                    part.pending = []
+            parser.finalize()
+        if not part.found:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f'No file sent as "{field}"')
+        if not part.content_type.startswith(content_types):
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail=f"Unsupported file type {part.content_type or 'unknown'}")
+    except MultipartParseError:
+        os.remove(path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed multipart body")
+    except BaseException:
+        # Including the client going away mid-upload
+        os.remove(path)
+        raise
+    return {"path": path, "filename": part.filename, "content_type": part.content_type, "size": part.size,
+            "sha256": digest.hexdigest()}
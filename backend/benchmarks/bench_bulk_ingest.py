@@ -0,0 +1,54 @@
+"""Bulk ingestion throughput against the configured DATABASE_URL.
+
+    python -m benchmarks.bench_bulk_ingest [rows]
+
+Creates a throwaway user, loads `rows` synthetic transactions through
+bulk_create_transactions in one database transaction, then deletes them.
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete
+from app.db.database import AsyncSessionLocal, init_db, close_db
+from app.db.models.monthly_rollup import MonthlyRollup
+from app.db.models.transaction import Transaction
+from app.db.models.user import User
+from app.services.transaction_service import bulk_create_transactions, iter_rows
+
+def synthetic_rows(count):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    merchants = ["Amazon", "Swiggy", "Uber", "Netflix", "BigBasket"]
+    return [
+        {
+            "amount": round(10 + (i % 997) * 1.37, 2),
+            "merchant_name": merchants[i % len(merchants)],
+            "category": "shopping",
+            "type": "expense" if i % 7 else "income",
+            "timestamp": (start + timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+async def main(count):
+    init_db()
+    rows = synthetic_rows(count)
+    async with AsyncSessionLocal() as db:
+        user = User(username="bench", email=f"bench-{time.time_ns()}@example.com", password_hash="x")
+        db.add(user)
+        await db.commit()
+        try:
+            started = time.perf_counter()
+            result = await bulk_create_transactions(db, user.id, iter_rows(rows))
+            await db.commit()
+            elapsed = time.perf_counter() - started
+            print(f"inserted {result['inserted']} rows in {elapsed:.2f}s ({result['inserted'] / elapsed:,.0f} rows/s)")
+        finally:
+            await db.execute(delete(Transaction).where(Transaction.user_id == user.id))
+            await db.execute(delete(MonthlyRollup).where(MonthlyRollup.user_id == user.id))
+            await db.delete(user)
+            await db.commit()
+    await close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000))
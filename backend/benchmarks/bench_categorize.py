@@ -0,0 +1,53 @@
+"""Categorizer training and batch scoring on a synthetic ledger, single core.
+
+    python -m benchmarks.bench_categorize [rows]
+
+Trains a CategoryModel on 50k labelled rows drawn from a set of merchants
+per category, then times predict over `rows` unseen rows in one batch and
+reports accuracy against the generating category.
+"""
+import random
+import sys
+import time
+from app.services.categorizer_service import CategoryModel
+
+CATEGORIES = {
+    "Food & Dining": ["CHAI POINT", "MEGHANA FOODS", "CAFE COFFEE DAY", "DOMINOS PIZZA", "HALDIRAMS"],
+    "Transportation": ["NAMMA YATRI", "SHELL PETROL PUMP", "METRO CARD RECHARGE", "FASTAG TOLL"],
+    "Shopping": ["DECATHLON", "LIFESTYLE STORES", "CROMA ELECTRONICS", "IKEA", "NYKAA"],
+    "Bills & Utilities": ["BESCOM", "ACT FIBERNET", "BWSSB WATER", "INDANE GAS"],
+    "Healthcare": ["MEDPLUS", "MANIPAL HOSPITAL", "NETMEDS", "CULT FIT"],
+}
+AMOUNTS = {"Food & Dining": 400, "Transportation": 800, "Shopping": 3000, "Bills & Utilities": 1500, "Healthcare": 1200}
+
+def synthetic_rows(count, seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        category = rng.choice(list(CATEGORIES))
+        rows.append({
+            "merchant_name": f"{rng.choice(CATEGORIES[category])} {rng.choice(['BLR', 'MUM', 'DEL', ''])}",
+            "description": f"UPI/{rng.randint(10**11, 10**12)}",
+            "amount": rng.uniform(0.2, 3) * AMOUNTS[category],
+            "type": "expense",
+            "category": category,
+        })
+    return rows
+
+def main(count):
+    model = CategoryModel()
+    training = synthetic_rows(50000, seed=1)
+    started = time.perf_counter()
+    model.learn(training)
+    trained = time.perf_counter() - started
+    rows = synthetic_rows(count, seed=2)
+    expected = [row.pop("category") for row in rows]
+    started = time.perf_counter()
+    predictions = model.predict(rows)
+    elapsed = time.perf_counter() - started
+    correct = sum(category == truth for (category, _), truth in zip(predictions, expected))
+    print(f"trained on {len(training)} rows in {trained:.2f}s; scored {count} rows in {elapsed:.3f}s "
+          f"({count / elapsed:,.0f} rows/s), accuracy {correct / count:.1%}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,40 @@
+"""Aggregate chat questions answered by the planner, end to end against the database.
+
+    python -m benchmarks.bench_chat_plan [user_id] [rounds]
+
+Asks a fixed set of common questions `rounds` times each through
+chat_service.answer (parse, plan cache, one grouped query) and prints the
+median and worst latency per question, plus how many plans were compiled.
+Needs DATABASE_URL and an existing user; numbers depend on their ledger.
+"""
+import asyncio
+import statistics
+import sys
+import time
+from app.db.database import new_async_session
+from app.services import chat_service
+
+QUESTIONS = [
+    "How much did I spend on food last month?", "What were my top 5 categories this year?",
+    "Biggest merchant in the last 30 days", "How many transactions at swiggy this month?",
+    "Average spend on groceries this week", "How much did I earn last year?", "Spending by month",
+    "What was my largest expense last month?", "How are my budgets?", "Who do I owe money to?",
+    "What subscriptions do I have?", "Total spent all time",
+]
+
+async def main(user_id, rounds):
+    timings = {question: [] for question in QUESTIONS}
+    async with new_async_session() as db:
+        for _ in range(rounds):
+            for question in QUESTIONS:
+                started = time.perf_counter()
+                await chat_service.answer(db, user_id, question)
+                timings[question].append(time.perf_counter() - started)
+    for question, samples in timings.items():
+        print(f"{statistics.median(samples) * 1000:6.2f} ms median, {max(samples) * 1000:6.2f} ms worst  {question}")
+    everything = [sample for samples in timings.values() for sample in samples]
+    print(f"{len(everything)} answers: median {statistics.median(everything) * 1000:.2f} ms, "
+          f"{len(chat_service._plans)} plans compiled")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1, int(sys.argv[2]) if len(sys.argv) > 2 else 50))
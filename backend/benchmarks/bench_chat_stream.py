@@ -0,0 +1,71 @@
+"""POST /chat/stream time-to-first-byte and token throughput, in-process.
+
+    python -m benchmarks.bench_chat_stream [user_id] [requests] [concurrency] [token_delay]
+
+Calls the ASGI app directly (no server or sockets) with the stub generator,
+`requests` times in waves of `concurrency`. token_delay (seconds, default 0)
+makes the stub pause before each token like a model would; at 0 the numbers
+are the endpoint's own overhead: retrieval, SSE framing and the one batched
+write of both turns. Needs DATABASE_URL and an existing user.
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+from main import app
+from app.api import chat
+from app.utils.llm import StubLLM
+
+QUESTIONS = ["What did I spend on food?", "Show my Swiggy orders", "How are my budgets?", "Any debts due?"]
+
+async def one_request(user_id, question):
+    inbox = asyncio.Queue()
+    inbox.put_nowait({"type": "http.request", "body": json.dumps({"content": question}).encode(), "more_body": False})
+    started = time.perf_counter()
+    first_token = None
+    tokens = 0
+
+    async def send(message):
+        nonlocal first_token, tokens
+        body = message.get("body", b"")
+        if b"event: token" in body:
+            tokens += 1
+            if first_token is None:
+                first_token = time.perf_counter() - started
+
+    scope = {
+        "type": "http", "method": "POST", "path": "/chat/stream", "root_path": "", "scheme": "http",
+        "query_string": f"user_id={user_id}".encode(), "http_version": "1.1",
+        "headers": [(b"content-type", b"application/json")], "client": ("bench", 1), "server": ("bench", 80),
+    }
+    await app(scope, inbox.get, send)
+    return first_token, tokens, time.perf_counter() - started
+
+async def main(user_id, requests, concurrency, token_delay):
+    chat.llm = StubLLM(token_delay=token_delay)
+    await one_request(user_id, QUESTIONS[0])  # builds the user's retrieval index
+    results = []
+    started = time.perf_counter()
+    for wave in range(0, requests, concurrency):
+        results += await asyncio.gather(*(
+            one_request(user_id, QUESTIONS[i % len(QUESTIONS)]) for i in range(wave, min(wave + concurrency, requests))
+        ))
+    elapsed = time.perf_counter() - started
+    first = sorted(r[0] for r in results)
+    tokens = sum(r[1] for r in results)
+    per_stream = [r[1] / r[2] for r in results]
+    print(f"{requests} streams, {concurrency} at a time, token delay {token_delay * 1000:.0f} ms, "
+          f"{tokens / requests:.0f} tokens each")
+    print(f"time to first token: p50 {statistics.median(first) * 1000:.1f} ms, "
+          f"p95 {first[int(len(first) * 0.95)] * 1000:.1f} ms")
+    print(f"throughput: {statistics.median(per_stream):,.0f} tokens/s per stream, "
+          f"{tokens / elapsed:,.0f} tokens/s total")
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 10,
+        float(sys.argv[4]) if len(sys.argv) > 4 else 0.0,
+    ))
@@ -0,0 +1,38 @@
+"""Forecast calendar expansion for one user with many recurring items, single core.
+
+    python -m benchmarks.bench_forecast [items] [months]
+
+Generates `items` recurring items (a mix of weekly, monthly and yearly
+outflows plus a monthly salary) and one-off debts, then times project()
+over a `months` horizon, best of several runs.
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+from app.services.forecast_service import project
+from app.services.subscription_service import add_cycle
+
+def synthetic_items(count, today, seed=3):
+    rng = random.Random(seed)
+    recurring = [(85000.0, "monthly", today + timedelta(days=rng.randint(0, 30)))]
+    for _ in range(count):
+        cycle = rng.choices(["weekly", "monthly", "yearly"], weights=[2, 6, 2])[0]
+        recurring.append((-rng.uniform(50, 5000), cycle, today + timedelta(days=rng.randint(-10, 365))))
+    one_off = [(-rng.uniform(100, 20000), today + timedelta(days=rng.randint(-30, 900))) for _ in range(count // 10)]
+    return recurring, one_off
+
+def main(count, months):
+    today = date(2025, 6, 1)
+    start, end = today + timedelta(days=1), add_cycle(today, "monthly", months)
+    recurring, one_off = synthetic_items(count, today)
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        _, outflow, balance = project(100000.0, start, end, recurring, one_off)
+        timings.append(time.perf_counter() - started)
+    print(f"{len(recurring)} recurring items, {len(one_off)} debts, {len(balance)} days: "
+          f"best {min(timings) * 1000:.2f} ms, ending balance {balance[-1]:,.2f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500, int(sys.argv[2]) if len(sys.argv) > 2 else 36)
@@ -0,0 +1,85 @@
+"""Nudge job throughput against the configured DATABASE_URL.
+
+    python -m benchmarks.bench_nudges [users]
+
+Creates `users` throwaway users, each with a nearly spent budget, a goal
+and a debt falling due soon and a subscription renewing tomorrow, times
+generate_nudges over them in NUDGE_USER_BATCH batches (first run inserts,
+second run updates in place), extrapolates to a million users and deletes
+everything again.
+"""
+import asyncio
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import delete, insert, select
+from app.config.settings import NUDGE_USER_BATCH
+from app.db.database import AsyncSessionLocal, init_db, close_db
+from app.db.models.budget import Budget
+from app.db.models.debt import Debt
+from app.db.models.goal import Goal
+from app.db.models.nudge import Nudge
+from app.db.models.subscription import Subscription
+from app.db.models.transaction import Transaction
+from app.db.models.user import User
+from app.services.notification_service import generate_nudges
+
+TODAY = date.today()
+
+async def seed(db, count, tag):
+    await db.execute(insert(User), [
+        {"username": "bench", "email": f"bench-nudges-{tag}-{i}@example.com", "password_hash": "x"}
+        for i in range(count)
+    ])
+    user_ids = (await db.scalars(
+        select(User.id).filter(User.email.like(f"bench-nudges-{tag}-%")).order_by(User.id)
+    )).all()
+    now = datetime.now(timezone.utc)
+    await db.execute(insert(Budget), [
+        {"user_id": u, "category": "Food", "amount": 100.0, "period": "monthly",
+         "start_date": TODAY - timedelta(days=5), "end_date": TODAY + timedelta(days=25)} for u in user_ids
+    ])
+    await db.execute(insert(Transaction), [
+        {"user_id": u, "amount": 90.0, "category": "Food", "type": "expense", "timestamp": now} for u in user_ids
+    ])
+    await db.execute(insert(Goal), [
+        {"user_id": u, "name": "Trip", "target_amount": 1000.0, "current_amount": 100.0,
+         "target_date": TODAY + timedelta(days=20)} for u in user_ids
+    ])
+    await db.execute(insert(Debt), [
+        {"user_id": u, "amount": 250.0, "description": "Rent share", "due_date": TODAY + timedelta(days=2)}
+        for u in user_ids
+    ])
+    await db.execute(insert(Subscription), [
+        {"user_id": u, "name": "Netflix", "amount": 649.0, "billing_cycle": "monthly",
+         "next_due_date": TODAY + timedelta(days=1)} for u in user_ids
+    ])
+    await db.commit()
+    return user_ids
+
+async def run(db, user_ids):
+    nudges = 0
+    started = time.perf_counter()
+    for start in range(0, len(user_ids), NUDGE_USER_BATCH):
+        nudges += await generate_nudges(db, user_ids[start:start + NUDGE_USER_BATCH], TODAY)
+        await db.commit()
+    return nudges, time.perf_counter() - started
+
+async def main(count):
+    init_db()
+    async with AsyncSessionLocal() as db:
+        user_ids = await seed(db, count, time.time_ns())
+        try:
+            for label in ("insert", "update"):
+                nudges, elapsed = await run(db, user_ids)
+                print(f"{label}: {nudges} nudges for {count} users in {elapsed:.2f}s "
+                      f"({count / elapsed:,.0f} users/s, ~{1_000_000 / (count / elapsed) / 60:.1f} min per 1M users)")
+        finally:
+            for model in (Nudge, Subscription, Debt, Goal, Budget, Transaction):
+                await db.execute(delete(model).where(model.user_id.in_(user_ids)))
+            await db.execute(delete(User).where(User.id.in_(user_ids)))
+            await db.commit()
+    await close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
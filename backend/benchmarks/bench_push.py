@@ -0,0 +1,100 @@
+"""Push channel load test: many idle WebSocket connections on one worker.
+
+    python -m benchmarks.bench_push [connections] [rounds]
+
+Opens `connections` WebSockets to /push/ws (one user each) by calling the
+ASGI app in-process, so the whole stack (middleware, routing, the endpoint's
+wait loop, the registry) runs but no sockets or server are involved. Then
+reports the memory held per idle connection, and for several rounds
+publishes one event to every user and times until each connection's send
+has happened. Finally closes everything and checks the registry is empty.
+"""
+import asyncio
+import gc
+import json
+import resource
+import statistics
+import sys
+import time
+from main import app
+from app.utils.push import push
+
+class Client:
+    def __init__(self, user_id, delivered):
+        self.user_id = user_id
+        self.delivered = delivered
+        self.inbox = asyncio.Queue()
+        self.inbox.put_nowait({"type": "websocket.connect"})
+        self.accepted = asyncio.Event()
+        self.task = None
+
+    async def receive(self):
+        return await self.inbox.get()
+
+    async def send(self, message):
+        if message["type"] == "websocket.accept":
+            self.accepted.set()
+        elif message["type"] == "websocket.send":
+            self.delivered(json.loads(message["text"]))
+
+    def open(self):
+        scope = {
+            "type": "websocket", "path": "/push/ws", "root_path": "", "scheme": "ws", "headers": [],
+            "query_string": f"user_id={self.user_id}".encode(), "client": ("bench", self.user_id),
+            "server": ("bench", 80), "subprotocols": [],
+        }
+        self.task = asyncio.get_running_loop().create_task(app(scope, self.receive, self.send))
+
+    def close(self):
+        self.inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux reports KiB
+
+async def main(count, rounds):
+    latencies = []
+    pending = {"left": 0, "started": 0.0}
+    done = asyncio.Event()
+
+    def delivered(event):
+        if event["type"] == "ping":
+            return
+        latencies.append(time.perf_counter() - pending["started"])
+        pending["left"] -= 1
+        if not pending["left"]:
+            done.set()
+
+    gc.collect()
+    before = rss_mb()
+    started = time.perf_counter()
+    clients = [Client(user_id, delivered) for user_id in range(1, count + 1)]
+    for client in clients:
+        client.open()
+    await asyncio.gather(*(client.accepted.wait() for client in clients))
+    while push.stats()["connections"] < count:
+        await asyncio.sleep(0.01)
+    opened = time.perf_counter() - started
+    gc.collect()
+    held = rss_mb() - before
+    print(f"{count} connections open in {opened:.2f} s, ~{held * 1024 / count:.1f} KiB each "
+          f"(peak RSS +{held:.0f} MiB)")
+
+    for round in range(rounds):
+        latencies.clear()
+        done.clear()
+        pending["left"] = count
+        pending["started"] = time.perf_counter()
+        for client in clients:
+            await push.publish(client.user_id, "notification", {"round": round, "content": "Budget exceeded"})
+        await done.wait()
+        ordered = sorted(latencies)
+        print(f"round {round + 1}: fan-out to {count} in {ordered[-1] * 1000:.0f} ms "
+              f"(p50 {statistics.median(ordered) * 1000:.0f} ms, p99 {ordered[int(len(ordered) * 0.99)] * 1000:.0f} ms)")
+
+    for client in clients:
+        client.close()
+    await asyncio.gather(*(client.task for client in clients))
+    print(f"closed: {push.stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000, int(sys.argv[2]) if len(sys.argv) > 2 else 3))
@@ -0,0 +1,57 @@
+"""Near-duplicate receipt detection: hashing an upload and searching a user's hashes.
+
+    python -m benchmarks.bench_receipt_dedupe [width] [height]
+
+Hashes a synthetic width x height JPEG photo of a receipt (what
+POST /receipts/upload does before queueing OCR), then times HammingIndex
+searches at the duplicate radius over 100 to 100,000 stored hashes.
+Needs Pillow.
+"""
+import io
+import random
+import statistics
+import sys
+import time
+from PIL import Image, ImageDraw
+from app.config.settings import RECEIPT_DUPLICATE_DISTANCE
+from app.utils.images import HammingIndex, image_hash
+
+def photo(width, height, seed=1):
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (90, 80, 70))
+    draw = ImageDraw.Draw(image)
+    left, top = width // 6, height // 12
+    draw.rectangle([left, top, width - left, height - top], fill=(245, 245, 240))
+    y = top + 40
+    while y < height - top - 60:
+        x = rng.randint(left + 20, left + 150)
+        draw.rectangle([x, y, rng.randint(x + 80, width - left - 20), y + rng.randint(10, 30)], fill=(30, 30, 30))
+        y += rng.randint(40, 90)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=85)
+    return out.getvalue()
+
+def main(width, height):
+    data = photo(width, height)
+    timings = []
+    for _ in range(20):
+        started = time.perf_counter()
+        key = image_hash(io.BytesIO(data))
+        timings.append(time.perf_counter() - started)
+    print(f"{width}x{height} JPEG ({len(data) / 2**20:.1f} MiB): hash in {statistics.median(timings) * 1000:.1f} ms")
+
+    rng = random.Random(7)
+    for size in (100, 1000, 10000, 100000):
+        index = HammingIndex()
+        for i in range(size):
+            index.add(rng.getrandbits(256), i)
+        timings = []
+        for _ in range(200):
+            started = time.perf_counter()
+            index.search(key, RECEIPT_DUPLICATE_DISTANCE)
+            timings.append(time.perf_counter() - started)
+        print(f"{size:>7} hashes: search within {RECEIPT_DUPLICATE_DISTANCE} bits "
+              f"{statistics.median(timings) * 1e6:,.0f} us median")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000, int(sys.argv[2]) if len(sys.argv) > 2 else 4000)
@@ -0,0 +1,119 @@
+"""Receipt-to-expense matching against a large ledger on the configured DATABASE_URL.
+
+    python -m benchmarks.bench_receipt_match [transactions] [receipts]
+
+Creates a throwaway user with `transactions` expenses over three years
+(COPY via the bulk ingest path), makes a month of `receipts` receipts, two
+thirds copied from that month's expenses with OCR-ish merchant names and
+dates a day off, the rest cash purchases, and times matching them all in
+one pass and one by one. Prints the candidate query's plan, then deletes
+everything.
+"""
+import asyncio
+import math
+import random
+import re
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from sqlalchemy import delete, select, text
+from app.db.database import AsyncSessionLocal, init_db, close_db
+from app.db.models.monthly_rollup import MonthlyRollup
+from app.db.models.transaction import Transaction, TransactionType
+from app.db.models.user import User
+from app.services import receipt_match_service
+from app.services.transaction_service import _insert_batch
+
+START = datetime(2023, 4, 1, tzinfo=timezone.utc)
+MONTH = date(2026, 3, 1)
+# (name on the SMS, name printed on the receipt)
+MERCHANTS = [
+    ("Swiggy", "BUNDL TECHNOLOGIES PVT LTD"), ("BigBasket", "SUPERMARKET GROCERY SUPPLIES"),
+    ("Starbucks", "TATA STARBUCKS PVT LTD"), ("DMart", "AVENUE SUPERMARTS LTD"), ("Apollo Pharmacy", "APOLLO PHARMACIES"),
+    ("Indian Oil", "IOCL FUEL STATION"), ("Shree Ganesh Stores", "SHREE GANESH GEN STORE"),
+    ("Cafe Coffee Day", "CAFE COFFEE DAY"), ("Reliance Fresh", "RELIANCE RETAIL LTD"), ("Croma", "CROMA INFINITI RETAIL"),
+]
+
+def ledger(user_id, count, batch_size, rng):
+    seconds = int((datetime(2026, 4, 1, tzinfo=timezone.utc) - START).total_seconds())
+    for offset in range(0, count, batch_size):
+        yield [
+            {"user_id": user_id, "amount": round(math.exp(rng.uniform(math.log(20), math.log(5000))), 2),
+             "description": None, "category": "Shopping", "merchant_name": rng.choice(MERCHANTS)[0],
+             "bank_name": "HDFC", "confidence": "high", "type": TransactionType.expense,
+             "timestamp": START + timedelta(seconds=rng.randrange(seconds))}
+            for _ in range(min(batch_size, count - offset))
+        ]
+
+async def main(count, receipt_count):
+    init_db()
+    rng = random.Random(7)
+    async with AsyncSessionLocal() as db:
+        user = User(username="bench", email=f"bench-receipt-match-{time.time_ns()}@example.com", password_hash="x")
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+        try:
+            started = time.perf_counter()
+            for batch in ledger(user_id, count, 50000, rng):
+                await _insert_batch(db, user_id, batch)
+                await db.commit()
+            await db.execute(text("ANALYZE transactions"))
+            print(f"seeded {count:,} expenses in {time.perf_counter() - started:.1f}s")
+
+            month_end = datetime(2026, 4, 1, tzinfo=timezone.utc)
+            month = (await db.execute(
+                select(Transaction.id, Transaction.amount, Transaction.timestamp, Transaction.merchant_name)
+                .filter(Transaction.user_id == user_id,
+                        Transaction.timestamp >= datetime.combine(MONTH, datetime.min.time(), timezone.utc),
+                        Transaction.timestamp < month_end)
+            )).all()
+            printed = dict(MERCHANTS)
+            planted = {}
+            receipts = []
+            for i, row in enumerate(rng.sample(month, receipt_count * 2 // 3), 1):
+                receipts.append(SimpleNamespace(
+                    id=i, amount=row.amount, merchant_name=printed[row.merchant_name],
+                    receipt_date=(row.timestamp + timedelta(days=rng.choice([-1, 0, 0, 1]))).date(), created_at=None,
+                ))
+                planted[i] = row.id
+            for i in range(len(receipts) + 1, receipt_count + 1):
+                receipts.append(SimpleNamespace(
+                    id=i, amount=round(rng.uniform(5000, 20000), 2), merchant_name="Local Vendor",
+                    receipt_date=MONTH + timedelta(days=rng.randrange(31)), created_at=None,
+                ))
+
+            started = time.perf_counter()
+            matches = await receipt_match_service.match(db, user_id, receipts)
+            batch_seconds = time.perf_counter() - started
+            correct = sum(1 for receipt_id, (transaction_id, _) in matches.items() if planted.get(receipt_id) == transaction_id)
+            print(f"{len(month):,} expenses in {MONTH:%B %Y}; {receipt_count} receipts, {len(planted)} of them for one")
+            print(f"one pass: {batch_seconds * 1000:.1f} ms, {len(matches)} matched, {correct} to the planted expense, "
+                  f"{len(matches) - correct} elsewhere")
+
+            started = time.perf_counter()
+            for receipt in receipts:
+                await receipt_match_service.match(db, user_id, [receipt])
+            single_seconds = time.perf_counter() - started
+            print(f"one by one: {single_seconds * 1000:.1f} ms ({single_seconds / receipt_count * 1000:.2f} ms a receipt)")
+
+            query = receipt_match_service.candidates_query(user_id, receipts)
+            sql = str(query.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}))
+            # Literal datetimes render as bare strings, which VALUES would type as text
+            sql = re.sub(r"('\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\+00:00')", r"\1::timestamptz", sql)
+            plan = (await db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))).scalars().all()
+            print("\n".join(plan))
+        finally:
+            await db.rollback()
+            await db.execute(delete(Transaction).where(Transaction.user_id == user_id))
+            await db.execute(delete(MonthlyRollup).where(MonthlyRollup.user_id == user_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+    await close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 300,
+    ))
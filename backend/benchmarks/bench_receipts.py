@@ -0,0 +1,94 @@
+"""Receipt uploads through POST /receipts/upload and the OCR worker pool, in-process.
+
+    python -m benchmarks.bench_receipts [user_id] [uploads] [concurrency] [size_kib]
+
+Calls the ASGI app directly with multipart bodies of size_kib delivered
+in 64 KiB chunks, `concurrency` at a time, then waits for the pool to
+finish every accepted job. Reports upload latency (until 202), uploads
+refused with 429, end-to-end throughput, the pipeline's own timings and
+the peak Python memory while spooling, which shouldn't grow with the
+upload size. Uses OCR_BACKEND (the stub by default). Needs DATABASE_URL
+and an existing user.
+"""
+import asyncio
+import statistics
+import sys
+import time
+import tracemalloc
+from main import app
+from app.services.receipt_service import pipeline
+
+BOUNDARY = b"benchreceipt"
+CHUNK = 64 * 1024
+
+def chunks(size, number):
+    """The multipart body for one upload, CHUNK bytes at a time; numbered, so no upload is a
+    duplicate of another."""
+    text = f"Cafe Mocha\nDate: 12/03/2026\nBill {number} {time.time()}\nGrand Total Rs. 252.00\n".encode()
+    yield (b"--" + BOUNDARY + b'\r\nContent-Disposition: form-data; name="file"; filename="r.jpg"\r\n'
+           b"Content-Type: image/jpeg\r\n\r\n" + text)
+    padding = b" " * CHUNK
+    for start in range(len(text), size, CHUNK):
+        yield padding[:min(CHUNK, size - start)]
+    yield b"\r\n--" + BOUNDARY + b"--\r\n"
+
+async def upload(user_id, size, number):
+    body = chunks(size, number)
+    status = None
+
+    async def receive():
+        # Cut as the app asks, as a socket would deliver it
+        chunk = next(body, b"")
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunk)}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {
+        "type": "http", "method": "POST", "path": "/receipts/upload", "root_path": "", "scheme": "http",
+        "query_string": f"user_id={user_id}".encode(), "http_version": "1.1", "client": ("bench", 1),
+        "server": ("bench", 80),
+        "headers": [(b"content-type", b"multipart/form-data; boundary=" + BOUNDARY)],
+    }
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    return status, time.perf_counter() - started
+
+async def main(user_id, uploads, concurrency, size_kib):
+    await upload(user_id, size_kib * 1024, -1)  # starts the worker processes
+    await asyncio.gather(*pipeline.tasks)
+    tracemalloc.start()
+    results = []
+    started = time.perf_counter()
+    for wave in range(0, uploads, concurrency):
+        results += await asyncio.gather(*(upload(user_id, size_kib * 1024, i) for i in range(wave, min(wave + concurrency, uploads))))
+    _, peak = tracemalloc.get_traced_memory()
+    accepted = time.perf_counter() - started
+    await asyncio.gather(*pipeline.tasks)
+    elapsed = time.perf_counter() - started
+    tracemalloc.stop()
+    latencies = sorted(latency for code, latency in results if code == 202)
+    print(f"{uploads} uploads of {size_kib} KiB, {concurrency} at a time, {pipeline.workers} worker processes, "
+          f"queue size {pipeline.queue_size}")
+    print(f"accepted {len(latencies)}, refused with 429: {sum(code == 429 for code, _ in results)}, "
+          f"other: {sum(code not in (202, 429) for code, _ in results)}")
+    if latencies:
+        print(f"upload until 202: p50 {statistics.median(latencies) * 1000:.1f} ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms; all accepted in {accepted:.2f} s")
+        print(f"end to end: {len(latencies) / elapsed:,.0f} receipts/s")
+    stats = pipeline.stats()
+    print(f"pipeline: avg wait for a worker {stats['avg_queued_seconds'] * 1000:.1f} ms, "
+          f"avg OCR {stats['avg_ocr_seconds'] * 1000:.1f} ms")
+    print(f"peak Python memory allocated while uploading: {peak / 2**20:.1f} MiB "
+          f"({concurrency} bodies held in memory would be {concurrency * size_kib / 1024:.1f} MiB)")
+    await pipeline.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 16,
+        int(sys.argv[4]) if len(sys.argv) > 4 else 2048,
+    ))
@@ -0,0 +1,48 @@
+"""Recurring-payment detection on synthetic ledgers of growing size, single core.
+
+    python -m benchmarks.bench_recurring [max_rows]
+
+Builds one user's ledger of monthly and weekly subscriptions buried in
+irregular spending, doubling its size up to `max_rows`, and times detect()
+on each so the per-row cost can be checked to stay flat.
+"""
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from app.services.subscription_service import detect
+
+TODAY = date(2025, 6, 1)
+
+def synthetic_ledger(rows, seed=5):
+    rng = random.Random(seed)
+    start = datetime(2022, 6, 1, tzinfo=timezone.utc)
+    charges = []
+    merchant = 0
+    while len(charges) < rows:
+        merchant += 1
+        kind = rng.random()
+        if kind < 0.1:
+            step, count, amount = 30, 36, rng.choice([199.0, 499.0, 649.0])
+        elif kind < 0.15:
+            step, count, amount = 7, 150, rng.uniform(50, 300)
+        else:
+            step, count, amount = None, rng.randint(5, 60), None
+        for i in range(count):
+            offset = i * step if step else rng.randint(0, 1090)
+            charges.append((f"MERCHANT {merchant}", amount or rng.uniform(20, 2000),
+                            start + timedelta(days=offset), "Bills"))
+    return charges[:rows]
+
+def main(max_rows):
+    rows = 12500
+    while rows <= max_rows:
+        charges = synthetic_ledger(rows)
+        started = time.perf_counter()
+        suggestions = detect(charges, TODAY)
+        elapsed = time.perf_counter() - started
+        print(f"{rows:>9} rows: {elapsed:.3f}s ({elapsed / rows * 1e6:.2f} us/row), {len(suggestions)} suggestions")
+        rows *= 2
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 800000)
@@ -0,0 +1,68 @@
+"""Chat retrieval over one user's records, single core.
+
+    python -m benchmarks.bench_retrieval [records] [dimensions]
+
+Renders `records` synthetic transactions the way the index does, embeds
+and quantizes them, saves the matrix and memory-maps it back, then times
+top-k search for single questions and for a batch of 32.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from app.services.retrieval_service import embed, quantize, top_k
+
+MERCHANTS = [
+    ("Swiggy", "Food"), ("Zomato", "Food"), ("BigBasket", "Groceries"), ("DMart", "Groceries"),
+    ("Uber", "Transport"), ("Ola", "Transport"), ("Netflix", "Entertainment"), ("BookMyShow", "Entertainment"),
+    ("Amazon", "Shopping"), ("Myntra", "Shopping"), ("Apollo Pharmacy", "Health"), ("Airtel", "Bills"),
+]
+QUESTIONS = [
+    "how much did I spend on swiggy", "groceries from bigbasket in march", "uber rides last month",
+    "netflix subscription", "pharmacy bills", "amazon shopping in december", "airtel recharge",
+]
+
+def synthetic_records(count, seed=5):
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    records = []
+    for _ in range(count):
+        merchant, category = rng.choice(MERCHANTS)
+        day = start + timedelta(days=rng.randint(0, 900))
+        records.append(f"Expense of ₹{rng.uniform(50, 5000):,.2f} at {merchant} on {day.day} {day:%B %Y}, "
+                       f"category {category}")
+    return records
+
+def main(count, dim):
+    records = synthetic_records(count)
+    started = time.perf_counter()
+    vectors = quantize(embed(records, dim))
+    embedded = time.perf_counter() - started
+    path = os.path.join(tempfile.mkdtemp(), "vectors.npy")
+    np.save(path, vectors)
+    mapped = np.load(path, mmap_mode="r")
+    print(f"{count} records x {dim} dimensions: embedded in {embedded:.2f} s "
+          f"({count / embedded:,.0f}/s), {vectors.nbytes / 2**20:.1f} MiB on disk")
+
+    timings = []
+    for _ in range(20):
+        for question in QUESTIONS:
+            started = time.perf_counter()
+            top_k(mapped, embed([question], dim), 8)
+            timings.append(time.perf_counter() - started)
+    print(f"single question: median {statistics.median(timings) * 1000:.2f} ms, "
+          f"worst {max(timings) * 1000:.2f} ms")
+
+    batch = [QUESTIONS[i % len(QUESTIONS)] for i in range(32)]
+    started = time.perf_counter()
+    ids, _ = top_k(mapped, embed(batch, dim), 8)
+    elapsed = time.perf_counter() - started
+    print(f"batch of {len(batch)}: {elapsed * 1000:.2f} ms ({elapsed / len(batch) * 1000:.2f} ms per question)")
+    print(f'top hits for "{QUESTIONS[0]}": {[records[i] for i in ids[0][:3]]}')
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, int(sys.argv[2]) if len(sys.argv) > 2 else 512)
@@ -0,0 +1,41 @@
+"""Settlement planning for a large group, in memory.
+
+    python -m benchmarks.bench_settlement [participants] [splits]
+
+Builds `splits` synthetic equal splits of 2-8 people drawn from
+`participants` users, then times netting and the greedy transfer plan.
+"""
+import random
+import sys
+import time
+from app.services.split_service import net_balances, settle
+
+def synthetic_splits(participants, count, seed=7):
+    rng = random.Random(seed)
+    splits = []
+    for _ in range(count):
+        members = rng.sample(range(1, participants + 1), rng.randint(2, 8))
+        total = round(rng.uniform(5, 500), 2)
+        share = total / len(members)
+        splits.append([
+            {"user_id": member, "amount_paid": total if i == 0 else 0.0, "share_amount": share}
+            for i, member in enumerate(members)
+        ])
+    return splits
+
+def main(participants, count):
+    splits = synthetic_splits(participants, count)
+    started = time.perf_counter()
+    balances = net_balances(splits)
+    netted = time.perf_counter()
+    transfers, unbalanced = settle(balances)
+    elapsed = time.perf_counter() - started
+    print(f"{count} splits, {len(balances)} parties: netting {(netted - started) * 1000:.1f}ms, "
+          f"plan {(elapsed - (netted - started)) * 1000:.1f}ms, total {elapsed * 1000:.1f}ms")
+    print(f"{len(transfers)} transfers (at most {len(balances) - 1}), unbalanced {unbalanced / 100:.2f}")
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50000,
+    )
@@ -0,0 +1,54 @@
+"""SMS parsing throughput on a synthetic corpus, single core.
+
+    python -m benchmarks.bench_sms_parse [messages]
+
+Renders a pool of bank SMS from each bank's message formats with random
+amounts, merchants and dates (plus unknown senders and OTP noise), cycles
+it up to `messages` and times parse_batch over the lot.
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+from app.services.sms_service import parse_batch
+
+FORMATS = [
+    ("VM-HDFCBK", "Your HDFC Bank Card ending {acct} has been used for Rs.{amount} at {merchant} on {d:%d-%m-%y}. Available balance: Rs.15,550.00"),
+    ("AD-HDFCBK", "Rs.{amount} debited from a/c **{acct} on {d:%d-%m-%y} to VPA {vpa} (UPI Ref No 512345678901). Not you? Call 18002586161"),
+    ("JD-ICICIB-S", "ICICI Bank Acct XX{acct3} debited for Rs {amount} on {d:%d-%b-%y}; {merchant} credited. UPI:512345678901. Call 18002662 for dispute."),
+    ("VK-ICICIB", "Dear Customer, Acct XX{acct3} is credited with Rs {amount} on {d:%d-%b-%y} from {merchant}. UPI:512345678901-ICICI Bank."),
+    ("BZ-SBIUPI", "Dear UPI user A/C X{acct} debited by {amount} on date {d:%d%b%y} trf to {merchant} Refno 512345678901. If not u? call 1800111109. -SBI"),
+    ("AX-AXISBK", "INR {amount} spent on Axis Bank Card no. XX{acct} on {d:%d-%m-%y} at {merchant}. Avl Lmt INR 50,000.00. Not you? SMS BLOCK {acct} to 919951860002"),
+    ("VM-KOTAKB", "Sent Rs.{amount} from Kotak Bank AC X{acct} to {vpa} on {d:%d-%m-%y}.UPI Ref 512345678901. Not you, https://kotak.com/fraud"),
+    ("VM-FOOBNK", "Rs {amount} has been debited from your account ending {acct}"),
+    ("VM-HDFCBK", "{otp} is your OTP for txn of Rs {amount} at {merchant}. Valid for 5 mins. Do not share it with anyone."),
+]
+DATES = [date(2024, 1, 1) + timedelta(days=i) for i in range(730)]
+MERCHANTS = ["STARBUCKS COFFEE", "AMAZON PAY", "ZOMATO", "NETFLIX", "BIG BAZAAR", "RELIANCE FRESH", "UBER INDIA"]
+
+def synthetic_pool(size, seed=11):
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(size):
+        sender, text = rng.choice(FORMATS)
+        merchant = rng.choice(MERCHANTS)
+        acct = f"{rng.randint(0, 9999):04d}"
+        body = text.format(
+            acct=acct, acct3=acct[:3], amount=f"{rng.uniform(10, 50000):,.2f}", merchant=merchant,
+            vpa=merchant.split()[0].lower() + "@okaxis", otp=rng.randint(100000, 999999),
+            d=rng.choice(DATES),
+        )
+        pool.append((body, sender, None))
+    return pool
+
+def main(count):
+    pool = synthetic_pool(10000)
+    corpus = [pool[i % len(pool)] for i in range(count)]
+    started = time.perf_counter()
+    candidates, unparsed = parse_batch(corpus)
+    elapsed = time.perf_counter() - started
+    print(f"parsed {count} messages in {elapsed:.2f}s ({count / elapsed:,.0f} msgs/s): "
+          f"{len(candidates)} candidates, {len(unparsed)} not transactions")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
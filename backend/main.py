@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.database import init_db
+from app.db.database import init_db, close_db
 from app.api.auth import router as auth_router
 from app.api.transactions import router as transactions_router
 from app.api.debts import router as debts_router
@@ -20,6 +20,12 @@ from app.api.dashboard import router as dashboard_router
 from app.api.chat import router as chat_router
 from app.api.receipts import router as receipts_router
 from app.api.sms import router as sms_router
+from app.api.merchants import router as merchants_router
+from app.api.push import router as push_router
+from app.services import subscription_service
+from app.services.receipt_service import pipeline as receipt_pipeline
+from app.utils.push import push
+from app.utils.llm import llm
 
 app = FastAPI(title="LogUp Backend")
 
@@ -52,10 +58,21 @@ app.include_router(dashboard_router)
 app.include_router(chat_router)
 app.include_router(receipts_router)
 app.include_router(sms_router)
+app.include_router(merchants_router)
+app.include_router(push_router)
 
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    subscription_service.start_scheduler()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await subscription_service.stop_scheduler()
+    await receipt_pipeline.stop()
+    await push.stop()
+    await llm.aclose()
+    await close_db()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,4 @@
+import os
+
+# TestClient runs every request on its own event loop, so pooled asyncpg connections can't be reused
+os.environ.setdefault("DB_ASYNC_NULL_POOL", "true")
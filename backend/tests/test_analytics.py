@@ -38,4 +38,70 @@ async def test_get_analytics(client: TestClient, test_user: User):
     response = client.get(f"/analytics?user_id={test_user.id}")
     assert response.status_code == status.HTTP_200_OK
     assert "spending_by_category" in response.json()
-    assert "total_expenses" in response.json()
\ No newline at end of file
+    assert "total_expenses" in response.json()
+
+
+@pytest.mark.asyncio
+async def test_analytics_summary_tracks_transaction_writes(client: TestClient, test_user: User):
+    before = client.get(f"/analytics/summary?user_id={test_user.id}").json()
+    transaction_data = {"amount": 25.0, "category": "Food", "type": "expense", "timestamp": "2025-04-10T12:00:00"}
+    created = client.post(f"/transactions/?user_id={test_user.id}", json=transaction_data).json()
+    after = client.get(f"/analytics/summary?user_id={test_user.id}").json()
+    assert after["total_expenses"] == pytest.approx(before["total_expenses"] + 25.0)
+    client.delete(f"/transactions/{created['id']}?user_id={test_user.id}")
+    restored = client.get(f"/analytics/summary?user_id={test_user.id}").json()
+    assert restored["total_expenses"] == pytest.approx(before["total_expenses"])
+
+@pytest.mark.asyncio
+async def test_analytics_monthly_and_categories(client: TestClient, test_user: User):
+    transaction_data = {"amount": 40.0, "category": "Travel", "type": "expense", "timestamp": "2025-05-03T08:00:00"}
+    client.post(f"/transactions/?user_id={test_user.id}", json=transaction_data)
+    response = client.get(f"/analytics/monthly?user_id={test_user.id}&start_month=2025-05-01&end_month=2025-05-31")
+    assert response.status_code == status.HTTP_200_OK
+    assert [m["month"] for m in response.json()] == ["2025-05-01"]
+    response = client.get(f"/analytics/categories?user_id={test_user.id}&start_month=2025-05-01&end_month=2025-05-31")
+    assert response.status_code == status.HTTP_200_OK
+    assert any(c["category"] == "Travel" and c["total"] >= 40.0 for c in response.json())
+
+@pytest.mark.asyncio
+async def test_analytics_cache_invalidated_by_writes(client: TestClient, test_user: User):
+    client.get(f"/analytics/summary?user_id={test_user.id}")
+    stats = client.get("/analytics/cache/stats").json()
+    cached = client.get(f"/analytics/summary?user_id={test_user.id}").json()
+    assert client.get("/analytics/cache/stats").json()["hits"] == stats["hits"] + 1
+    client.post(f"/debts/?user_id={test_user.id}", json={"amount": 15.0})
+    fresh = client.get(f"/analytics/summary?user_id={test_user.id}").json()
+    assert fresh["total_debts"] == pytest.approx(cached["total_debts"] + 15.0)
+
+
+@pytest.mark.asyncio
+async def test_analytics_forecast_projects_subscriptions_and_debts(client: TestClient, test_user: User):
+    from datetime import datetime, timedelta, timezone
+    # The service plans from the UTC date
+    today = datetime.now(timezone.utc).date()
+
+    def forecast():
+        response = client.get(f"/analytics/forecast?user_id={test_user.id}&months=3")
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+
+    before = forecast()
+    assert before["days"][0]["date"] == (today + timedelta(days=1)).isoformat()
+    assert before["days"][-1]["balance"] == before["ending_balance"]
+
+    subscription = client.post(f"/subscriptions/?user_id={test_user.id}", json={
+        "name": "Forecast Test Plan", "amount": 111.11, "billing_cycle": "monthly",
+        "next_due_date": (today + timedelta(days=10)).isoformat(),
+    }).json()
+    debt = client.post(f"/debts/?user_id={test_user.id}", json={
+        "amount": 50.0, "description": "Forecast test debt", "due_date": (today + timedelta(days=5)).isoformat(),
+    }).json()
+    try:
+        after = forecast()
+        assert round(before["ending_balance"] - after["ending_balance"], 2) == round(3 * 111.11 + 50.0, 2)
+        due_day = next(d for d in after["days"] if d["date"] == (today + timedelta(days=10)).isoformat())
+        assert due_day["outflow"] >= 111.11
+    finally:
+        client.delete(f"/subscriptions/{subscription['id']}?user_id={test_user.id}")
+        client.delete(f"/debts/{debt['id']}?user_id={test_user.id}")
+    assert forecast()["ending_balance"] == before["ending_balance"]
@@ -5,6 +5,8 @@ from fastapi import status
 from app.db.database import get_db
 from sqlalchemy.orm import Session
 from app.db.models.user import User
+from app.services import budget_service
+from app.utils.cache import response_cache
 from main import app
 
 @pytest_asyncio.fixture
@@ -38,4 +40,40 @@ async def test_get_analytics(client: TestClient, test_user: User):
     response = client.get(f"/analytics?user_id={test_user.id}")
     assert response.status_code == status.HTTP_200_OK
     assert "spending_by_category" in response.json()
-    assert "total_expenses" in response.json()
\ No newline at end of file
+    assert "total_expenses" in response.json()
+
+
+def _spend(client, user_id, category, amount, timestamp):
+    data = {"amount": amount, "category": category, "type": "expense", "timestamp": timestamp}
+    return client.post(f"/transactions/?user_id={user_id}", json=data).json()
+
+def _utilization(client, user_id, budget_id):
+    response = client.get(f"/budgets/utilization?user_id={user_id}&active_on=2025-06-15")
+    assert response.status_code == status.HTTP_200_OK
+    return next(b for b in response.json() if b["id"] == budget_id)
+
+@pytest.mark.asyncio
+async def test_budget_utilization(client: TestClient, test_user: User):
+    budget_data = {"category": "Utilization", "amount": 200.0, "period": "monthly", "start_date": "2025-06-01", "end_date": "2025-06-30"}
+    budget = client.post(f"/budgets/?user_id={test_user.id}", json=budget_data).json()
+    before = _utilization(client, test_user.id, budget["id"])["spent"]
+    _spend(client, test_user.id, "Utilization", 50.0, "2025-06-30T23:00:00Z")
+    _spend(client, test_user.id, "Utilization", 70.0, "2025-07-01T00:30:00Z")
+    _spend(client, test_user.id, "Other", 20.0, "2025-06-10T12:00:00Z")
+    utilization = _utilization(client, test_user.id, budget["id"])
+    assert utilization["spent"] == pytest.approx(before + 50.0)
+    assert utilization["remaining"] == pytest.approx(200.0 - utilization["spent"])
+
+@pytest.mark.asyncio
+async def test_budget_spent_counter_matches_ledger(client: TestClient, test_user: User, monkeypatch):
+    monkeypatch.setattr(budget_service, "BUDGET_SPENT_COUNTER", True)
+    budget_data = {"category": "Counter", "amount": 100.0, "period": "monthly", "start_date": "2025-06-01", "end_date": "2025-06-30"}
+    first = _spend(client, test_user.id, "Counter", 10.0, "2025-06-02T12:00:00Z")
+    budget = client.post(f"/budgets/?user_id={test_user.id}", json=budget_data).json()
+    second = _spend(client, test_user.id, "Counter", 25.0, "2025-06-03T12:00:00Z")
+    client.put(f"/transactions/{second['id']}?user_id={test_user.id}", json={**second, "amount": 30.0})
+    client.delete(f"/transactions/{first['id']}?user_id={test_user.id}")
+    counted = _utilization(client, test_user.id, budget["id"])["spent"]
+    monkeypatch.setattr(budget_service, "BUDGET_SPENT_COUNTER", False)
+    await response_cache.invalidate_user(test_user.id)
+    assert _utilization(client, test_user.id, budget["id"])["spent"] == pytest.approx(counted)
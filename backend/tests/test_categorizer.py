@@ -0,0 +1,92 @@
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from fastapi import status
+from app.db.database import get_db
+from sqlalchemy.orm import Session
+from app.db.models.user import User
+from main import app
+
+@pytest_asyncio.fixture
+async def client():
+    return TestClient(app)
+
+@pytest_asyncio.fixture
+async def db_session():
+    db = next(get_db())
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest_asyncio.fixture
+async def test_user(db_session: Session):
+    user = db_session.query(User).filter(User.email == "categorizer@example.com").first()
+    if not user:
+        user = User(
+            username="categorizeruser",
+            email="categorizer@example.com",
+            password_hash="$2b$12$wHbQTgJT92Cnbzbp5/W3n.ud.JLZClxFPZIXuEsyWmGrBVX62pl6W",
+            phone_number="1234567897"
+        )
+        db_session.add(user)
+        db_session.commit()
+    return user
+
+
+def test_category_model_unlearn_restores_counts():
+    from app.services.categorizer_service import CategoryModel
+    model = CategoryModel(dim=64)
+    rows = [{"merchant_name": "Chai Point", "amount": 40.0, "type": "expense", "category": "Tea"}]
+    model.learn(rows)
+    assert len(model) == 1 and model.counts.sum() > 0
+    model.learn(rows, -1)
+    assert len(model) == 0 and model.counts.sum() == 0
+
+def test_category_model_does_not_learn_its_own_predictions():
+    from app.services.categorizer_service import CategoryModel, PREDICTED, categorize
+    model = CategoryModel(dim=64)
+    model.learn([{"merchant_name": "Chai Point", "amount": 40.0, "type": "expense", "category": "Tea"}] * 3)
+    rows = [{"merchant_name": "Chai Point", "amount": 45.0, "type": "expense", "category": None}]
+    assert categorize(model, rows, min_samples=1) == 1
+    assert (rows[0]["category"], rows[0]["category_source"]) == ("Tea", PREDICTED)
+    counts = model.counts.copy()
+    model.learn(rows)
+    model.learn(rows, -1)
+    assert len(model) == 3 and (model.counts == counts).all()
+
+@pytest.mark.asyncio
+async def test_create_transaction_predicts_missing_category(client: TestClient, test_user: User):
+    history = [
+        {"amount": 40.0 + i, "type": "expense", "timestamp": "2025-04-01T09:00:00Z",
+         "merchant_name": "Chai Point Koramangala", "category": "Tea"}
+        for i in range(15)
+    ] + [
+        {"amount": 900.0 + i, "type": "expense", "timestamp": "2025-04-01T09:00:00Z",
+         "merchant_name": "Sharma Auto Garage", "category": "Car Care"}
+        for i in range(15)
+    ]
+    response = client.post(f"/transactions/bulk?user_id={test_user.id}", json=history)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["inserted"] == 30
+
+    response = client.post(f"/transactions/?user_id={test_user.id}", json={
+        "amount": 45.0, "type": "expense", "timestamp": "2025-04-02T09:00:00Z", "merchant_name": "Chai Point HSR"
+    })
+    assert response.status_code == status.HTTP_201_CREATED
+    predicted = response.json()
+    assert (predicted["category"], predicted["category_source"]) == ("Tea", "predicted")
+
+    # Sent back by the user, the same category counts as theirs
+    response = client.put(f"/transactions/{predicted['id']}?user_id={test_user.id}", json={
+        "amount": 45.0, "type": "expense", "timestamp": "2025-04-02T09:00:00Z", "merchant_name": "Chai Point HSR",
+        "category": "Tea"
+    })
+    assert (response.json()["category"], response.json()["category_source"]) == ("Tea", None)
+
+    # An explicit category is never overridden
+    response = client.post(f"/transactions/?user_id={test_user.id}", json={
+        "amount": 950.0, "type": "expense", "timestamp": "2025-04-02T09:00:00Z",
+        "merchant_name": "Sharma Auto Garage", "category": "Repairs"
+    })
+    assert (response.json()["category"], response.json()["category_source"]) == ("Repairs", None)
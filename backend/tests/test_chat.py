@@ -42,4 +42,186 @@ async def test_send_chat_message(client: TestClient, test_user: User):
     response = client.post("/chat", json=chat_data)
     assert response.status_code == status.HTTP_200_OK
     assert "response" in response.json()
-    assert response.json()["user_id"] == test_user.id
\ No newline at end of file
+    assert response.json()["user_id"] == test_user.id
+
+@pytest.mark.asyncio
+async def test_chat_retrieves_matching_records(client: TestClient, test_user: User):
+    import uuid
+    merchant = f"Zest{uuid.uuid4().hex[:6]}"
+    client.post(f"/transactions/?user_id={test_user.id}", json={
+        "amount": 640.0, "type": "expense", "category": "Food", "merchant_name": merchant,
+        "timestamp": "2026-02-14T20:00:00Z",
+    })
+    response = client.post(f"/chat/message?user_id={test_user.id}", json={"content": f"What did I pay {merchant}?"})
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["context"][0]["kind"] == "transaction"
+    assert body["context"][0]["text"] == f"Expense of ₹640.00 at {merchant} on 14 February 2026, category Food"
+    assert body["context"][0]["text"] in body["response"]
+
+    # A new record changes the fingerprint, so the next question sees it
+    client.post(f"/goals/?user_id={test_user.id}", json={
+        "name": f"{merchant} tasting menu", "target_amount": 5000.0, "current_amount": 0.0, "target_date": "2027-01-01",
+    })
+    kinds = {d["kind"] for d in client.post(f"/chat/message?user_id={test_user.id}", json={"content": merchant}).json()["context"]}
+    assert kinds == {"transaction", "goal"}
+
+def _events(body):
+    import json
+    return [
+        (block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+        for block in body.strip().split("\n\n")
+    ]
+
+@pytest.mark.asyncio
+async def test_chat_stream_sends_tokens_and_saves_both_turns(client: TestClient, db_session: Session, test_user: User):
+    from app.db.models.message import Message
+    question = "What did I spend on Food?"
+    response = client.post(f"/chat/stream?user_id={test_user.id}", json={"content": question})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    assert events[0][0] == "context" and events[-1][0] == "done"
+    answer = "".join(data["text"] for name, data in events if name == "token")
+    assert len([name for name, _ in events if name == "token"]) > 5
+    assert answer == client.post(f"/chat/message?user_id={test_user.id}", json={"content": question}).json()["response"]
+    stored = db_session.query(Message).filter(Message.id.in_(events[-1][1]["message_ids"])).order_by(Message.id).all()
+    assert [(m.content, m.is_user) for m in stored] == [(question, True), (answer, False)]
+
+def test_chat_stream_stops_when_client_disconnects(db_session: Session, test_user: User, monkeypatch):
+    import asyncio
+    import json
+    import uuid
+    from sqlalchemy import func
+    from app.api import chat
+    from app.db.models.message import Message
+    from app.utils.llm import StubLLM
+
+    class CountingLLM(StubLLM):
+        generated = 0
+
+        async def stream(self, question, context):
+            async for token in super().stream(question, context):
+                CountingLLM.generated += 1
+                yield token
+
+    monkeypatch.setattr(chat, "llm", CountingLLM(token_delay=0.01))
+    question = f"Food spending {uuid.uuid4().hex[:8]}"
+
+    async def run():
+        inbox = asyncio.Queue()
+        inbox.put_nowait({"type": "http.request", "body": json.dumps({"content": question}).encode(), "more_body": False})
+        tokens = 0
+
+        async def send(message):
+            nonlocal tokens
+            if b"event: token" in message.get("body", b""):
+                tokens += 1
+                if tokens == 3:
+                    inbox.put_nowait({"type": "http.disconnect"})
+
+        scope = {
+            "type": "http", "method": "POST", "path": "/chat/stream", "root_path": "", "scheme": "http",
+            "query_string": f"user_id={test_user.id}".encode(), "http_version": "1.1",
+            "headers": [(b"content-type", b"application/json")], "client": ("test", 1), "server": ("test", 80),
+        }
+        await app(scope, inbox.get, send)
+        await asyncio.sleep(0.2)
+        await asyncio.gather(*chat._background_saves)
+
+    last_id = db_session.query(func.max(Message.id)).scalar() or 0
+    asyncio.run(run())
+    assert CountingLLM.generated < 6
+    stored = db_session.query(Message).filter(Message.user_id == test_user.id, Message.id > last_id).order_by(Message.id).all()
+    assert [m.is_user for m in stored] == [True, False]
+    assert stored[0].content == question and stored[1].content.startswith("Here is what")
+
+@pytest.mark.asyncio
+async def test_chat_answers_aggregate_questions_from_sql(client: TestClient, test_user: User):
+    import uuid
+    from datetime import datetime, timezone
+    tag = uuid.uuid4().hex[:6]
+    now = datetime.now(timezone.utc).isoformat()
+    for amount, merchant in [(120.0, f"Kiosk{tag}"), (380.0, f"Kiosk{tag}"), (75.0, f"Stall{tag}")]:
+        client.post(f"/transactions/?user_id={test_user.id}", json={
+            "amount": amount, "type": "expense", "category": f"Snacks{tag}", "merchant_name": merchant, "timestamp": now,
+        })
+
+    def ask(question):
+        return client.post(f"/chat/message?user_id={test_user.id}", json={"content": question}).json()
+
+    body = ask(f"How much did I spend on snacks{tag} this month?")
+    assert body["response"] == f"You spent ₹575.00 on Snacks{tag} this month across 3 transactions."
+    assert body["context"] == [] and body["query"]["intent"]["metric"] == "sum"
+    assert ask(f"How many transactions at kiosk{tag} this month?")["response"] == (
+        f"You have 2 expense transactions at kiosk{tag} this month, ₹500.00 in total."
+    )
+    assert ask(f"Top merchants for snacks{tag}")["query"]["rows"] == [[f"Kiosk{tag}", 500.0, 2], [f"Stall{tag}", 75.0, 1]]
+    # Not an aggregate question: retrieval and the model answer it
+    assert "query" not in ask(f"What did I pay Kiosk{tag}?")
+
+    events = _events(client.post(f"/chat/stream?user_id={test_user.id}", json={"content": f"Total spent on snacks{tag}"}).text)
+    assert [name for name, _ in events] == ["query", "token", "done"]
+    assert events[1][1]["text"] == f"You spent ₹575.00 on Snacks{tag} this month across 3 transactions."
+
+def test_chat_planner_parses_periods_and_groups():
+    from datetime import date
+    from app.services.chat_service import parse
+    today = date(2026, 3, 18)
+    intent = parse("What were my top 3 categories last month?", today)
+    assert (intent["metric"], intent["group"], intent["limit"]) == ("top", "category", 3)
+    assert intent["period"] == (date(2026, 2, 1), date(2026, 3, 1), "last month")
+    intent = parse("How much did I earn from Acme in december?", today)
+    assert (intent["type"], intent["term"], intent["period"][:2]) == ("income", "acme", (date(2025, 12, 1), date(2026, 1, 1)))
+    assert parse("How many transactions at swiggy in the last 7 days", today)["period"][:2] == (date(2026, 3, 12), date(2026, 3, 19))
+    assert parse("Any overdue debts with Ravi?", today) == {"subject": "debts", "period": None, "term": "ravi", "overdue": True}
+    assert parse("Tell me a joke", today) is None
+
+def test_chat_planner_leaves_the_grouping_out_of_the_term():
+    from datetime import date
+    from app.services.chat_service import parse
+    today = date(2026, 3, 18)
+    for question, term, group in [
+        ("How much did I spend on food by month", "food", "month"),
+        ("How much did I spend on groceries per merchant", "groceries", "merchant"),
+        ("How much did I spend at swiggy each month", "swiggy", "month"),
+        ("Total spent on food monthly", "food", "month"),
+        ("How much did I spend on travel by category last year", "travel", "category"),
+    ]:
+        intent = parse(question, today)
+        assert (intent["term"], intent["group"]) == (term, group), question
+
+def test_index_builds_leave_fresh_versions_for_their_readers(tmp_path):
+    import os
+    import time
+    from app.services import retrieval_service
+    records = [("goal", 1, "Goal Laptop: saved 100 of 900")]
+    first = retrieval_service.build(7, "aaaa", records, str(tmp_path))
+    # A concurrent build of another version doesn't pull the first out from under its readers
+    retrieval_service.build(7, "bbbb", records, str(tmp_path))
+    assert retrieval_service.load(7, "aaaa", str(tmp_path)).documents == first.documents
+    # ...until it has been superseded for a while
+    old = time.time() - retrieval_service.STALE_SECONDS - 1
+    for name in os.listdir(tmp_path / "7"):
+        if name.startswith("aaaa"):
+            os.utime(tmp_path / "7" / name, (old, old))
+    retrieval_service.build(7, "cccc", records, str(tmp_path))
+    assert retrieval_service.load(7, "aaaa", str(tmp_path)) is None
+    assert retrieval_service.load(7, "bbbb", str(tmp_path)) is not None
+
+def test_concurrent_builds_of_one_index_dont_collide(tmp_path):
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services import retrieval_service
+    records = [("goal", 1, "Goal Laptop: saved 100 of 900")] * 200
+    with ThreadPoolExecutor(8) as pool:
+        built = list(pool.map(lambda _: retrieval_service.build(7, "aaaa", records, str(tmp_path)), range(16)))
+    assert all(index.documents == records for index in built)
+    assert sorted(os.listdir(tmp_path / "7")) == ["aaaa.json", "aaaa.npy"]
+
+def test_chat_rejects_content_that_is_not_text(test_user: User):
+    client = TestClient(app)
+    for path in ("/chat/message", "/chat/stream"):
+        for body in ({"content": ["spend"]}, {"content": 5}, ["What did I spend?"]):
+            response = client.post(f"{path}?user_id={test_user.id}", json=body)
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert client.post(f"{path}?user_id={test_user.id}", json={"content": " "}).status_code == status.HTTP_400_BAD_REQUEST
\ No newline at end of file
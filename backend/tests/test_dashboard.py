@@ -0,0 +1,103 @@
+import pytest
+from datetime import datetime, timezone
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from fastapi import status
+from app.db.database import get_db
+from sqlalchemy.orm import Session
+from app.db.models.user import User
+from main import app
+
+@pytest_asyncio.fixture
+async def client():
+    return TestClient(app)
+
+@pytest_asyncio.fixture
+async def db_session():
+    db = next(get_db())
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest_asyncio.fixture
+async def test_user(db_session: Session):
+    user = db_session.query(User).filter(User.email == "dashboard@example.com").first()
+    if not user:
+        user = User(
+            username="dashboarduser",
+            email="dashboard@example.com",
+            password_hash="$2b$12$wHbQTgJT92Cnbzbp5/W3n.ud.JLZClxFPZIXuEsyWmGrBVX62pl6W",
+            phone_number="1234567899"
+        )
+        db_session.add(user)
+        db_session.commit()
+    return user
+
+
+@pytest.mark.asyncio
+async def test_dashboard_default_layout(client: TestClient, test_user: User):
+    for widget in client.get(f"/widgets/?user_id={test_user.id}").json():
+        client.delete(f"/widgets/{widget['id']}?user_id={test_user.id}")
+    response = client.get(f"/dashboard/?user_id={test_user.id}")
+    assert response.status_code == status.HTTP_200_OK
+    widgets = response.json()["widgets"]
+    assert [w["type"] for w in widgets][:2] == ["recent-transactions", "cash-flow-summary"]
+    assert all("elapsed_ms" in w and "error" not in w for w in widgets)
+
+@pytest.mark.asyncio
+async def test_dashboard_follows_widget_config(client: TestClient, test_user: User):
+    client.post(f"/transactions/?user_id={test_user.id}", json={"amount": 12.0, "category": "Food", "type": "expense", "timestamp": datetime.now(timezone.utc).isoformat()})
+    created = [
+        client.post(f"/widgets/?user_id={test_user.id}", json=data).json()
+        for data in [
+            {"widget_type": "debt-summary", "position": 2},
+            {"widget_type": "recent-transactions", "position": 1, "settings": {"limit": 1}},
+            {"widget_type": "goal-progress", "position": 3, "settings": {"enabled": False}},
+            {"widget_type": "no-such-widget", "position": 4},
+        ]
+    ]
+    try:
+        response = client.get(f"/dashboard/?user_id={test_user.id}")
+        assert response.status_code == status.HTTP_200_OK
+        widgets = response.json()["widgets"]
+        assert [w["type"] for w in widgets] == ["recent-transactions", "debt-summary", "no-such-widget"]
+        assert len(widgets[0]["data"]) == 1
+        assert widgets[0]["data"][0]["amount"] == 12.0
+        assert "total_pending" in widgets[1]["data"]
+        assert widgets[2]["data"] is None and "error" in widgets[2]
+    finally:
+        for widget in created:
+            client.delete(f"/widgets/{widget['id']}?user_id={test_user.id}")
+
+
+@pytest.mark.asyncio
+async def test_dashboard_widgets_share_a_bounded_number_of_sessions(client: TestClient, test_user: User, monkeypatch):
+    import asyncio
+    import weakref
+    from contextlib import asynccontextmanager
+    from app.services import dashboard_service
+    open_sessions = peak = 0
+    real = dashboard_service.new_async_session
+
+    @asynccontextmanager
+    async def counted():
+        nonlocal open_sessions, peak
+        open_sessions += 1
+        peak = max(peak, open_sessions)
+        try:
+            async with real() as db:
+                await asyncio.sleep(0.01)
+                yield db
+        finally:
+            open_sessions -= 1
+
+    monkeypatch.setattr(dashboard_service, "new_async_session", counted)
+    monkeypatch.setattr(dashboard_service, "DASHBOARD_MAX_SESSIONS", 2)
+    monkeypatch.setattr(dashboard_service, "_session_slots", weakref.WeakKeyDictionary())
+    for widget in client.get(f"/widgets/?user_id={test_user.id}").json():
+        client.delete(f"/widgets/{widget['id']}?user_id={test_user.id}")
+    response = client.get(f"/dashboard/?user_id={test_user.id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["widgets"]) == len(dashboard_service.DEFAULT_WIDGETS)
+    assert peak == 2
\ No newline at end of file
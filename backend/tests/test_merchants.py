@@ -0,0 +1,74 @@
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from fastapi import status
+from app.db.database import get_db
+from sqlalchemy.orm import Session
+from app.db.models.user import User
+from main import app
+
+@pytest_asyncio.fixture
+async def client():
+    return TestClient(app)
+
+@pytest_asyncio.fixture
+async def db_session():
+    db = next(get_db())
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest_asyncio.fixture
+async def test_user(db_session: Session):
+    user = db_session.query(User).filter(User.email == "merchants@example.com").first()
+    if not user:
+        user = User(
+            username="merchantsuser",
+            email="merchants@example.com",
+            password_hash="$2b$12$wHbQTgJT92Cnbzbp5/W3n.ud.JLZClxFPZIXuEsyWmGrBVX62pl6W",
+            phone_number="1234567898"
+        )
+        db_session.add(user)
+        db_session.commit()
+    return user
+
+
+def _create(client, user_id, **data):
+    data = {"amount": 10.0, "type": "expense", "timestamp": "2025-03-01T10:00:00Z", **data}
+    response = client.post(f"/transactions/?user_id={user_id}", json=data)
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.json()
+
+@pytest.mark.asyncio
+async def test_transactions_get_normalized_merchant_and_category(client: TestClient, test_user: User):
+    created = _create(client, test_user.id, merchant_name="AMZN MKTP IN*2X3")
+    assert (created["merchant_name"], created["category"]) == ("Amazon", "Shopping")
+    kept = _create(client, test_user.id, merchant_name="swiggy@icici", category="Office")
+    assert (kept["merchant_name"], kept["category"]) == ("Swiggy", "Office")
+    unknown = _create(client, test_user.id, merchant_name="GRANOLA CORNER")
+    assert (unknown["merchant_name"], unknown["category"]) == ("GRANOLA CORNER", None)
+    # Keywords match whole words only, at both ends
+    for name in ("OLAM AGRO", "UBEREATS 4411"):
+        unknown = _create(client, test_user.id, merchant_name=name)
+        assert (unknown["merchant_name"], unknown["category"]) == (name, None)
+    assert _create(client, test_user.id, merchant_name="OLA*CABS 12")["merchant_name"] == "Ola"
+
+@pytest.mark.asyncio
+async def test_user_rules_override_and_renormalize(client: TestClient, test_user: User):
+    created = _create(client, test_user.id, merchant_name="Amazon Pay India")
+    rule = client.post(
+        f"/merchants/rules?user_id={test_user.id}", json={"pattern": "amazon", "category": "Gifts"}
+    ).json()
+    try:
+        assert _create(client, test_user.id, merchant_name="AMAZON PAY*123")["category"] == "Gifts"
+        response = client.post(f"/merchants/renormalize?user_id={test_user.id}&overwrite_category=true")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["updated"] >= 1
+        refreshed = client.get(f"/transactions/{created['id']}?user_id={test_user.id}").json()
+        assert (refreshed["merchant_name"], refreshed["category"]) == ("Amazon", "Gifts")
+        categories = client.get(f"/analytics/categories?user_id={test_user.id}&start_month=2025-03-01&end_month=2025-03-31").json()
+        assert any(c["category"] == "Gifts" for c in categories)
+    finally:
+        client.delete(f"/merchants/rules/{rule['id']}?user_id={test_user.id}")
+    assert _create(client, test_user.id, merchant_name="AMAZON PAY*123")["category"] == "Shopping"
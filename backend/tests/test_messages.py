@@ -61,4 +61,38 @@ async def test_get_messages(client: TestClient, db_session: Session, test_user:
     response = client.get(f"/messages?user_id={test_user.id}")
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) >= 1
-    assert any(m["content"] == "Pay me back for lunch!" for m in response.json())
\ No newline at end of file
+    assert any(m["content"] == "Pay me back for lunch!" for m in response.json())
+
+@pytest.mark.asyncio
+async def test_conversation_paging_and_unread_counter(client: TestClient, test_user: User):
+    friend = client.post(f"/friends/?user_id={test_user.id}", json={"name": "Ravi"}).json()
+
+    def unread():
+        friends = client.get(f"/friends/?user_id={test_user.id}").json()
+        return next(f["unread_count"] for f in friends if f["id"] == friend["id"])
+
+    sent = []
+    for day, is_user in [(1, False), (2, True), (3, False), (4, False)]:
+        sent.append(client.post(f"/messages/?user_id={test_user.id}", json={
+            "content": f"day {day}", "is_user": is_user, "friend_id": friend["id"],
+            "timestamp": f"2026-01-0{day}T10:00:00Z",
+        }).json())
+    assert unread() == 3
+
+    page = client.get(f"/messages/conversations/{friend['id']}?user_id={test_user.id}&limit=3").json()
+    assert [m["content"] for m in page["items"]] == ["day 4", "day 3", "day 2"]
+    older = client.get(
+        f"/messages/conversations/{friend['id']}?user_id={test_user.id}&limit=3&before={page['next_cursor']}"
+    ).json()
+    assert [m["content"] for m in older["items"]] == ["day 1"] and older["next_cursor"] is None
+
+    read = client.post(
+        f"/messages/conversations/{friend['id']}/read?user_id={test_user.id}&up_to=2026-01-03T10:00:00Z"
+    ).json()
+    assert read == {"friend_id": friend["id"], "marked": 2, "unread_count": 1}
+    assert client.get(f"/messages/{sent[0]['id']}?user_id={test_user.id}").json()["is_read"] is True
+
+    client.delete(f"/messages/{sent[3]['id']}?user_id={test_user.id}")
+    assert unread() == 0
+    assert client.post(f"/messages/conversations/{friend['id']}/read?user_id={test_user.id}").json()["marked"] == 0
+    assert client.post(f"/messages/conversations/{friend['id'] + 10**6}/read?user_id={test_user.id}").status_code == 404
\ No newline at end of file
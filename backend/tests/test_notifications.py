@@ -61,4 +61,52 @@ async def test_mark_notification_read(client: TestClient, db_session: Session, t
     response = client.post(f"/notifications/{nudge.id}/mark-read")
     assert response.status_code == status.HTTP_200_OK
     db_nudge = db_session.query(Nudge).filter(Nudge.id == nudge.id).first()
-    assert db_nudge.is_read is True
\ No newline at end of file
+    assert db_nudge.is_read is True
+
+@pytest.mark.asyncio
+async def test_nudge_job_dedupes_and_drops_resolved_nudges(client: TestClient, test_user: User):
+    import uuid
+    from datetime import datetime, timedelta, timezone
+    from app.db.database import new_async_session
+    from app.services.notification_service import generate_nudges
+
+    async def run():
+        async with new_async_session() as db:
+            await generate_nudges(db, [test_user.id], today)
+            await db.commit()
+        items = client.get(f"/notifications/?user_id={test_user.id}&limit=100").json()["items"]
+        return {n["dedupe_key"]: n for n in items if n["dedupe_key"] and tag in n["content"]}
+
+    today = datetime.now(timezone.utc).date()
+    tag = uuid.uuid4().hex[:8]
+    budget = client.post(f"/budgets/?user_id={test_user.id}", json={
+        "category": f"Snacks {tag}", "amount": 100.0, "period": "monthly",
+        "start_date": today.isoformat(), "end_date": (today + timedelta(days=30)).isoformat(),
+    }).json()
+    client.post(f"/transactions/?user_id={test_user.id}", json={
+        "amount": 85.0, "type": "expense", "category": f"Snacks {tag}", "timestamp": f"{today.isoformat()}T12:00:00Z",
+    })
+    debt = client.post(f"/debts/?user_id={test_user.id}", json={
+        "amount": 500.0, "description": f"Loan {tag}", "due_date": (today + timedelta(days=2)).isoformat(),
+    }).json()
+    client.post(f"/goals/?user_id={test_user.id}", json={
+        "name": f"Trip {tag}", "target_amount": 1000.0, "current_amount": 0.0,
+        "target_date": (today + timedelta(days=10)).isoformat(),
+    })
+
+    nudges = await run()
+    assert sorted(n["type"] for n in nudges.values()) == ["budget", "goal"]
+    assert f"budget:{budget['id']}:80" in nudges
+    assert "Consider saving ₹100 daily" in next(n["content"] for n in nudges.values() if n["type"] == "goal")
+    debt_key = f"debt:{debt['id']}:{debt['due_date']}"
+    assert any(n["dedupe_key"] == debt_key for n in client.get(f"/notifications/?user_id={test_user.id}&limit=100").json()["items"])
+
+    budget_nudge = nudges[f"budget:{budget['id']}:80"]
+    client.post(f"/notifications/{budget_nudge['id']}/dismiss?user_id={test_user.id}")
+    client.put(f"/debts/{debt['id']}?user_id={test_user.id}", json={**debt, "status": "paid"})
+    again = await run()
+    assert again[f"budget:{budget['id']}:80"]["id"] == budget_nudge["id"]
+    assert again[f"budget:{budget['id']}:80"]["status"] == "dismissed"
+    assert len(again) == len(nudges)
+    items = client.get(f"/notifications/?user_id={test_user.id}&limit=100").json()["items"]
+    assert not any(n["dedupe_key"] == debt_key for n in items)
\ No newline at end of file
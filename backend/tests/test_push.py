@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from app.db.database import get_db
+from sqlalchemy.orm import Session
+from app.db.models.user import User
+from app.utils.push import ConnectionRegistry, RedisBroadcastBackend, Push
+from main import app
+
+@pytest_asyncio.fixture
+async def client():
+    # One event loop for every request, so the socket and the POST share the push registry's loop
+    with TestClient(app) as client:
+        yield client
+
+@pytest_asyncio.fixture
+async def db_session():
+    db = next(get_db())
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest_asyncio.fixture
+async def test_user(db_session: Session):
+    user = db_session.query(User).filter(User.email == "test@example.com").first()
+    if not user:
+        user = User(
+            username="testuser",
+            email="test@example.com",
+            password_hash="$2b$12$wHbQTgJT92Cnbzbp5/W3n.ud.JLZClxFPZIXuEsyWmGrBVX62pl6W",
+            phone_number="1234567890"
+        )
+        db_session.add(user)
+        db_session.commit()
+    return user
+
+@pytest.mark.asyncio
+async def test_new_message_and_notification_are_pushed(client: TestClient, test_user: User):
+    with client.websocket_connect(f"/push/ws?user_id={test_user.id}") as socket:
+        assert client.get("/push/stats").json()["connections"] >= 1
+        message = client.post(f"/messages/?user_id={test_user.id}", json={
+            "content": "Dinner was ₹1,200, split?", "is_user": True, "timestamp": "2026-01-05T20:00:00Z",
+        }).json()
+        nudge = client.post(f"/notifications/?user_id={test_user.id}", json={
+            "type": "reminder", "content": "Settle up with Ravi",
+        }).json()
+        assert socket.receive_json() == {"type": "message", "data": message}
+        assert socket.receive_json() == {"type": "notification", "data": nudge}
+
+def test_slow_connection_drops_oldest_events():
+    async def run():
+        registry = ConnectionRegistry(queue_size=2)
+        queue = registry.connect(7)
+        for i in range(3):
+            registry.deliver(7, {"type": "message", "data": i})
+        registry.deliver(8, {"type": "message", "data": "nobody listening"})
+        assert [queue.get_nowait()["data"] for _ in range(2)] == [1, 2]
+        registry.disconnect(7, queue)
+        return registry.stats()
+
+    assert asyncio.run(run()) == {"users": 0, "connections": 0, "delivered": 3, "dropped": 1}
+
+def test_redis_backend_fans_out_across_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def run():
+        server = fakeredis.FakeServer()
+        workers = []
+        for _ in range(2):
+            registry = ConnectionRegistry()
+            workers.append(Push(registry, RedisBroadcastBackend(registry, client=fakeredis.FakeAsyncRedis(server=server))))
+        queue = await workers[1].connect(42)
+        await workers[0].backend.start()
+        while (await workers[0].backend.client.pubsub_numsub("push:events"))[0][1] < 2:
+            await asyncio.sleep(0.01)
+        await workers[0].publish(42, "notification", {"content": "Budget exceeded"})
+        event = await asyncio.wait_for(queue.get(), 5)
+        for worker in workers:
+            await worker.stop()
+        return event
+
+    assert asyncio.run(run()) == {"type": "notification", "data": {"content": "Budget exceeded"}}
+
+def test_redis_backend_restarts_a_dead_subscriber():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    class FlakyRedis(fakeredis.FakeAsyncRedis):
+        # The first subscription's connection drops as it starts listening
+        calls = 0
+
+        def pubsub(self, **kwargs):
+            FlakyRedis.calls += 1
+            pubsub = super().pubsub(**kwargs)
+            if FlakyRedis.calls == 1:
+                async def listen():
+                    raise ConnectionError("Connection closed by server.")
+                    yield
+                pubsub.listen = listen
+            return pubsub
+
+    async def run():
+        registry = ConnectionRegistry()
+        backend = RedisBroadcastBackend(registry, client=FlakyRedis(server=fakeredis.FakeServer()),
+                                        restart_seconds=0.01)
+        push = Push(registry, backend)
+        queue = await push.connect(42)
+        # The backoff resets once the restarted subscriber is subscribed
+        while backend.restarts < 1 or backend.failures:
+            await asyncio.sleep(0.01)
+        await push.publish(42, "notification", {"content": "Back online"})
+        event = await asyncio.wait_for(queue.get(), 5)
+        await push.stop()
+        return event, backend.restarts, backend.failures, backend.listener
+
+    assert asyncio.run(run()) == ({"type": "notification", "data": {"content": "Back online"}}, 1, 0, None)
\ No newline at end of file
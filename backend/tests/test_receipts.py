@@ -61,4 +61,217 @@ async def test_mark_notification_read(client: TestClient, db_session: Session, t
     response = client.post(f"/notifications/{nudge.id}/mark-read")
     assert response.status_code == status.HTTP_200_OK
     db_nudge = db_session.query(Nudge).filter(Nudge.id == nudge.id).first()
-    assert db_nudge.is_read is True
\ No newline at end of file
+    assert db_nudge.is_read is True
+
+def test_receipt_upload_is_spooled_and_read_in_a_worker_process(test_user: User):
+    import uuid
+    # Unique bytes, or a rerun would be an exact duplicate of the last run's upload
+    receipt_text = (f"Cafe Mocha\nDate: 12/03/2026\nOrder {uuid.uuid4().hex[:8]}\nLatte 2 x 120.00  240.00\n"
+                    f"GST 12.00\nGrand Total Rs. 252.00\n").encode()
+    with TestClient(app) as client:
+        with client.websocket_connect(f"/push/ws?user_id={test_user.id}") as socket:
+            response = client.post(f"/receipts/upload?user_id={test_user.id}",
+                                   files={"file": ("mocha.jpg", receipt_text, "image/jpeg")})
+            assert response.status_code == status.HTTP_202_ACCEPTED
+            job = response.json()
+            assert (job["status"], job["filename"], job["size"]) == ("queued", "mocha.jpg", len(receipt_text))
+            event = socket.receive_json()
+        assert event["type"] == "receipt" and event["data"]["id"] == job["id"]
+        receipt = client.get(f"/receipts/{job['id']}?user_id={test_user.id}").json()
+        assert (receipt["status"], receipt["merchant_name"], receipt["amount"], receipt["receipt_date"]) == (
+            "done", "Cafe Mocha", 252.0, "2026-03-12"
+        )
+        assert receipt["ocr_seconds"] is not None
+        # Nothing imported matches it, so it was recorded as an expense of its own
+        assert receipt["transaction_id"] is not None and receipt["match_score"] is None
+        assert client.get(f"/receipts/{job['id']}?user_id={test_user.id + 1}").status_code == status.HTTP_404_NOT_FOUND
+        stats = client.get("/receipts/stats").json()
+        assert stats["completed"] >= 1 and stats["in_flight"] == 0
+
+    rejected = client.post(f"/receipts/upload?user_id={test_user.id}", files={"file": ("notes.txt", b"hi", "text/plain")})
+    assert rejected.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    assert client.post(f"/receipts/upload?user_id={test_user.id}", data={"note": "no file"}).status_code == status.HTTP_400_BAD_REQUEST
+
+def test_receipt_upload_backpressure(test_user: User, monkeypatch):
+    import os
+    from app.api import receipts
+    from app.services.receipt_service import ReceiptPipeline
+    client = TestClient(app)
+    busy = ReceiptPipeline(workers=1, queue_size=1)
+    assert busy.reserve() and not busy.reserve()
+    monkeypatch.setattr(receipts, "pipeline", busy)
+    response = client.post(f"/receipts/upload?user_id={test_user.id}", files={"file": ("r.jpg", b"TOTAL 10.00", "image/jpeg")})
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["retry-after"] == "1"
+    assert busy.stats()["rejected"] == 2
+
+    # A refused upload gives its slot back and leaves nothing spooled
+    busy.release()
+    monkeypatch.setattr(receipts, "RECEIPT_MAX_BYTES", 8)
+    spooled = set(os.listdir(receipts.RECEIPT_SPOOL_DIR)) if os.path.isdir(receipts.RECEIPT_SPOOL_DIR) else set()
+    response = client.post(f"/receipts/upload?user_id={test_user.id}", files={"file": ("r.jpg", b"TOTAL 10.00", "image/jpeg")})
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert busy.in_flight == 0 and set(os.listdir(receipts.RECEIPT_SPOOL_DIR)) == spooled
+
+def _receipt_photo(seed, scale=1.0, quality=90, total=False):
+    import io
+    import random
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    image = Image.new("L", (600, 1400), 245)
+    draw = ImageDraw.Draw(image)
+    y = 40
+    while y < 1340:
+        left = rng.randint(30, 120)
+        draw.rectangle([left, y, rng.randint(left + 60, 570), y + rng.randint(8, 18)], fill=rng.randint(10, 80))
+        y += rng.randint(25, 60)
+    if total:
+        # A different amount printed on the total line
+        draw.rectangle([380, 1290, 570, 1340], fill=245)
+        draw.rectangle([420, 1300, 560, 1325], fill=20)
+    image = image.resize((int(600 * scale), int(1400 * scale)))
+    out = io.BytesIO()
+    image.convert("RGB").save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+def test_duplicate_receipts_are_not_stored_or_read_twice(test_user: User):
+    pytest.importorskip("PIL")
+    import io
+    import time
+    import uuid
+    from PIL import Image
+    seed = uuid.uuid4().int
+    photo = _receipt_photo(seed)
+    with TestClient(app) as client:
+        def upload(data):
+            return client.post(f"/receipts/upload?user_id={test_user.id}", files={"file": ("r.jpg", data, "image/jpeg")})
+
+        first = upload(photo)
+        assert first.status_code == status.HTTP_202_ACCEPTED and first.json()["duplicate"] is None
+        receipt_id = first.json()["id"]
+        again = upload(photo)
+        assert again.status_code == status.HTTP_200_OK
+        assert (again.json()["id"], again.json()["duplicate"], again.json()["distance"]) == (receipt_id, "exact", 0)
+        # The same receipt shrunk and recompressed, as chat apps forward photos: flagged, but still
+        # stored and read, since a look-alike may be another receipt from the same shop
+        resent = upload(_receipt_photo(seed, scale=0.6, quality=60))
+        assert resent.status_code == status.HTTP_202_ACCEPTED
+        assert resent.json()["id"] != receipt_id
+        assert (resent.json()["duplicate"], resent.json()["duplicate_of"]) == ("similar", receipt_id)
+        other = upload(_receipt_photo(seed + 1))
+        assert other.status_code == status.HTTP_202_ACCEPTED and other.json()["duplicate"] is None
+        # Same template, another total: never dropped
+        other_total = upload(_receipt_photo(seed, total=True))
+        assert other_total.status_code == status.HTTP_202_ACCEPTED and other_total.json()["id"] != receipt_id
+        assert _wait_for(client, other_total.json()["id"], test_user.id)["status"] == "done"
+
+        deadline = time.monotonic() + 30
+        while client.get(f"/receipts/{receipt_id}?user_id={test_user.id}").json()["status"] == "queued":
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        image = client.get(f"/receipts/{receipt_id}/image?user_id={test_user.id}")
+        assert image.content == photo and image.headers["content-type"] == "image/jpeg"
+        thumbnail = client.get(f"/receipts/{receipt_id}/thumbnail?user_id={test_user.id}")
+        assert thumbnail.status_code == status.HTTP_200_OK and "immutable" in thumbnail.headers["cache-control"]
+        assert max(Image.open(io.BytesIO(thumbnail.content)).size) <= 320
+        assert client.get(f"/receipts/{receipt_id}/thumbnail?user_id={test_user.id + 1}").status_code == status.HTTP_404_NOT_FOUND
+
+def test_hamming_index_finds_near_hashes():
+    import random
+    from app.utils.images import HammingIndex
+    rng = random.Random(3)
+    index = HammingIndex()
+    keys = [rng.getrandbits(256) for _ in range(100)]
+    for i, key in enumerate(keys):
+        index.add(key, i)
+    near = keys[42] ^ (1 << 7) ^ (1 << 200)
+    assert index.search(near, 10) == [(2, 42)]
+    assert index.search(keys[7], 0) == [(0, 7)]
+    assert HammingIndex().search(near, 10) == []
+
+def _wait_for(client, receipt_id, user_id):
+    import time
+    deadline = time.monotonic() + 30
+    while (receipt := client.get(f"/receipts/{receipt_id}?user_id={user_id}").json())["status"] == "queued":
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    return receipt
+
+def test_read_receipts_attach_to_the_imported_expense(db_session: Session, test_user: User):
+    import random
+    from datetime import date, datetime, timezone
+    from app.db.models.receipt import Receipt, ReceiptStatus
+    from app.db.models.transaction import Transaction, TransactionType
+    # An amount no other run or test has, so leftovers of earlier runs can't compete
+    amount = round(random.uniform(300, 900), 2)
+
+    def expense(merchant, amount, when):
+        transaction = Transaction(user_id=test_user.id, amount=amount, merchant_name=merchant, description=f"UPI/{merchant}",
+                                  bank_name="HDFC", type=TransactionType.expense, timestamp=when)
+        db_session.add(transaction)
+        db_session.commit()
+        return transaction.id
+
+    imported = expense("Swiggy", amount, datetime(2019, 6, 14, 20, 15, tzinfo=timezone.utc))
+    # Same amount and near the date but another shop; same shop but another amount
+    expense("Uber", amount, datetime(2019, 6, 15, 9, 0, tzinfo=timezone.utc))
+    expense("Swiggy", round(amount * 1.3, 2), datetime(2019, 6, 14, 20, 0, tzinfo=timezone.utc))
+    with TestClient(app) as client:
+        def upload(text):
+            response = client.post(f"/receipts/upload?user_id={test_user.id}",
+                                   files={"file": ("r.jpg", text.encode(), "image/jpeg")})
+            assert response.status_code == status.HTTP_202_ACCEPTED
+            return _wait_for(client, response.json()["id"], test_user.id)
+
+        receipt = upload(f"BUNDL TECHNOLOGIES PVT LTD\nDate: 14/06/2019\nItems 3\nTotal {amount:.2f}\n")
+        assert receipt["transaction_id"] == imported and receipt["match_score"] >= 0.9
+        # A cash purchase has no imported expense, so it becomes one
+        cash_amount = round(amount + 1000, 2)
+        cash = upload(f"Shree Ganesh Stores\nDate: 20/06/2019\nTotal {cash_amount:.2f}\n")
+        created = client.get(f"/transactions/{cash['transaction_id']}?user_id={test_user.id}").json()
+        assert (created["amount"], created["merchant_name"], created["type"]) == (cash_amount, "Shree Ganesh Stores", "expense")
+        assert created["timestamp"].startswith("2019-06-20")
+
+        # Receipts read before their SMS arrived are picked up by the month's batch
+        late = Receipt(user_id=test_user.id, status=ReceiptStatus.done, content_type="image/jpeg", size=1,
+                       merchant_name="Tata Starbucks", amount=amount, receipt_date=date(2019, 7, 3))
+        db_session.add(late)
+        db_session.commit()
+        sms = expense("Starbucks", amount, datetime(2019, 7, 4, 8, 30, tzinfo=timezone.utc))
+        response = client.post(f"/receipts/match?user_id={test_user.id}&month=2019-07-01&create=false")
+        assert response.json() == {"receipts": 1, "matched": 1, "created": 0, "unmatched": 0, "skipped": 0}
+        assert client.get(f"/receipts/{late.id}?user_id={test_user.id}").json()["transaction_id"] == sms
+
+def test_receipt_left_unsaved_is_marked_failed(db_session: Session, test_user: User, monkeypatch):
+    import asyncio
+    import uuid
+    from concurrent.futures import ThreadPoolExecutor
+    from sqlalchemy.exc import OperationalError
+    from app.db.models.receipt import Receipt
+    from app.services import receipt_service
+    receipt = Receipt(user_id=test_user.id, filename="r.jpg", content_type="image/jpeg", size=1, sha256=uuid.uuid4().hex * 2)
+    db_session.add(receipt)
+    db_session.commit()
+    read = {"merchant_name": "Cafe Mocha", "amount": 252.0, "receipt_date": None, "text": "",
+            "started_at": 0.0, "seconds": 0.1}
+    monkeypatch.setattr(receipt_service.ocr, "extract", lambda path, backend: read)
+    thumbnails = []
+    monkeypatch.setattr(receipt_service, "thumbnail", lambda *args: thumbnails.append(args))
+
+    async def lost_connection(*args):
+        raise OperationalError("UPDATE receipts", {}, Exception("server closed the connection"))
+    monkeypatch.setattr(receipt_service, "_save", lost_connection)
+
+    async def run():
+        pipeline = receipt_service.ReceiptPipeline(workers=1, queue_size=1)
+        pipeline.executor = ThreadPoolExecutor(1)
+        assert pipeline.reserve()
+        await pipeline.submit(receipt.id, test_user.id, receipt.sha256)
+        pipeline.executor.shutdown()
+        return pipeline.in_flight
+
+    # The thumbnail ran in the OCR's slot, and the slot was given back
+    assert asyncio.run(run()) == 0 and len(thumbnails) == 1
+    db_session.refresh(receipt)
+    assert receipt.status.value == "failed" and receipt.error.startswith("OperationalError")
+    assert receipt.processed_at is not None
\ No newline at end of file
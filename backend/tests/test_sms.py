@@ -41,4 +41,24 @@ async def test_send_sms(client: TestClient, test_user: User):
     }
     response = client.post("/sms", json=sms_data)
     assert response.status_code == status.HTTP_200_OK
-    assert response.json()["status"] == "sent"
\ No newline at end of file
+    assert response.json()["status"] == "sent"
+
+@pytest.mark.asyncio
+async def test_parse_sms_batch(client: TestClient, test_user: User):
+    messages = [
+        {"sender": "VM-HDFCBK", "body": "Your HDFC Bank Card ending 1234 has been used for Rs.450.00 at STARBUCKS COFFEE on 21-01-25. Available balance: Rs.15,550.00"},
+        {"sender": "BZ-SBIUPI", "body": "Dear UPI user A/C X5678 debited by 250.0 on date 22Jan25 trf to ZOMATO Refno 512345678901. If not u? call 1800111109. -SBI"},
+        {"sender": "VM-HDFCBK", "body": "123456 is your OTP for txn of Rs 500 at AMAZON. Do not share it with anyone."},
+        {"sender": "VM-NEWBNK", "body": "Rs 1,200.50 has been credited to your account"},
+    ]
+    response = client.post(f"/sms/parse/batch?user_id={test_user.id}", json={"messages": messages})
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    assert result["unparsed"] == [2]
+    first, second, fourth = result["candidates"]
+    assert (first["bank_name"], first["merchant_name"], first["amount"], first["type"]) == ("HDFC Bank", "Starbucks", 450.0, "expense")
+    assert first["confidence"] == "high" and first["account_last4"] == "1234"
+    assert first["category"] == "Food & Dining"
+    assert first["timestamp"].startswith("2025-01-21")
+    assert (second["bank_name"], second["merchant_name"], second["index"]) == ("State Bank of India", "Zomato", 1)
+    assert (fourth["amount"], fourth["type"], fourth["confidence"], fourth["bank_name"]) == (1200.5, "income", "low", None)
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from app.db.models.user import User
 from app.db.models.split_expense import SplitExpense
 from app.db.schemas.split_expense import SplitExpenseCreate, SplitExpense as SplitExpenseSchema
+from app.services import split_service
 from main import app
 
 @pytest_asyncio.fixture
@@ -63,4 +64,57 @@ async def test_get_split_expenses(client: TestClient, db_session: Session, test_
     response = client.get(f"/split-expenses?user_id={test_user.id}")
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) >= 1
-    assert any(s["description"] == "Lunch split" for s in response.json())
\ No newline at end of file
+    assert any(s["description"] == "Lunch split" for s in response.json())
+
+@pytest.mark.asyncio
+async def test_split_settlement_plan(client: TestClient, test_user: User):
+    # 1 paid 90 for three, then 2 paid 30 for 2 and 3: 3 owes 40, 2 owes 10, both to 1
+    splits = [
+        {"description": "Cab", "total_amount": 90.0, "split_type": "equal", "participants": [
+            {"user_id": 1, "amount_paid": 90.0, "share_amount": 30.0},
+            {"user_id": 2, "amount_paid": 0.0, "share_amount": 30.0},
+            {"user_id": 3, "amount_paid": 0.0, "share_amount": 30.0},
+        ]},
+        {"description": "Snacks", "total_amount": 30.0, "split_type": "equal", "participants": [
+            {"user_id": 2, "amount_paid": 30.0, "share_amount": 10.0},
+            {"user_id": 3, "amount_paid": 0.0, "share_amount": 10.0},
+            {"user_id": 1, "amount_paid": 0.0, "share_amount": 10.0},
+        ]},
+    ]
+    ids = [client.post(f"/split_expenses/?user_id={test_user.id}", json=s).json()["id"] for s in splits]
+    query = "&".join(f"split_ids={id}" for id in ids)
+    response = client.get(f"/split_expenses/settlement?user_id={test_user.id}&{query}&include_debts=false")
+    assert response.status_code == status.HTTP_200_OK
+    plan = response.json()
+    transfers = {(t["payer_id"], t["payee_id"]): t["amount"] for t in plan["transfers"]}
+    assert transfers == {(3, 1): 40.0, (2, 1): 10.0}
+    assert plan["unbalanced"] == 0.0
+
+def test_settle_absorbs_rounded_shares():
+    participants = [
+        {"user_id": 1, "amount_paid": 100.0, "share_amount": 33.33},
+        {"user_id": 2, "amount_paid": 0.0, "share_amount": 33.33},
+        {"user_id": 3, "amount_paid": 0.0, "share_amount": 33.33},
+    ]
+    transfers, unbalanced = split_service.settle(split_service.net_balances([participants]))
+    assert sorted(transfers) == [(("user", 2), ("user", 1), 3333), (("user", 3), ("user", 1), 3333)]
+    assert unbalanced == 0
+
+@pytest.mark.asyncio
+async def test_split_participants_owed_and_participating(client: TestClient, test_user: User):
+    friend_id = 987654
+    before = client.get(f"/split_expenses/owed?user_id={friend_id}").json()["total_owed"]
+    split_data = {"description": "Groceries", "total_amount": 60.0, "split_type": "equal", "participants": [
+        {"user_id": test_user.id, "amount_paid": 60.0, "share_amount": 30.0},
+        {"user_id": friend_id, "amount_paid": 0.0, "share_amount": 30.0},
+    ]}
+    split = client.post(f"/split_expenses/?user_id={test_user.id}", json=split_data).json()
+    owed = client.get(f"/split_expenses/owed?user_id={friend_id}").json()
+    assert owed["total_owed"] == pytest.approx(before + 30.0)
+    assert any(o["user_id"] == test_user.id for o in owed["by_user"])
+    participating = client.get(f"/split_expenses/participating?user_id={friend_id}").json()
+    assert any(s["id"] == split["id"] for s in participating["items"])
+    split_data["participants"][1]["amount_paid"] = 10.0
+    client.put(f"/split_expenses/{split['id']}?user_id={test_user.id}", json=split_data)
+    owed = client.get(f"/split_expenses/owed?user_id={friend_id}").json()
+    assert owed["total_owed"] == pytest.approx(before + 20.0)
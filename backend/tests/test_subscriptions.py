@@ -63,4 +63,103 @@ async def test_get_subscriptions(client: TestClient, db_session: Session, test_u
     response = client.get(f"/subscriptions?user_id={test_user.id}")
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) >= 1
-    assert any(s["service_name"] == "Spotify" for s in response.json())
\ No newline at end of file
+    assert any(s["service_name"] == "Spotify" for s in response.json())
+
+@pytest.mark.asyncio
+async def test_subscription_suggestions_from_monthly_charges(client: TestClient, test_user: User):
+    from datetime import datetime, timedelta, timezone
+    now = datetime.now(timezone.utc)
+    charges = [
+        {"amount": 649.0, "type": "expense", "merchant_name": "Hotstar Premium Plan", "category": "Entertainment",
+         "timestamp": (now - timedelta(days=30 * months + 2)).isoformat()}
+        for months in range(5)
+    ] + [
+        # Irregular merchant: never suggested
+        {"amount": 120.0, "type": "expense", "merchant_name": "Corner Bakery Stall",
+         "timestamp": (now - timedelta(days=days)).isoformat()}
+        for days in (1, 4, 20, 21, 70)
+    ]
+    response = client.post(f"/transactions/bulk?user_id={test_user.id}", json=charges)
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get(f"/subscriptions/suggestions?user_id={test_user.id}&refresh=true")
+    assert response.status_code == status.HTTP_200_OK
+    suggestions = {s["name"]: s for s in response.json()}
+    assert "Corner Bakery Stall" not in suggestions
+    hotstar = suggestions["Hotstar Premium Plan"]
+    assert (hotstar["billing_cycle"], hotstar["amount"], hotstar["category"]) == ("monthly", 649.0, "Entertainment")
+    assert hotstar["occurrences"] >= 5
+    assert hotstar["next_due_date"] >= now.date().isoformat()
+
+@pytest.mark.asyncio
+async def test_concurrent_renewals_bill_each_missed_cycle_once(client: TestClient, test_user: User):
+    import asyncio
+    import uuid
+    from datetime import date, timedelta
+    from app.db.database import new_async_session
+    from app.services.subscription_service import renew_due
+
+    async def renew():
+        async with new_async_session() as db:
+            return await renew_due(db, today, batch_size=1)
+
+    today = date.today()
+    name = f"Gym Pass {uuid.uuid4().hex[:6]}"
+    response = client.post(f"/subscriptions/?user_id={test_user.id}", json={
+        "name": name, "amount": 300.0, "billing_cycle": "weekly", "category": "Health",
+        "next_due_date": (today - timedelta(days=15)).isoformat(),
+    })
+    assert response.status_code == status.HTTP_201_CREATED
+    subscription = response.json()
+
+    await asyncio.gather(renew(), renew(), renew())
+
+    refreshed = client.get(f"/subscriptions/{subscription['id']}?user_id={test_user.id}").json()
+    assert refreshed["next_due_date"] == (today + timedelta(days=6)).isoformat()
+    transactions = client.get(f"/transactions/?user_id={test_user.id}&category=Health&limit=100").json()["items"]
+    billed = sorted(t["timestamp"][:10] for t in transactions if t["merchant_name"] == name)
+    assert billed == [(today - timedelta(days=days)).isoformat() for days in (15, 8, 1)]
+
+    response = client.put(f"/subscriptions/{subscription['id']}?user_id={test_user.id}", json={"status": "paused"})
+    assert (response.json()["status"], response.json()["amount"]) == ("paused", 300.0)
+    client.delete(f"/subscriptions/{subscription['id']}?user_id={test_user.id}")
+
+@pytest.mark.asyncio
+async def test_unknown_billing_cycles_are_refused_and_never_billed(client: TestClient, test_user: User):
+    import uuid
+    from datetime import date, timedelta
+    from app.db.database import new_async_session
+    from app.db.models.subscription import Subscription
+    from app.services.subscription_service import add_cycle, renew_due
+
+    due = (date.today() - timedelta(days=3)).isoformat()
+    for cycle in ("quarterly", "Monthly"):
+        response = client.post(f"/subscriptions/?user_id={test_user.id}", json={
+            "name": "Magazine", "amount": 99.0, "billing_cycle": cycle, "next_due_date": due,
+        })
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    with pytest.raises(ValueError):
+        add_cycle(date.today(), "quarterly")
+
+    # One saved before validation is skipped, not charged monthly
+    async with new_async_session() as db:
+        legacy = Subscription(user_id=test_user.id, name=f"Legacy {uuid.uuid4().hex[:6]}", amount=99.0,
+                              billing_cycle="quarterly", next_due_date=date.fromisoformat(due))
+        db.add(legacy)
+        await db.commit()
+        result = await renew_due(db)
+        assert result["skipped"] >= 1
+        await db.refresh(legacy)
+        assert legacy.next_due_date == date.fromisoformat(due)
+        await db.delete(legacy)
+        await db.commit()
+
+    response = client.post(f"/subscriptions/?user_id={test_user.id}", json={
+        "name": "Cloud Storage", "amount": 130.0, "billing_cycle": "monthly",
+        "next_due_date": (date.today() + timedelta(days=10)).isoformat(),
+    })
+    subscription = response.json()
+    for field in ("next_due_date", "amount", "billing_cycle"):
+        response = client.put(f"/subscriptions/{subscription['id']}?user_id={test_user.id}", json={field: None})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    client.delete(f"/subscriptions/{subscription['id']}?user_id={test_user.id}")
\ No newline at end of file
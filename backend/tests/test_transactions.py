@@ -1,3 +1,6 @@
+import gzip
+import io
+import zipfile
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
@@ -86,4 +89,84 @@ async def test_login_invalid_credentials(client: TestClient):
     }
     response = client.post("/auth/login", json=login_data)
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
-    assert "Invalid email or password" in response.json()["detail"]
\ No newline at end of file
+    assert "Invalid email or password" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_get_transactions_cursor_pagination(client: TestClient, test_user: User):
+    for day in range(1, 6):
+        transaction_data = {
+            "amount": 10.0 * day,
+            "category": "Food",
+            "type": "expense",
+            "timestamp": f"2025-01-0{day}T12:00:00"
+        }
+        response = client.post(f"/transactions/?user_id={test_user.id}", json=transaction_data)
+        assert response.status_code == status.HTTP_201_CREATED
+    seen = []
+    cursor = None
+    while True:
+        url = f"/transactions/?user_id={test_user.id}&limit=2&category=Food"
+        if cursor:
+            url += f"&cursor={cursor}"
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend((t["timestamp"], t["id"]) for t in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen))
+    assert seen == sorted(seen, reverse=True)
+
+@pytest.mark.asyncio
+async def test_get_transactions_invalid_cursor(client: TestClient, test_user: User):
+    response = client.get(f"/transactions/?user_id={test_user.id}&cursor=not-a-cursor")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.asyncio
+async def test_bulk_create_transactions_reports_row_errors(client: TestClient, test_user: User):
+    rows = [
+        {"amount": 12.5, "category": "Food", "type": "expense", "timestamp": "2025-02-01T09:00:00"},
+        {"amount": "not-a-number", "type": "expense", "timestamp": "2025-02-01T09:00:00"},
+        {"amount": 2000.0, "category": "Salary", "type": "income", "timestamp": "2025-02-01T10:00:00"}
+    ]
+    response = client.post(f"/transactions/bulk?user_id={test_user.id}", json=rows)
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    assert result["received"] == 3
+    assert result["inserted"] == 2
+    assert len(result["ids"]) == 2
+    assert [e["index"] for e in result["errors"]] == [1]
+
+@pytest.mark.asyncio
+async def test_bulk_create_transactions_ndjson(client: TestClient, test_user: User):
+    body = "\n".join([
+        '{"amount": 5.0, "type": "expense", "timestamp": "2025-02-02T09:00:00"}',
+        '{"amount": 6.0, "type": "expense", "timestamp": "2025-02-02T10:00:00"}'
+    ])
+    response = client.post(
+        f"/transactions/bulk?user_id={test_user.id}",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["inserted"] == 2
+
+@pytest.mark.asyncio
+async def test_export_transactions_csv_gzip(client: TestClient, test_user: User):
+    transaction_data = {"amount": 42.0, "category": "Tax", "type": "expense", "timestamp": "2025-03-01T12:00:00"}
+    client.post(f"/transactions/?user_id={test_user.id}", json=transaction_data)
+    response = client.get(f"/transactions/export?user_id={test_user.id}&format=csv")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/gzip"
+    lines = gzip.decompress(response.content).decode().splitlines()
+    assert lines[0].startswith("id,amount,description,category")
+    assert any(",Tax," in line for line in lines[1:])
+
+@pytest.mark.asyncio
+async def test_export_ledger_archive(client: TestClient, test_user: User):
+    response = client.get(f"/transactions/export?user_id={test_user.id}&format=ndjson&include=debts&include=subscriptions")
+    assert response.status_code == status.HTTP_200_OK
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == ["transactions.ndjson", "debts.ndjson", "subscriptions.ndjson"]